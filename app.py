@@ -745,13 +745,26 @@ def dashboard():
     if context_mode != "user":
         user_id_param = None
 
-    dashboard_snapshot = db.get_dashboard_snapshot(
+    # The global snapshot, its guest section and the certification list run
+    # on the DB executor while this thread resolves the user context.
+    dashboard_future = db.execute_async(
+        db.get_dashboard_snapshot,
         start_dt,
         end_dt,
         plan=plan,
         cert_id=cert_id,
         user_query=user_param or None,
+        include_guests=False,
     )
+    guests_future = db.execute_async(
+        db.get_guest_dashboard_metrics,
+        start_dt,
+        end_dt,
+        plan=plan,
+        cert_id=cert_id,
+        user_query=user_param or None,
+    )
+    certifications_future = db.execute_async(db.get_public_certifications)
     user_matches = []
     selected_user_id = None
     if user_id_param:
@@ -769,7 +782,9 @@ def dashboard():
         user_snapshot = db.get_user_dashboard_snapshot(
             selected_user_id, start_dt, end_dt, cert_id=cert_id
         )
-    certifications = db.get_public_certifications()
+    dashboard_snapshot = dashboard_future.result()
+    dashboard_snapshot["guests"] = guests_future.result()
+    certifications = certifications_future.result()
     plan_options = [
         {"value": "all", "label": "Tous les plans"},
         {"value": 0, "label": "Free"},
@@ -2932,25 +2947,22 @@ def _compute_fix_progress(cert_id, action):
     if not cert_id:
         return {"total": 0, "corrected": 0, "remaining": 0}
 
+    stats = db.get_cert_question_stats(cert_id)
     if action == "assign":
-        total = db.count_questions_with_answers(cert_id)
-        remaining = db.count_questions_missing_correct_answer(cert_id)
-    elif action == "drag":
-        nature_code = db.nature_mapping['drag-n-drop']
-        total = db.count_questions_by_nature(cert_id, nature_code)
-        remaining = db.count_questions_without_answers_by_nature(cert_id, nature_code)
-    elif action == "matching":
-        nature_code = db.nature_mapping['matching']
-        total = db.count_questions_by_nature(cert_id, nature_code)
-        remaining = db.count_questions_without_answers_by_nature(cert_id, nature_code)
+        total = stats["with_answers"]
+        remaining = stats["missing_correct"]
+    elif action in ("drag", "matching"):
+        nature_key = "drag-n-drop" if action == "drag" else "matching"
+        bucket = stats["by_nature"].get(db.nature_mapping[nature_key], {})
+        total = bucket.get("total", 0)
+        remaining = bucket.get("without_answers", 0)
     else:
         # action == "auto" : questions sans réponse + questions sans bonne réponse
-        missing_answers = db.count_questions_without_answers(cert_id)
-        missing_correct = db.count_questions_missing_correct_answer(cert_id)
+        missing_answers = stats["without_answers"]
+        missing_correct = stats["missing_correct"]
         remaining = missing_answers + missing_correct
         # total = toutes les questions de la certification
-        total_with_answers = db.count_questions_with_answers(cert_id)
-        total = total_with_answers + missing_answers
+        total = stats["with_answers"] + missing_answers
 
     corrected = max(total - remaining, 0)
     return {"total": total, "corrected": corrected, "remaining": remaining}
@@ -3264,6 +3276,24 @@ def edit_code_cert_status(job_id):
     return jsonify(data)
 
 
+def _iter_question_pages(fetch_page, cert_id: int, page_size: int):
+    """Parcourt les questions d'une certification par pages de ``page_size``.
+
+    ``fetch_page`` est appelée avec l'id de la dernière question reçue
+    (pagination par clé) jusqu'à ce qu'une page incomplète soit renvoyée.
+    La première page est toujours produite, même vide.
+    """
+
+    after_id = 0
+    while True:
+        page = fetch_page(cert_id, after_id=after_id, limit=page_size)
+        if page or not after_id:
+            yield page
+        if len(page) < page_size:
+            return
+        after_id = page[-1]["id"]
+
+
 def run_fix(context: JobContext, provider_id: int, cert_id: int, action: str) -> None:
     """Correct or complete questions for a certification asynchronously."""
 
@@ -3311,6 +3341,7 @@ def run_fix(context: JobContext, provider_id: int, cert_id: int, action: str) ->
     )
     if max_workers > 1:
         context.log(f"Exécution en parallèle avec {max_workers} worker(s).")
+    page_size = _env_int("FIX_PAGE_SIZE", 200, minimum=1, maximum=5000)
 
     counters_lock = Lock()
     state = {
@@ -3407,144 +3438,153 @@ def run_fix(context: JobContext, provider_id: int, cert_id: int, action: str) ->
             r"|\[nothing\]|\[n/?a\]|\[image\]|\[exhibit\]",
             _re.IGNORECASE,
         )
-        all_missing_raw = db.get_questions_without_answers(cert_id)
-        suspicious = []
-        clean_missing = []
-        for q in all_missing_raw:
-            urls = _extract_urls(q.get("text") or "")
-            q["image_urls"] = urls
-            q["has_image"] = bool(urls)
-            if not urls and _SUSPICIOUS.search(q.get("text") or ""):
-                suspicious.append(q)
-            else:
-                clean_missing.append(q)
-
-        invalid_ids: list[int] = []
-        if suspicious:
-            context.log(
-                f"Phase 0 – {len(suspicious)} question(s) suspecte(s) soumises à validation IA."
-            )
-            phase0_lock = Lock()
-
-            def _validate_question(item: Tuple[int, Dict[str, object]]) -> None:
-                _, q = item
-                qid = q.get("id")
-                context.wait_if_paused()
-                try:
-                    results = detect_invalid_questions(provider_name, cert_name, [q])
-                except Exception as exc:
-                    context.log(f"Phase 0 – Erreur validation question {qid}: {exc}")
-                    return
-                if results and results[0].get("is_valid") is False:
-                    with phase0_lock:
-                        invalid_ids.append(qid)
-                    context.log(f"Phase 0 – Question {qid} marquée INVALIDE (sera supprimée).")
+        # Les questions sans réponse sont parcourues page par page (pagination
+        # par clé) : les phases 0 et 1 traitent chaque page avant de lire la
+        # suivante.
+        for all_missing_raw in _iter_question_pages(
+            db.get_questions_without_answers, cert_id, page_size
+        ):
+            suspicious = []
+            clean_missing = []
+            for q in all_missing_raw:
+                urls = _extract_urls(q.get("text") or "")
+                q["image_urls"] = urls
+                q["has_image"] = bool(urls)
+                if not urls and _SUSPICIOUS.search(q.get("text") or ""):
+                    suspicious.append(q)
                 else:
-                    with phase0_lock:
-                        clean_missing.append(q)
-                time.sleep(API_REQUEST_DELAY)
+                    clean_missing.append(q)
 
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [
-                    executor.submit(_validate_question, item)
-                    for item in enumerate(suspicious, start=1)
-                ]
-                for future in as_completed(futures):
-                    future.result()
-
-        if invalid_ids:
-            deleted = db.delete_questions_by_ids(invalid_ids)
-            context.log(f"Phase 0 – {deleted} question(s) absurde(s) supprimée(s).")
-            with counters_lock:
-                state["remaining"] = max(state["remaining"] - deleted, 0)
-                context.update_counters(
-                    total=total,
-                    corrected=state["corrected"],
-                    remaining=state["remaining"],
-                    processed=state["processed"],
+            invalid_ids: list[int] = []
+            if suspicious:
+                context.log(
+                    f"Phase 0 – {len(suspicious)} question(s) suspecte(s) soumises à validation IA."
                 )
+                phase0_lock = Lock()
 
-        # ── Phase 1 : compléter les questions sans réponse ────────────────────
-        # Pour chaque question sans réponse valide :
-        #   • Si elle contient des images → Vision AI pour extraire les choix
-        #   • Sinon                       → AI texte selon la nature
-        all_missing = clean_missing
-        with_images = [q for q in all_missing if q.get("image_urls")]
-        without_images = [q for q in all_missing if not q.get("image_urls")]
+                def _validate_question(item: Tuple[int, Dict[str, object]]) -> None:
+                    _, q = item
+                    qid = q.get("id")
+                    context.wait_if_paused()
+                    try:
+                        results = detect_invalid_questions(provider_name, cert_name, [q])
+                    except Exception as exc:
+                        context.log(f"Phase 0 – Erreur validation question {qid}: {exc}")
+                        return
+                    if results and results[0].get("is_valid") is False:
+                        with phase0_lock:
+                            invalid_ids.append(qid)
+                        context.log(f"Phase 0 – Question {qid} marquée INVALIDE (sera supprimée).")
+                    else:
+                        with phase0_lock:
+                            clean_missing.append(q)
+                    time.sleep(API_REQUEST_DELAY)
+
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = [
+                        executor.submit(_validate_question, item)
+                        for item in enumerate(suspicious, start=1)
+                    ]
+                    for future in as_completed(futures):
+                        future.result()
+
+            if invalid_ids:
+                deleted = db.delete_questions_by_ids(invalid_ids)
+                context.log(f"Phase 0 – {deleted} question(s) absurde(s) supprimée(s).")
+                with counters_lock:
+                    state["remaining"] = max(state["remaining"] - deleted, 0)
+                    context.update_counters(
+                        total=total,
+                        corrected=state["corrected"],
+                        remaining=state["remaining"],
+                        processed=state["processed"],
+                    )
 
-        context.log(
-            f"Phase 1 – {len(all_missing)} question(s) sans réponse "
-            f"({len(with_images)} avec images, {len(without_images)} sans image)."
-        )
+            # ── Phase 1 : compléter les questions sans réponse ────────────────
+            # Pour chaque question sans réponse valide :
+            #   • Si elle contient des images → Vision AI pour extraire les choix
+            #   • Sinon                       → AI texte selon la nature
+            all_missing = clean_missing
+            with_images = [q for q in all_missing if q.get("image_urls")]
+            without_images = [q for q in all_missing if not q.get("image_urls")]
 
-        # Questions avec images → Vision AI
-        _run_batch(
-            with_images,
-            "Phase 1a – Extraction des réponses par Vision AI",
-            lambda qs: extract_answers_from_image(provider_name, cert_name, qs),
-            lambda result: (
-                db.add_answers(
-                    result.get("question_id"),
-                    [
-                        {k: v for k, v in {
-                            "value": a.get("value", ""),
-                            "target": a.get("target") or None,
-                            "isok": a.get("isok", 0),
-                        }.items() if not (k == "target" and v is None)}
-                        for a in result.get("answers", [])
-                    ],
-                )
-                or bool(result.get("answers"))
-            ),
-        )
+            context.log(
+                f"Phase 1 – {len(all_missing)} question(s) sans réponse "
+                f"({len(with_images)} avec images, {len(without_images)} sans image)."
+            )
 
-        # Questions sans image → AI texte, routées selon la nature de la question.
-        # nature=5 (drag-n-drop) → mode 'drag'
-        # nature=4 (matching)    → mode 'matching'
-        # Les autres natures (QCM, TrueFalse…) sans image ni réponse sont ignorées :
-        # l'IA n'a pas assez de contexte pour inventer des choix de réponse sans support visuel.
-        drag_questions    = [q for q in without_images if int(q.get('nature') or 0) == 5]
-        matching_questions = [q for q in without_images if int(q.get('nature') or 0) == 4]
+            # Questions avec images → Vision AI
+            _run_batch(
+                with_images,
+                "Phase 1a – Extraction des réponses par Vision AI",
+                lambda qs: extract_answers_from_image(provider_name, cert_name, qs),
+                lambda result: (
+                    db.add_answers(
+                        result.get("question_id"),
+                        [
+                            {k: v for k, v in {
+                                "value": a.get("value", ""),
+                                "target": a.get("target") or None,
+                                "isok": a.get("isok", 0),
+                            }.items() if not (k == "target" and v is None)}
+                            for a in result.get("answers", [])
+                        ],
+                    )
+                    or bool(result.get("answers"))
+                ),
+            )
 
-        _run_batch(
-            drag_questions,
-            "Phase 1b – Génération des réponses drag-n-drop par AI texte",
-            lambda qs: correct_questions(provider_name, cert_name, qs, "drag"),
-            lambda result: (
-                db.add_answers(result.get("question_id"), result.get("answers", []))
-                or bool(result.get("answers"))
-            ),
-        )
-        _run_batch(
-            matching_questions,
-            "Phase 1b – Génération des réponses matching par AI texte",
-            lambda qs: correct_questions(provider_name, cert_name, qs, "matching"),
-            lambda result: (
-                db.add_answers(result.get("question_id"), result.get("answers", []))
-                or bool(result.get("answers"))
-            ),
-        )
+            # Questions sans image → AI texte, routées selon la nature de la question.
+            # nature=5 (drag-n-drop) → mode 'drag'
+            # nature=4 (matching)    → mode 'matching'
+            # Les autres natures (QCM, TrueFalse…) sans image ni réponse sont ignorées :
+            # l'IA n'a pas assez de contexte pour inventer des choix de réponse sans support visuel.
+            drag_questions    = [q for q in without_images if int(q.get('nature') or 0) == 5]
+            matching_questions = [q for q in without_images if int(q.get('nature') or 0) == 4]
+
+            _run_batch(
+                drag_questions,
+                "Phase 1b – Génération des réponses drag-n-drop par AI texte",
+                lambda qs: correct_questions(provider_name, cert_name, qs, "drag"),
+                lambda result: (
+                    db.add_answers(result.get("question_id"), result.get("answers", []))
+                    or bool(result.get("answers"))
+                ),
+            )
+            _run_batch(
+                matching_questions,
+                "Phase 1b – Génération des réponses matching par AI texte",
+                lambda qs: correct_questions(provider_name, cert_name, qs, "matching"),
+                lambda result: (
+                    db.add_answers(result.get("question_id"), result.get("answers", []))
+                    or bool(result.get("answers"))
+                ),
+            )
 
         # ── Phase 2 : attribuer la bonne réponse ─────────────────────────────
-        questions_to_assign = db.get_questions_without_correct_answer(cert_id)
-        _run_batch(
-            questions_to_assign,
-            "Phase 2 – Attribution des bonnes réponses",
-            lambda qs: correct_questions(provider_name, cert_name, qs, "assign"),
-            lambda result: (
-                db.mark_answers_correct(
-                    result.get("question_id"), result.get("answer_ids", [])
-                )
-                or bool(result.get("answer_ids"))
-            ),
-        )
+        for questions_to_assign in _iter_question_pages(
+            db.get_questions_without_correct_answer, cert_id, page_size
+        ):
+            _run_batch(
+                questions_to_assign,
+                "Phase 2 – Attribution des bonnes réponses",
+                lambda qs: correct_questions(provider_name, cert_name, qs, "assign"),
+                lambda result: (
+                    db.mark_answers_correct(
+                        result.get("question_id"), result.get("answer_ids", [])
+                    )
+                    or bool(result.get("answer_ids"))
+                ),
+            )
 
         context.log("Correction automatique complète terminée.")
         return
 
     # ── Actions classiques (assign / drag / matching) ────────────────────────
     if action == "assign":
-        questions = db.get_questions_without_correct_answer(cert_id)
+        pages = _iter_question_pages(
+            db.get_questions_without_correct_answer, cert_id, page_size
+        )
 
         def _apply_result(result):
             answer_ids = result.get("answer_ids", [])
@@ -3553,9 +3593,11 @@ def run_fix(context: JobContext, provider_id: int, cert_id: int, action: str) ->
 
         task_label = "Attribuer les réponses correctes"
     elif action == "drag":
-        questions = db.get_questions_without_answers_by_nature(
-            cert_id, db.nature_mapping['drag-n-drop']
-        )
+        pages = [
+            db.get_questions_without_answers_by_nature(
+                cert_id, db.nature_mapping['drag-n-drop']
+            )
+        ]
 
         def _apply_result(result):
             answers = result.get("answers", [])
@@ -3564,9 +3606,11 @@ def run_fix(context: JobContext, provider_id: int, cert_id: int, action: str) ->
 
         task_label = "Compléter les questions drag-n-drop"
     else:
-        questions = db.get_questions_without_answers_by_nature(
-            cert_id, db.nature_mapping['matching']
-        )
+        pages = [
+            db.get_questions_without_answers_by_nature(
+                cert_id, db.nature_mapping['matching']
+            )
+        ]
 
         def _apply_result(result):
             answers = result.get("answers", [])
@@ -3575,12 +3619,13 @@ def run_fix(context: JobContext, provider_id: int, cert_id: int, action: str) ->
 
         task_label = "Compléter les questions matching"
 
-    _run_batch(
-        questions,
-        task_label,
-        lambda qs: correct_questions(provider_name, cert_name, qs, action),
-        _apply_result,
-    )
+    for questions in pages:
+        _run_batch(
+            questions,
+            task_label,
+            lambda qs: correct_questions(provider_name, cert_name, qs, action),
+            _apply_result,
+        )
 
 
 @celery_app.task(bind=True, name="fix.run")
@@ -29,6 +29,28 @@ DB_POOL_RESET_SESSION = os.environ.get("DB_POOL_RESET_SESSION", "true").lower()
     "yes",
 )
 DB_EXECUTOR_MAX_WORKERS = int(os.environ.get("DB_EXECUTOR_MAX_WORKERS", "8"))
+# Seconds ``get_connection`` waits for a pooled connection to be returned
+# before giving up with ``PoolError``.
+DB_POOL_WAIT_TIMEOUT = float(os.environ.get("DB_POOL_WAIT_TIMEOUT", "10"))
+# Pooled connections use the C extension of mysql-connector-python (faster
+# packet parsing and row conversion) unless ``DB_USE_PURE`` forces the pure
+# Python implementation.
+DB_USE_PURE = os.environ.get("DB_USE_PURE", "false").lower() in ("1", "true", "yes")
+# Lifetime (in seconds) of the in-process cache for provider/certification/
+# domain lookups.  Set to ``0`` to disable caching.
+DB_REFERENCE_CACHE_TTL = float(os.environ.get("DB_REFERENCE_CACHE_TTL", "300"))
+# Lifetime (in seconds) of cached dashboard payloads, keyed by their filters.
+# Set to ``0`` to disable caching.
+DB_DASHBOARD_CACHE_TTL = float(os.environ.get("DB_DASHBOARD_CACHE_TTL", "60"))
+# User searches match substrings (``LIKE '%q%'``) unless this is enabled.
+# When it is and the ``ft_users_search`` FULLTEXT index exists, searches made
+# of indexable words use a word-prefix match instead, which avoids scanning
+# ``users`` but no longer finds text in the middle of a word.
+DB_USER_FULLTEXT_SEARCH = os.environ.get("DB_USER_FULLTEXT_SEARCH", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
 
 # ---------------------------------------------------------------------------
 # OpenAI configuration
@@ -1,17 +1,32 @@
 import mysql.connector
 from mysql.connector import pooling
+import copy
+import functools
 import logging
 import json
+import re
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, date, time, timedelta
-from threading import Lock
+from operator import itemgetter, methodcaller
+from threading import BoundedSemaphore, Lock
+from time import monotonic, sleep
 from typing import Iterable, Optional, Union
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
 from config import (
     DB_CONFIG,
+    DB_DASHBOARD_CACHE_TTL,
     DB_EXECUTOR_MAX_WORKERS,
     DB_POOL_NAME,
     DB_POOL_RESET_SESSION,
     DB_POOL_SIZE,
+    DB_POOL_WAIT_TIMEOUT,
+    DB_REFERENCE_CACHE_TTL,
+    DB_USER_FULLTEXT_SEARCH,
+    DB_USE_PURE,
 )
 
 # Valeurs de niveau : easy→0, medium→1, hard→2
@@ -26,12 +41,93 @@ reverse_level_mapping = {value: key for key, value in level_mapping.items()}
 reverse_nature_mapping = {value: key for key, value in nature_mapping.items()}
 reverse_ty_mapping = {value: key for key, value in ty_mapping.items()}
 
-executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_MAX_WORKERS)
+# (level, nature, ty) codes → (difficulty, question type, scenario) labels.
+_CATEGORY_LABELS = {
+    (level_num, nature_num, ty_num): (difficulty, qtype, scenario)
+    for level_num, difficulty in reverse_level_mapping.items()
+    for nature_num, qtype in reverse_nature_mapping.items()
+    for ty_num, scenario in reverse_ty_mapping.items()
+}
+
+# Natures whose answers can be generated automatically, keyed by code.
+_MISSING_ANSWER_NATURES = {
+    nature_mapping[key]: key for key in ("qcm", "matching", "drag-n-drop")
+}
+
+# Each worker holds a pooled connection while request threads borrow from the
+# same pool, so the executor only gets half of it; the other half stays free
+# for the web threads.  The semaphore caps queued work to make callers wait
+# instead of piling up futures.
+_EXECUTOR_WORKERS = max(1, min(DB_EXECUTOR_MAX_WORKERS, DB_POOL_SIZE // 2))
+executor = ThreadPoolExecutor(max_workers=_EXECUTOR_WORKERS, thread_name_prefix="db")
+_EXECUTOR_SLOTS = BoundedSemaphore(_EXECUTOR_WORKERS * 2)
 _SCHEDULE_COLUMNS: set[str] | None = None
 _PDF_IMPORT_HISTORY_COLUMNS: set[str] | None = None
+# Serializes the lazy ``SHOW COLUMNS`` lookups so concurrent first requests
+# run a single metadata query.
+_SCHEMA_CACHE_LOCK = Lock()
 _ALLOWED_SCORE_COLUMNS = ("score", "result", "note")
+_SCHEDULE_FETCH_SIZE = 512
+_REPORT_FETCH_SIZE = 1000
+# Rows per multi-row INSERT / IN-list lookup; keeps statements well below the
+# default ``max_allowed_packet``.
+_INSERT_BATCH_SIZE = 500
+# ``json.dumps`` builds a new encoder whenever a keyword argument is passed;
+# answers are serialized once per row, so share one.  The output must stay
+# byte-identical to ``json.dumps(..., ensure_ascii=False)`` because answer
+# de-duplication compares the stored text.
+_encode_json = json.JSONEncoder(ensure_ascii=False).encode
+# Parsing and the schedule ``channels`` payload go through orjson when it is
+# installed; both only need to round-trip, not to match stored text.
+if orjson is not None:
+    _json_loads = orjson.loads
+
+    def _dumps_channels(value):
+        return orjson.dumps(value).decode()
+else:  # pragma: no cover - exercised without orjson
+    _json_loads = json.loads
+    _dumps_channels = json.dumps
+# First characters a JSON document can start with (``N``/``I`` cover the
+# NaN/Infinity literals the stdlib parser accepts).
+_JSON_START_CHARS = frozenset('{["tfnNI-0123456789')
+# Length of the ``answers.text`` column.
+_ANSWER_TEXT_MAX = 700
+_SCHEDULE_PROJECTIONS: dict = {}
+_SCHEDULE_SELECTS: dict = {}
+_SCHEDULE_BASE_COLUMNS = (
+    "id",
+    "day",
+    "time_of_day",
+    "provider_id",
+    "provider_name",
+    "cert_id",
+    "cert_name",
+    "subject",
+    "subject_label",
+    "content_type",
+    "content_label",
+    "link",
+    "channels",
+    "note",
+    "status",
+    "last_run_at",
+)
+_SCHEDULE_OPTIONAL_COLUMNS = ("job_id", "result_summary")
 _POOL: pooling.MySQLConnectionPool | None = None
 _POOL_LOCK = Lock()
+_POOL_RETRY_DELAY = 0.05
+_REFERENCE_CACHES: list[dict] = []
+_REFERENCE_CACHE_LOCK = Lock()
+_DASHBOARD_CACHES: list[dict] = []
+# Dashboard keys include free-text user searches; past this many entries the
+# expired ones are purged, then the whole cache if it is still full.
+_DASHBOARD_CACHE_MAX = 256
+
+
+def _looks_like_json(text: str) -> bool:
+    """Return False for strings that cannot be JSON, without parsing them."""
+    stripped = text.lstrip()
+    return bool(stripped) and stripped[0] in _JSON_START_CHARS
 
 
 def _safe_json_loads(raw, default=None):
@@ -39,9 +135,11 @@ def _safe_json_loads(raw, default=None):
         return default
     if isinstance(raw, (dict, list)):
         return raw
+    if isinstance(raw, str) and not _looks_like_json(raw):
+        return default
     try:
-        return json.loads(raw)
-    except (TypeError, json.JSONDecodeError):
+        return _json_loads(raw)
+    except (TypeError, ValueError):
         return default
 
 
@@ -50,31 +148,115 @@ def _json_dumps(value) -> str | None:
         return None
     if isinstance(value, str):
         return value
-    return json.dumps(value, ensure_ascii=False)
+    return _encode_json(value)
 
 
-def _safe_json_loads(raw, default=None):
-    if raw is None or raw == "":
-        return default
-    if isinstance(raw, (dict, list)):
-        return raw
-    try:
-        return json.loads(raw)
-    except (TypeError, json.JSONDecodeError):
-        return default
+def _ttl_cached(ttl, copy_value, registry, maxsize=None):
+    """Build a decorator caching results for ``ttl`` seconds.
 
+    Results are keyed by the call arguments, stored in a dict appended to
+    ``registry`` and handed out through ``copy_value`` so callers never share
+    the cached object.
+    """
 
-def _json_dumps(value) -> str | None:
-    if value is None:
-        return None
-    if isinstance(value, str):
-        return value
-    return json.dumps(value, ensure_ascii=False)
+    def decorator(func):
+        cache: dict = {}
+        registry.append(cache)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if ttl <= 0:
+                return func(*args, **kwargs)
+            key = (args, tuple(sorted(kwargs.items()))) if kwargs else args
+            now = monotonic()
+            with _REFERENCE_CACHE_LOCK:
+                entry = cache.get(key)
+            if entry is not None and entry[0] > now:
+                return copy_value(entry[1])
+            value = func(*args, **kwargs)
+            with _REFERENCE_CACHE_LOCK:
+                if maxsize is not None and len(cache) >= maxsize:
+                    for stale in [k for k, (expires, _) in cache.items() if expires <= now]:
+                        del cache[stale]
+                    if len(cache) >= maxsize:
+                        cache.clear()
+                cache[key] = (now + ttl, value)
+            return copy_value(value)
+
+        return wrapper
+
+    return decorator
+
+
+# Cache a reference-data lookup for ``DB_REFERENCE_CACHE_TTL`` seconds; the
+# entries are dropped by ``invalidate_reference_caches`` whenever the
+# underlying tables change.
+_reference_cached = _ttl_cached(DB_REFERENCE_CACHE_TTL, list, _REFERENCE_CACHES)
+# Dashboard payloads are rebuilt at most every ``DB_DASHBOARD_CACHE_TTL``
+# seconds per filter set.  The routes decorate the returned dicts in place,
+# hence the deep copy.
+_dashboard_cached = _ttl_cached(
+    DB_DASHBOARD_CACHE_TTL, copy.deepcopy, _DASHBOARD_CACHES, _DASHBOARD_CACHE_MAX
+)
+
+
+def invalidate_reference_caches() -> None:
+    """Drop cached provider/certification/domain lookups."""
+    with _REFERENCE_CACHE_LOCK:
+        for cache in _REFERENCE_CACHES:
+            cache.clear()
+
+
+def invalidate_dashboard_caches() -> None:
+    """Drop cached dashboard payloads."""
+    with _REFERENCE_CACHE_LOCK:
+        for cache in _DASHBOARD_CACHES:
+            cache.clear()
 
 
 def execute_async(func, *args, **kwargs):
-    """Run a database function in a background thread."""
-    return executor.submit(func, *args, **kwargs)
+    """Run a database function in a background thread.
+
+    Blocks while ``2 * workers`` calls are already pending or running.
+    """
+    _EXECUTOR_SLOTS.acquire()
+    try:
+        future = executor.submit(func, *args, **kwargs)
+    except BaseException:
+        _EXECUTOR_SLOTS.release()
+        raise
+    future.add_done_callback(lambda _future: _EXECUTOR_SLOTS.release())
+    return future
+
+
+@contextmanager
+def db_cursor(**cursor_kwargs):
+    """Yield ``(conn, cursor)`` from the pool and release both on exit.
+
+    The connection is returned to the pool even when the block raises, after
+    rolling back whatever the block left uncommitted.  Rows an unbuffered
+    cursor did not consume are drained first.
+    """
+    conn = get_connection()
+    cursor = conn.cursor(**cursor_kwargs)
+    try:
+        yield conn, cursor
+    except Exception:
+        try:
+            if conn.unread_result:
+                conn.consume_results()
+            conn.rollback()
+        except Exception:
+            pass
+        raise
+    finally:
+        try:
+            if conn.unread_result:
+                conn.consume_results()
+        except Exception:
+            pass
+        cursor.close()
+        conn.close()
 
 
 def get_connection():
@@ -82,100 +264,210 @@ def get_connection():
     if _POOL is None:
         with _POOL_LOCK:
             if _POOL is None:
+                use_pure = DB_USE_PURE
+                if not use_pure and not mysql.connector.HAVE_CEXT:
+                    logging.warning(
+                        "mysql-connector C extension unavailable; "
+                        "falling back to the pure Python driver."
+                    )
+                    use_pure = True
                 _POOL = pooling.MySQLConnectionPool(
                     pool_name=DB_POOL_NAME,
                     pool_size=DB_POOL_SIZE,
                     pool_reset_session=DB_POOL_RESET_SESSION,
+                    use_pure=use_pure,
                     **DB_CONFIG,
                 )
-    return _POOL.get_connection()
+    # mysql-connector raises PoolError at once when every connection is
+    # checked out; wait for one to come back instead of failing the request.
+    deadline = None
+    while True:
+        try:
+            return _POOL.get_connection()
+        except mysql.connector.errors.PoolError:
+            now = monotonic()
+            if deadline is None:
+                deadline = now + DB_POOL_WAIT_TIMEOUT
+            if now >= deadline:
+                raise
+            sleep(_POOL_RETRY_DELAY)
+
+
+def _decode_schedule_note(raw_note):
+    add_image = True
+    metadata = {}
+    if not raw_note:
+        return "", add_image, metadata
+    if isinstance(raw_note, dict):
+        parsed = raw_note
+    elif isinstance(raw_note, str) and not _looks_like_json(raw_note):
+        # Plain-text note: skip the parse (and its exception) entirely.
+        return raw_note, add_image, metadata
+    else:
+        try:
+            parsed = _json_loads(raw_note)
+        except (TypeError, ValueError):
+            return raw_note or "", add_image, metadata
+    if isinstance(parsed, dict):
+        text = parsed.get("text")
+        add_image = parsed.get("addImage", True)
+        meta_value = parsed.get("meta")
+        if isinstance(meta_value, dict):
+            metadata = meta_value
+        return (text if isinstance(text, str) else "") or "", bool(add_image), metadata
+    if isinstance(parsed, str):
+        return parsed, add_image, metadata
+    return str(parsed), add_image, metadata
+
+
+# Exact-type formatters for the values mysql-connector returns for temporal
+# columns; subclasses and other types fall back to the generic branches.
+_TIMESTAMP_FORMATTERS = {
+    datetime: datetime.isoformat,
+    date: date.isoformat,
+    time: methodcaller("isoformat", timespec="seconds"),
+    timedelta: lambda value: (datetime.min + value).isoformat(),
+}
+_TIME_OF_DAY_FORMATTERS = {
+    time: methodcaller("isoformat", timespec="minutes"),
+    timedelta: lambda value: (datetime.min + value).time().isoformat(timespec="minutes"),
+    datetime: lambda value: value.time().isoformat(timespec="minutes"),
+}
+
+
+def _format_timestamp(value):
+    if value is None:
+        return None
+    formatter = _TIMESTAMP_FORMATTERS.get(type(value))
+    if formatter is not None:
+        return formatter(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (date,)):
+        return value.isoformat()
+    if isinstance(value, time):
+        return value.isoformat(timespec="seconds")
+    if isinstance(value, timedelta):
+        return (datetime.min + value).isoformat()
+    try:
+        return value.isoformat()  # type: ignore[attr-defined]
+    except Exception:
+        return str(value)
 
 
-def _dict_from_schedule_row(row, columns):
-    """Build a schedule entry dict from a database row."""
+def _format_time_of_day(raw_time):
+    if not raw_time:
+        return None
+    formatter = _TIME_OF_DAY_FORMATTERS.get(type(raw_time))
+    if formatter is not None:
+        return formatter(raw_time)
+    if isinstance(raw_time, time):
+        return raw_time.isoformat(timespec="minutes")
+    if isinstance(raw_time, timedelta):
+        combined = datetime.min + raw_time
+        return combined.time().isoformat(timespec="minutes")
+    if isinstance(raw_time, datetime):
+        return raw_time.time().isoformat(timespec="minutes")
+    try:
+        parsed = time.fromisoformat(str(raw_time))
+        return parsed.isoformat(timespec="minutes")
+    except Exception:
+        return str(raw_time)
 
-    def _decode_schedule_note(raw_note):
-        add_image = True
-        metadata = {}
-        if not raw_note:
-            return "", add_image, metadata
-        try:
-            parsed = json.loads(raw_note)
-        except (TypeError, json.JSONDecodeError):
-            return raw_note or "", add_image, metadata
-        if isinstance(parsed, dict):
-            text = parsed.get("text")
-            add_image = parsed.get("addImage", True)
-            meta_value = parsed.get("meta")
-            if isinstance(meta_value, dict):
-                metadata = meta_value
-            return (text if isinstance(text, str) else "") or "", bool(add_image), metadata
-        if isinstance(parsed, str):
-            return parsed, add_image, metadata
-        return str(parsed), add_image, metadata
-
-    def _format_timestamp(value):
-        if value is None:
-            return None
-        if isinstance(value, datetime):
-            return value.isoformat()
-        if isinstance(value, (date,)):
-            return value.isoformat()
-        if isinstance(value, time):
-            return value.isoformat(timespec="seconds")
-        if isinstance(value, timedelta):
-            return (datetime.min + value).isoformat()
-        try:
-            return value.isoformat()  # type: ignore[attr-defined]
-        except Exception:
-            return str(value)
 
-    data = {columns[index]: value for index, value in enumerate(row)}
-    note, add_image, note_meta = _decode_schedule_note(data.get("note"))
-    last_run_at = data.get("last_run_at") or data.get("lastRunAt")
-    job_id = data.get("job_id") or data.get("jobId")
-    result_summary = data.get("result_summary") or data.get("summary")
+def _schedule_row_projection(columns: tuple[str, ...]):
+    """Return a function turning a ``schedule_entries`` row into an entry dict.
 
-    def _format_time_of_day(raw_time):
-        if not raw_time:
-            return None
-        if isinstance(raw_time, time):
-            return raw_time.isoformat(timespec="minutes")
-        if isinstance(raw_time, timedelta):
-            combined = datetime.min + raw_time
-            return combined.time().isoformat(timespec="minutes")
-        if isinstance(raw_time, datetime):
-            return raw_time.time().isoformat(timespec="minutes")
-        try:
-            parsed = time.fromisoformat(str(raw_time))
-            return parsed.isoformat(timespec="minutes")
-        except Exception:
-            return str(raw_time)
+    The column positions are resolved once per column layout and captured by
+    the returned closure.  Projecting a row is a single ``itemgetter`` call
+    that reorders it into fixed fields (absent columns read a trailing
+    ``None`` pad) followed by a tuple unpack.
+    Projections are cached in ``_SCHEDULE_PROJECTIONS``.
+    """
 
-    return {
-        "id": data.get("id"),
-        "day": data.get("day").isoformat() if data.get("day") else None,
-        "time": _format_time_of_day(data.get("time_of_day")),
-        "providerId": data.get("provider_id"),
-        "providerName": data.get("provider_name"),
-        "certId": data.get("cert_id"),
-        "certName": data.get("cert_name"),
-        "subject": data.get("subject"),
-        "subjectLabel": data.get("subject_label"),
-        "contentType": data.get("content_type"),
-        "contentTypeLabel": data.get("content_label"),
-        "link": data.get("link"),
-        "channels": json.loads(data.get("channels")) if data.get("channels") else [],
-        "note": note,
-        "addImage": add_image,
-        "carouselTopicId": note_meta.get("carousel_topic_id"),
-        "carouselTopicLabel": note_meta.get("carousel_topic_label"),
-        "carouselQuestion": note_meta.get("carousel_question"),
-        "status": data.get("status") or "queued",
-        "lastRunAt": _format_timestamp(last_run_at),
-        "jobId": job_id,
-        "resultSummary": result_summary,
-    }
+    projection = _SCHEDULE_PROJECTIONS.get(columns)
+    if projection is not None:
+        return projection
+
+    positions = {name: index for index, name in enumerate(columns)}
+    missing = len(columns)
+
+    def _position(*names):
+        for name in names:
+            if name in positions:
+                return positions[name]
+        return missing
+
+    pick = itemgetter(
+        _position("id"),
+        _position("day"),
+        _position("time_of_day"),
+        _position("provider_id"),
+        _position("provider_name"),
+        _position("cert_id"),
+        _position("cert_name"),
+        _position("subject"),
+        _position("subject_label"),
+        _position("content_type"),
+        _position("content_label"),
+        _position("link"),
+        _position("channels"),
+        _position("note"),
+        _position("status"),
+        _position("last_run_at", "lastRunAt"),
+        _position("job_id", "jobId"),
+        _position("result_summary", "summary"),
+    )
+
+    def _project(row):
+        (
+            entry_id,
+            day,
+            time_of_day,
+            provider_id,
+            provider_name,
+            cert_id,
+            cert_name,
+            subject,
+            subject_label,
+            content_type,
+            content_label,
+            link,
+            channels,
+            raw_note,
+            status,
+            last_run_at,
+            job_id,
+            result_summary,
+        ) = pick((*row, None))
+        note, add_image, note_meta = _decode_schedule_note(raw_note)
+        return {
+            "id": entry_id,
+            "day": day.isoformat() if day else None,
+            "time": _format_time_of_day(time_of_day),
+            "providerId": provider_id,
+            "providerName": provider_name,
+            "certId": cert_id,
+            "certName": cert_name,
+            "subject": subject,
+            "subjectLabel": subject_label,
+            "contentType": content_type,
+            "contentTypeLabel": content_label,
+            "link": link,
+            "channels": _safe_json_loads(channels, []) if channels else [],
+            "note": note,
+            "addImage": add_image,
+            "carouselTopicId": note_meta.get("carousel_topic_id"),
+            "carouselTopicLabel": note_meta.get("carousel_topic_label"),
+            "carouselQuestion": note_meta.get("carousel_question"),
+            "status": status or "queued",
+            "lastRunAt": _format_timestamp(last_run_at),
+            "jobId": job_id,
+            "resultSummary": result_summary,
+        }
+
+    _SCHEDULE_PROJECTIONS[columns] = _project
+    return _project
 
 
 def _load_schedule_columns() -> set[str]:
@@ -185,13 +477,12 @@ def _load_schedule_columns() -> set[str]:
     if _SCHEDULE_COLUMNS is not None:
         return _SCHEDULE_COLUMNS
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SHOW COLUMNS FROM schedule_entries")
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    _SCHEDULE_COLUMNS = {row[0] for row in rows}
+    with _SCHEMA_CACHE_LOCK:
+        if _SCHEDULE_COLUMNS is None:
+            with db_cursor() as (conn, cursor):
+                cursor.execute("SHOW COLUMNS FROM schedule_entries")
+                rows = cursor.fetchall()
+            _SCHEDULE_COLUMNS = {row[0] for row in rows}
     return _SCHEDULE_COLUMNS
 
 
@@ -210,13 +501,12 @@ def _load_pdf_import_history_columns() -> set[str]:
     if _PDF_IMPORT_HISTORY_COLUMNS is not None:
         return _PDF_IMPORT_HISTORY_COLUMNS
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SHOW COLUMNS FROM pdf_import_history")
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    _PDF_IMPORT_HISTORY_COLUMNS = {row[0] for row in rows}
+    with _SCHEMA_CACHE_LOCK:
+        if _PDF_IMPORT_HISTORY_COLUMNS is None:
+            with db_cursor() as (conn, cursor):
+                cursor.execute("SHOW COLUMNS FROM pdf_import_history")
+                rows = cursor.fetchall()
+            _PDF_IMPORT_HISTORY_COLUMNS = {row[0] for row in rows}
     return _PDF_IMPORT_HISTORY_COLUMNS
 
 
@@ -378,56 +668,52 @@ def get_webhook_events(after_id: int = 0, limit: int = 200) -> list[dict]:
     return events
 
 
-def get_schedule_entries():
-    """Fetch all stored schedule entries."""
+def iter_schedule_entries():
+    """Yield stored schedule entries, streaming rows from the server.
+
+    Rows are pulled in batches of ``_SCHEDULE_FETCH_SIZE`` through an
+    unbuffered cursor so the full result set is never held twice in memory.
+    """
 
-    optional_columns = []
     available_columns = _load_schedule_columns()
-    if "job_id" in available_columns:
-        optional_columns.append("job_id")
-    if "result_summary" in available_columns:
-        optional_columns.append("result_summary")
-
-    columns = [
-        "id",
-        "day",
-        "time_of_day",
-        "provider_id",
-        "provider_name",
-        "cert_id",
-        "cert_name",
-        "subject",
-        "subject_label",
-        "content_type",
-        "content_label",
-        "link",
-        "channels",
-        "note",
-        "status",
-        "last_run_at",
-        *optional_columns,
-    ]
+    columns = _SCHEDULE_BASE_COLUMNS + tuple(
+        name for name in _SCHEDULE_OPTIONAL_COLUMNS if name in available_columns
+    )
+    project = _schedule_row_projection(columns)
+    query = _SCHEDULE_SELECTS.get(columns)
+    if query is None:
+        query = _SCHEDULE_SELECTS[columns] = (
+            f"SELECT {', '.join(columns)} FROM schedule_entries ORDER BY day, time_of_day"
+        )
 
     conn = get_connection()
-    cursor = conn.cursor()
-    query = f"""
-        SELECT
-            {', '.join(columns)}
-        FROM schedule_entries
-        ORDER BY day, time_of_day
-    """
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return [_dict_from_schedule_row(row, columns) for row in rows]
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute(query)
+        while True:
+            rows = cursor.fetchmany(_SCHEDULE_FETCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                yield project(row)
+    finally:
+        # Drain pending rows when the consumer stops early so the pooled
+        # connection is returned in a clean state.
+        if conn.unread_result:
+            conn.consume_results()
+        cursor.close()
+        conn.close()
+
+
+def get_schedule_entries():
+    """Fetch all stored schedule entries."""
+
+    return list(iter_schedule_entries())
 
 
 def upsert_schedule_entry(entry):
     """Insert or replace a schedule entry."""
 
-    conn = get_connection()
-    cursor = conn.cursor()
     query = """
         INSERT INTO schedule_entries (
             id, day, time_of_day, provider_id, provider_name,
@@ -470,25 +756,90 @@ def upsert_schedule_entry(entry):
 
     payload = {
         **entry,
-        "channels": json.dumps(entry.get("channels") or []),
+        "channels": _dumps_channels(entry.get("channels") or []),
         "status": entry.get("status") or "queued",
         "last_run_at": _normalize_timestamp(entry.get("lastRunAt") or entry.get("last_run_at")),
     }
-    cursor.execute(query, payload)
-    conn.commit()
-    cursor.close()
-    conn.close()
+    with db_cursor() as (conn, cursor):
+        cursor.execute(query, payload)
+        conn.commit()
 
 
-def delete_schedule_entry(entry_id: str):
-    """Delete a single schedule entry by id."""
+def migrate_schedule_channels_to_json() -> bool:
+    """Convert ``schedule_entries.channels`` to a native MySQL ``JSON`` column.
+
+    ``upsert_schedule_entry`` always stores ``channels`` as serialized JSON,
+    so existing rows are valid JSON documents. Returns True when the column
+    was altered and False when it already uses the JSON type.
+    """
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            """
+            SELECT data_type
+            FROM information_schema.columns
+            WHERE table_schema = DATABASE()
+              AND table_name = 'schedule_entries'
+              AND column_name = 'channels'
+            """
+        )
+        row = cursor.fetchone()
+        if not row or str(row[0]).lower() == "json":
+            return False
+        cursor.execute("ALTER TABLE schedule_entries MODIFY channels JSON")
+        logging.info("Converted schedule_entries.channels to JSON")
+        return True
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def migrate_answers_text_hash() -> bool:
+    """Add the indexed ``answers.text_sha1`` lookup column.
+
+    The column is generated by the server from ``text``, so every writer keeps
+    it in sync without code changes, and the answer de-duplication lookups of
+    ``insert_questions`` switch to it once it exists. Returns True when the
+    column was added and False when it was already present.
+    """
 
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("DELETE FROM schedule_entries WHERE id = %s", (entry_id,))
-    conn.commit()
-    cursor.close()
-    conn.close()
+    try:
+        cursor.execute(
+            """
+            SELECT 1
+            FROM information_schema.columns
+            WHERE table_schema = DATABASE()
+              AND table_name = 'answers'
+              AND column_name = 'text_sha1'
+            """
+        )
+        if cursor.fetchone():
+            return False
+        cursor.execute(
+            """
+            ALTER TABLE answers
+                ADD COLUMN text_sha1 BINARY(20) AS (UNHEX(SHA1(text))) STORED,
+                ADD INDEX idx_answers_text_sha1 (text_sha1)
+            """
+        )
+        _COLUMN_CACHE.pop("answers", None)
+        logging.info("Added answers.text_sha1 lookup column")
+        return True
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def delete_schedule_entry(entry_id: str):
+    """Delete a single schedule entry by id."""
+
+    with db_cursor() as (conn, cursor):
+        cursor.execute("DELETE FROM schedule_entries WHERE id = %s", (entry_id,))
+        conn.commit()
 
 
 def update_schedule_status(
@@ -496,152 +847,136 @@ def update_schedule_status(
 ) -> None:
     """Update the status (and optionally timestamp) of schedule entries."""
 
-    ids = list(entry_ids)
+    ids = list(dict.fromkeys(entry_ids))
     if not ids:
         return
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    payloads = [
-        {"status": status, "last_run_at": last_run_at, "id": entry_id}
-        for entry_id in ids
-    ]
-    cursor.executemany(
-        """
-        UPDATE schedule_entries
-        SET status = %(status)s, last_run_at = %(last_run_at)s
-        WHERE id = %(id)s
-        """,
-        payloads,
-    )
-    conn.commit()
-    cursor.close()
-    conn.close()
+    with db_cursor() as (conn, cursor):
+        # Status and timestamp are shared by every entry: one UPDATE per
+        # IN-list chunk instead of one statement per id.
+        for start in range(0, len(ids), _INSERT_BATCH_SIZE):
+            chunk = ids[start:start + _INSERT_BATCH_SIZE]
+            placeholders = ','.join(['%s'] * len(chunk))
+            cursor.execute(
+                f"""
+                UPDATE schedule_entries
+                SET status = %s, last_run_at = %s
+                WHERE id IN ({placeholders})
+                """,
+                (status, last_run_at, *chunk),
+            )
+        conn.commit()
 
 
 def get_public_certifications():
     """Return certifications marked as published along with their provider."""
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = """
-        SELECT c.id, c.name, c.prov AS provider_id, p.name AS provider_name
-        FROM courses c
-        LEFT JOIN provs p ON p.id = c.prov
-        WHERE c.pub = 1
-        ORDER BY c.name
-    """
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    with db_cursor() as (conn, cursor):
+        query = """
+            SELECT c.id, c.name, c.prov AS provider_id, p.name AS provider_name
+            FROM courses c
+            LEFT JOIN provs p ON p.id = c.prov
+            WHERE c.pub = 1
+            ORDER BY c.name
+        """
+        cursor.execute(query)
+        rows = cursor.fetchall()
     return [
         {"id": row[0], "name": row[1], "provider_id": row[2], "provider_name": row[3]}
         for row in rows
     ]
 
 
+@_reference_cached
 def get_providers():
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = "SELECT id, name FROM provs"
-    cursor.execute(query)
-    providers = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    with db_cursor() as (conn, cursor):
+        query = "SELECT id, name FROM provs"
+        cursor.execute(query)
+        providers = cursor.fetchall()
     return providers
 
 
+@_reference_cached
 def get_certifications_by_provider(provider_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = "SELECT id, name FROM courses WHERE prov = %s"
-    cursor.execute(query, (provider_id,))
-    certifications = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    with db_cursor() as (conn, cursor):
+        query = "SELECT id, name FROM courses WHERE prov = %s"
+        cursor.execute(query, (provider_id,))
+        certifications = cursor.fetchall()
     return certifications
 
 
+@_reference_cached
 def get_certifications_by_provider_with_code(provider_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = "SELECT id, name, code_cert_key FROM courses WHERE prov = %s"
-    cursor.execute(query, (provider_id,))
-    certifications = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    with db_cursor() as (conn, cursor):
+        query = "SELECT id, name, code_cert_key FROM courses WHERE prov = %s"
+        cursor.execute(query, (provider_id,))
+        certifications = cursor.fetchall()
     return certifications
 
 
 def get_certifications_by_provider_with_pub(provider_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = """
-        SELECT
-            c.id,
-            c.name,
-            c.code_cert_key,
-            c.pub,
-            (
-                SELECT COUNT(q.id)
-                FROM questions q
-                JOIN modules m ON m.id = q.module
-                WHERE m.course = c.id
-            ) AS total_questions,
-            (
-                SELECT m_def.id
-                FROM modules m_def
-                WHERE m_def.course = 23
-                  AND (
-                    TRIM(m_def.code_cert) = TRIM(c.code_cert_key)
-                    OR m_def.name = LEFT(CONCAT(c.name, '-default'), 255)
-                  )
-                ORDER BY m_def.id DESC
-                LIMIT 1
-            ) AS default_module_id,
-            (
-                SELECT c_def.id
-                FROM modules m_def
-                JOIN courses c_def ON c_def.id = m_def.course
-                WHERE m_def.course = 23
-                  AND (
-                    TRIM(m_def.code_cert) = TRIM(c.code_cert_key)
-                    OR m_def.name = LEFT(CONCAT(c.name, '-default'), 255)
-                  )
-                ORDER BY m_def.id DESC
-                LIMIT 1
-            ) AS default_cert_id,
-            (
-                SELECT c_def.prov
-                FROM modules m_def
-                JOIN courses c_def ON c_def.id = m_def.course
-                WHERE m_def.course = 23
-                  AND (
-                    TRIM(m_def.code_cert) = TRIM(c.code_cert_key)
-                    OR m_def.name = LEFT(CONCAT(c.name, '-default'), 255)
-                  )
-                ORDER BY m_def.id DESC
-                LIMIT 1
-            ) AS default_provider_id
-        FROM courses c
-        WHERE c.prov = %s
-    """
-    cursor.execute(query, (provider_id,))
-    certifications = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    with db_cursor() as (conn, cursor):
+        query = """
+            SELECT
+                c.id,
+                c.name,
+                c.code_cert_key,
+                c.pub,
+                (
+                    SELECT COUNT(q.id)
+                    FROM questions q
+                    JOIN modules m ON m.id = q.module
+                    WHERE m.course = c.id
+                ) AS total_questions,
+                (
+                    SELECT m_def.id
+                    FROM modules m_def
+                    WHERE m_def.course = 23
+                      AND (
+                        TRIM(m_def.code_cert) = TRIM(c.code_cert_key)
+                        OR m_def.name = LEFT(CONCAT(c.name, '-default'), 255)
+                      )
+                    ORDER BY m_def.id DESC
+                    LIMIT 1
+                ) AS default_module_id,
+                (
+                    SELECT c_def.id
+                    FROM modules m_def
+                    JOIN courses c_def ON c_def.id = m_def.course
+                    WHERE m_def.course = 23
+                      AND (
+                        TRIM(m_def.code_cert) = TRIM(c.code_cert_key)
+                        OR m_def.name = LEFT(CONCAT(c.name, '-default'), 255)
+                      )
+                    ORDER BY m_def.id DESC
+                    LIMIT 1
+                ) AS default_cert_id,
+                (
+                    SELECT c_def.prov
+                    FROM modules m_def
+                    JOIN courses c_def ON c_def.id = m_def.course
+                    WHERE m_def.course = 23
+                      AND (
+                        TRIM(m_def.code_cert) = TRIM(c.code_cert_key)
+                        OR m_def.name = LEFT(CONCAT(c.name, '-default'), 255)
+                      )
+                    ORDER BY m_def.id DESC
+                    LIMIT 1
+                ) AS default_provider_id
+            FROM courses c
+            WHERE c.prov = %s
+        """
+        cursor.execute(query, (provider_id,))
+        certifications = cursor.fetchall()
     return certifications
 
 
 def update_certification_pub(cert_id: int, pub_status: int) -> None:
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = "UPDATE courses SET pub = %s WHERE id = %s"
-    cursor.execute(query, (pub_status, cert_id))
-    conn.commit()
-    cursor.close()
-    conn.close()
+    with db_cursor() as (conn, cursor):
+        query = "UPDATE courses SET pub = %s WHERE id = %s"
+        cursor.execute(query, (pub_status, cert_id))
+        conn.commit()
+    invalidate_reference_caches()
 
 
 def get_provider_pub_status(provider_id: int) -> dict:
@@ -675,6 +1010,7 @@ def update_provider_certifications_pub(provider_id: int, pub_status: int) -> int
         query = "UPDATE courses SET pub = %s WHERE prov = %s"
         cursor.execute(query, (pub_status, provider_id))
         conn.commit()
+        invalidate_reference_caches()
         return cursor.rowcount
     finally:
         cursor.close()
@@ -704,6 +1040,7 @@ def update_certification_code_cert_key(
                 (new_code, old_code),
             )
         conn.commit()
+        invalidate_reference_caches()
     except Exception:
         try:
             conn.rollback()
@@ -718,83 +1055,42 @@ def update_certification_code_cert_key(
         conn.close()
 
 
-def get_certifications_by_provider_with_code(provider_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = "SELECT id, name, code_cert_key FROM courses WHERE prov = %s"
-    cursor.execute(query, (provider_id,))
-    certifications = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return certifications
-
-
-def get_certifications_by_provider_with_code(provider_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = "SELECT id, name, code_cert_key FROM courses WHERE prov = %s"
-    cursor.execute(query, (provider_id,))
-    certifications = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return certifications
-
-
-def get_certifications_by_provider_with_code(provider_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = "SELECT id, name, code_cert_key FROM courses WHERE prov = %s"
-    cursor.execute(query, (provider_id,))
-    certifications = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return certifications
-
-
 def get_certifications_without_domains():
     """Return certifications that do not have any associated domains."""
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = """
-        SELECT c.id, c.name
-        FROM courses c
-        LEFT JOIN modules m ON m.course = c.id
-        GROUP BY c.id, c.name
-        HAVING COUNT(m.id) = 0
-        ORDER BY c.name
-    """
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    with db_cursor() as (conn, cursor):
+        query = """
+            SELECT c.id, c.name
+            FROM courses c
+            LEFT JOIN modules m ON m.course = c.id
+            GROUP BY c.id, c.name
+            HAVING COUNT(m.id) = 0
+            ORDER BY c.name
+        """
+        cursor.execute(query)
+        rows = cursor.fetchall()
     return [{"id": row[0], "name": row[1]} for row in rows]
 
 
+@_reference_cached
 def get_domains_by_certification(cert_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = "SELECT id, name FROM modules WHERE course = %s"
-    cursor.execute(query, (cert_id,))
-    domains = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    with db_cursor() as (conn, cursor):
+        query = "SELECT id, name FROM modules WHERE course = %s"
+        cursor.execute(query, (cert_id,))
+        domains = cursor.fetchall()
     return domains
 
 
 def get_certifications_by_provider_with_details(provider_id: int):
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = """
-        SELECT id, name, code_cert_key, descr2, pub
-        FROM courses
-        WHERE prov = %s
-        ORDER BY name
-    """
-    cursor.execute(query, (provider_id,))
-    certifications = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    with db_cursor() as (conn, cursor):
+        query = """
+            SELECT id, name, code_cert_key, descr2, pub
+            FROM courses
+            WHERE prov = %s
+            ORDER BY name
+        """
+        cursor.execute(query, (provider_id,))
+        certifications = cursor.fetchall()
     return certifications
 
 
@@ -813,6 +1109,7 @@ def create_certification(
         """
         cursor.execute(query, (name, provider_id, code, descr2))
         conn.commit()
+        invalidate_reference_caches()
         return cursor.lastrowid
     except Exception:
         conn.rollback()
@@ -841,6 +1138,7 @@ def update_certification(cert_id: int, name: str, code: str | None, descr2: str
             """
             cursor.execute(query, (name, code, descr2, cert_id))
         conn.commit()
+        invalidate_reference_caches()
     except Exception:
         conn.rollback()
         raise
@@ -857,6 +1155,7 @@ def delete_certification(cert_id: int) -> None:
         cursor.execute("DELETE FROM modules WHERE course = %s", (cert_id,))
         cursor.execute("DELETE FROM courses WHERE id = %s", (cert_id,))
         conn.commit()
+        invalidate_reference_caches()
     except Exception:
         conn.rollback()
         raise
@@ -866,18 +1165,15 @@ def delete_certification(cert_id: int) -> None:
 
 
 def get_domains_with_details(cert_id: int):
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = """
-        SELECT id, name, descr, code_cert
-        FROM modules
-        WHERE course = %s
-        ORDER BY name
-    """
-    cursor.execute(query, (cert_id,))
-    domains = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    with db_cursor() as (conn, cursor):
+        query = """
+            SELECT id, name, descr, code_cert
+            FROM modules
+            WHERE course = %s
+            ORDER BY name
+        """
+        cursor.execute(query, (cert_id,))
+        domains = cursor.fetchall()
     return domains
 
 
@@ -890,6 +1186,7 @@ def create_domain(cert_id: int, name: str, descr: str | None, code_cert: str | N
             (name, descr, cert_id, code_cert),
         )
         conn.commit()
+        invalidate_reference_caches()
         return cursor.lastrowid
     except Exception:
         conn.rollback()
@@ -908,6 +1205,7 @@ def update_domain(domain_id: int, name: str, descr: str | None, code_cert: str |
             (name, descr, code_cert, domain_id),
         )
         conn.commit()
+        invalidate_reference_caches()
     except Exception:
         conn.rollback()
         raise
@@ -922,6 +1220,7 @@ def delete_domain(domain_id: int) -> None:
     try:
         cursor.execute("DELETE FROM modules WHERE id = %s", (domain_id,))
         conn.commit()
+        invalidate_reference_caches()
     except Exception:
         conn.rollback()
         raise
@@ -932,20 +1231,17 @@ def delete_domain(domain_id: int) -> None:
 
 def get_domain_question_counts_for_cert(cert_id):
     """Return question counts per domain for a certification."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = """
-        SELECT m.id, m.name, COUNT(q.id) AS total_questions
-        FROM modules m
-        LEFT JOIN questions q ON q.module = m.id
-        WHERE m.course = %s
-        GROUP BY m.id, m.name
-        ORDER BY m.name
-    """
-    cursor.execute(query, (cert_id,))
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    with db_cursor() as (conn, cursor):
+        query = """
+            SELECT m.id, m.name, COUNT(q.id) AS total_questions
+            FROM modules m
+            LEFT JOIN questions q ON q.module = m.id
+            WHERE m.course = %s
+            GROUP BY m.id, m.name
+            ORDER BY m.name
+        """
+        cursor.execute(query, (cert_id,))
+        rows = cursor.fetchall()
 
     results = []
     for row in rows:
@@ -957,56 +1253,51 @@ def get_domain_question_counts_for_cert(cert_id):
 
 def get_certifications_missing_correct_answers():
     """Return certifications that still miss correct answers on questions."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = """
-        SELECT c.id, c.name, COUNT(DISTINCT q.id) AS missing_questions
-        FROM courses c
-        JOIN modules m ON m.course = c.id
-        JOIN questions q ON q.module = m.id
-        WHERE NOT EXISTS (
-            SELECT 1 FROM quest_ans qa WHERE qa.question = q.id AND qa.isok = 1
-        )
-          AND EXISTS (
-            SELECT 1 FROM quest_ans qa WHERE qa.question = q.id
-          )
-        GROUP BY c.id, c.name
-        HAVING missing_questions > 0
-        ORDER BY missing_questions DESC, c.name
-    """
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    with db_cursor() as (conn, cursor):
+        query = """
+            SELECT c.id, c.name, COUNT(*) AS missing_questions
+            FROM courses c
+            JOIN modules m ON m.course = c.id
+            JOIN questions q ON q.module = m.id
+            JOIN (
+                -- Questions with answers but none flagged correct, from a
+                -- single pass over the (question, isok) index.
+                SELECT question
+                FROM quest_ans
+                GROUP BY question
+                HAVING SUM(CASE WHEN isok = 1 THEN 1 ELSE 0 END) = 0
+            ) AS no_ok ON no_ok.question = q.id
+            GROUP BY c.id, c.name
+            ORDER BY missing_questions DESC, c.name
+        """
+        cursor.execute(query)
+        rows = cursor.fetchall()
     return [
-        {"id": row[0], "name": row[1], "missing_questions": int(row[2] or 0)}
+        {"id": row[0], "name": row[1], "missing_questions": row[2]}
         for row in rows
     ]
 
 
 def get_domains_missing_correct_answers(cert_id):
     """Return domains of a certification that miss a correct answer on questions."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = """
-        SELECT m.id, m.name, COUNT(DISTINCT q.id) AS missing_questions
-        FROM modules m
-        JOIN questions q ON q.module = m.id
-        WHERE m.course = %s
-          AND NOT EXISTS (
-            SELECT 1 FROM quest_ans qa WHERE qa.question = q.id AND qa.isok = 1
-          )
-          AND EXISTS (
-            SELECT 1 FROM quest_ans qa WHERE qa.question = q.id
-          )
-        GROUP BY m.id, m.name
-        HAVING missing_questions > 0
-        ORDER BY missing_questions DESC, m.name
-    """
-    cursor.execute(query, (cert_id,))
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    with db_cursor() as (conn, cursor):
+        query = """
+            SELECT m.id, m.name, COUNT(q.id) AS missing_questions
+            FROM modules m
+            JOIN questions q ON q.module = m.id
+            WHERE m.course = %s
+              AND NOT EXISTS (
+                SELECT 1 FROM quest_ans qa WHERE qa.question = q.id AND qa.isok = 1
+              )
+              AND EXISTS (
+                SELECT 1 FROM quest_ans qa WHERE qa.question = q.id
+              )
+            GROUP BY m.id, m.name
+            HAVING missing_questions > 0
+            ORDER BY missing_questions DESC, m.name
+        """
+        cursor.execute(query, (cert_id,))
+        rows = cursor.fetchall()
     return [
         {"id": row[0], "name": row[1], "missing_questions": int(row[2] or 0)}
         for row in rows
@@ -1015,59 +1306,46 @@ def get_domains_missing_correct_answers(cert_id):
 
 def get_domains_missing_answers_by_type():
     """Return domains with counts of questions missing answers grouped by type."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = """
-
-        SELECT m.id, m.name, c.id, c.name, q.nature, COUNT(*) AS missing_count
-        FROM modules m
-        JOIN courses c ON c.id = m.course
+    natures = tuple(_MISSING_ANSWER_NATURES)
+    with db_cursor() as (conn, cursor):
+        query = """
+            SELECT m.id, m.name, c.id, c.name,
+                   SUM(CASE WHEN q.nature = %s THEN 1 ELSE 0 END) AS qcm,
+                   SUM(CASE WHEN q.nature = %s THEN 1 ELSE 0 END) AS matching,
+                   SUM(CASE WHEN q.nature = %s THEN 1 ELSE 0 END) AS dnd
+            FROM modules m
+            JOIN courses c ON c.id = m.course
+            JOIN questions q ON q.module = m.id
+            WHERE NOT EXISTS (
+                SELECT 1 FROM quest_ans qa WHERE qa.question = q.id
+            )
+              AND q.nature IN (%s, %s, %s)
+            GROUP BY m.id, m.name, c.id, c.name
+        """
+        cursor.execute(query, natures + natures)
+        rows = cursor.fetchall()
 
-        JOIN questions q ON q.module = m.id
-        WHERE NOT EXISTS (
-            SELECT 1 FROM quest_ans qa WHERE qa.question = q.id
-        )
-          AND q.nature IN (%s, %s, %s)
-        GROUP BY m.id, m.name, c.id, c.name, q.nature
-        ORDER BY m.name
-    """
-    cursor.execute(query, (
-        nature_mapping['qcm'],
-        nature_mapping['matching'],
-        nature_mapping['drag-n-drop'],
-    ))
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-
-    results = {}
-
-    for domain_id, domain_name, course_id, course_name, nature_code, missing_count in rows:
-        domain_entry = results.setdefault(
-            domain_id,
+    results = []
+    for domain_id, domain_name, course_id, course_name, qcm, matching, dnd in rows:
+        counts = {
+            "qcm": int(qcm or 0),
+            "matching": int(matching or 0),
+            "drag-n-drop": int(dnd or 0),
+        }
+        results.append(
             {
                 "id": domain_id,
                 "name": domain_name,
                 "certification_id": course_id,
                 "certification_name": course_name,
-                "counts": {"qcm": 0, "matching": 0, "drag-n-drop": 0},
-            },
+                "counts": counts,
+                "total": counts["qcm"] + counts["matching"] + counts["drag-n-drop"],
+            }
         )
-        if nature_code == nature_mapping['qcm']:
-            key = 'qcm'
-        elif nature_code == nature_mapping['matching']:
-            key = 'matching'
-        else:
-            key = 'drag-n-drop'
-        domain_entry['counts'][key] += int(missing_count or 0)
-
-    for domain_entry in results.values():
-        domain_entry['total'] = sum(domain_entry['counts'].values())
 
     # Sort domains by certification then name for consistent display
-    return sorted(
-        results.values(), key=lambda d: (d['certification_name'], d['name'])
-    )
+    results.sort(key=lambda d: (d['certification_name'], d['name']))
+    return results
 
 
 def get_unpublished_certifications_report(include_all_unpublished: bool = False):
@@ -1077,167 +1355,146 @@ def get_unpublished_certifications_report(include_all_unpublished: bool = False)
     automation (pub = 2) are returned. When True, every certification that is
     not online (pub != 1 or NULL) is returned.
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    if include_all_unpublished:
-        where_clause = "WHERE c.pub IS NULL OR c.pub <> 1"
-    else:
-        where_clause = "WHERE c.pub = 2"
-    query = """
-        SELECT
-            p.id AS provider_id,
-            p.name AS provider_name,
-            c.id AS cert_id,
-            c.name AS cert_name,
-            c.code_cert_key AS code_cert,
-            c.pub AS pub_status,
-            (
-                SELECT COUNT(q_all.id)
-                FROM questions q_all
-                JOIN modules m_all ON m_all.id = q_all.module
-                WHERE m_all.course = c.id
-            ) AS total_questions,
-            (
-                SELECT COUNT(q_def.id)
-                FROM questions q_def
-                JOIN modules m_def ON m_def.id = q_def.module
-                WHERE m_def.course = 23
-                  AND (
-                    TRIM(m_def.code_cert) = TRIM(c.code_cert_key)
-                    OR m_def.name = LEFT(CONCAT(c.name, '-default'), 255)
-                  )
-            ) AS default_questions,
-            (
-                SELECT m_def.id
-                FROM modules m_def
-                WHERE m_def.course = 23
-                  AND (
-                    TRIM(m_def.code_cert) = TRIM(c.code_cert_key)
-                    OR m_def.name = LEFT(CONCAT(c.name, '-default'), 255)
-                  )
-                ORDER BY m_def.id DESC
-                LIMIT 1
-            ) AS default_module_id,
-            (
-                SELECT c_def.id
-                FROM modules m_def
-                JOIN courses c_def ON c_def.id = m_def.course
-                WHERE m_def.course = 23
-                  AND (
-                    TRIM(m_def.code_cert) = TRIM(c.code_cert_key)
-                    OR m_def.name = LEFT(CONCAT(c.name, '-default'), 255)
-                  )
-                ORDER BY m_def.id DESC
-                LIMIT 1
-            ) AS default_cert_id,
-            (
-                SELECT c_def.prov
-                FROM modules m_def
-                JOIN courses c_def ON c_def.id = m_def.course
-                WHERE m_def.course = 23
-                  AND (
-                    TRIM(m_def.code_cert) = TRIM(c.code_cert_key)
-                    OR m_def.name = LEFT(CONCAT(c.name, '-default'), 255)
-                  )
-                ORDER BY m_def.id DESC
-                LIMIT 1
-            ) AS default_provider_id
-        FROM courses c
-        JOIN provs p ON p.id = c.prov
-        {where_clause}
-        ORDER BY p.name, c.name
-    """
-    cursor.execute(query.format(where_clause=where_clause))
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    results = []
-    for row in rows:
-        results.append(
-            {
-                "provider_id": row[0],
-                "provider_name": row[1],
-                "cert_id": row[2],
-                "cert_name": row[3],
-                "pub_status": row[5],
-                "code_cert": row[4] or "",
-                "total_questions": int(row[6] or 0),
-                "default_questions": int(row[7] or 0),
-                "default_module_id": row[8],
-                "default_cert_id": row[9],
-                "default_provider_id": row[10],
-                "automation_eligible": bool(row[5] == 2),
-            }
-        )
+    with db_cursor(buffered=False) as (conn, cursor):
+        if include_all_unpublished:
+            where_clause = "WHERE c.pub IS NULL OR c.pub <> 1"
+        else:
+            where_clause = "WHERE c.pub = 2"
+        query = """
+            SELECT
+                p.id AS provider_id,
+                p.name AS provider_name,
+                c.id AS cert_id,
+                c.name AS cert_name,
+                c.code_cert_key AS code_cert,
+                c.pub AS pub_status,
+                COALESCE(totals.total_questions, 0) AS total_questions,
+                COALESCE(dflt.default_questions, 0) AS default_questions,
+                dflt.default_module_id,
+                CASE WHEN dflt.default_module_id IS NULL THEN NULL ELSE c_def.id END
+                    AS default_cert_id,
+                CASE WHEN dflt.default_module_id IS NULL THEN NULL ELSE c_def.prov END
+                    AS default_provider_id
+            FROM courses c
+            JOIN provs p ON p.id = c.prov
+            LEFT JOIN (
+                SELECT m_all.course, COUNT(q_all.id) AS total_questions
+                FROM modules m_all
+                JOIN questions q_all ON q_all.module = m_all.id
+                GROUP BY m_all.course
+            ) totals ON totals.course = c.id
+            LEFT JOIN (
+                -- Default modules (course 23) matched by code or by name,
+                -- aggregated once per certification.
+                SELECT
+                    c_match.id AS cert_id,
+                    SUM(d.question_count) AS default_questions,
+                    MAX(d.module_id) AS default_module_id
+                FROM courses c_match
+                JOIN (
+                    SELECT
+                        m_def.id AS module_id,
+                        TRIM(m_def.code_cert) AS code_key,
+                        m_def.name,
+                        COUNT(q_def.id) AS question_count
+                    FROM modules m_def
+                    LEFT JOIN questions q_def ON q_def.module = m_def.id
+                    WHERE m_def.course = 23
+                    GROUP BY m_def.id
+                ) d ON d.code_key = TRIM(c_match.code_cert_key)
+                    OR d.name = LEFT(CONCAT(c_match.name, '-default'), 255)
+                GROUP BY c_match.id
+            ) dflt ON dflt.cert_id = c.id
+            LEFT JOIN courses c_def ON c_def.id = 23
+            {where_clause}
+            ORDER BY p.name, c.name
+        """
+        cursor.execute(query.format(where_clause=where_clause))
+        results = []
+        for row in cursor:
+            results.append(
+                {
+                    "provider_id": row[0],
+                    "provider_name": row[1],
+                    "cert_id": row[2],
+                    "cert_name": row[3],
+                    "pub_status": row[5],
+                    "code_cert": row[4] or "",
+                    "total_questions": int(row[6] or 0),
+                    "default_questions": int(row[7] or 0),
+                    "default_module_id": row[8],
+                    "default_cert_id": row[9],
+                    "default_provider_id": row[10],
+                    "automation_eligible": bool(row[5] == 2),
+                }
+            )
     return results
 
 
 def get_question_activity_by_day(days: int = 30):
     """Return question activity totals per day and certification over recent days."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = """
-        SELECT activity_day,
-               cert_id,
-               cert_name,
-               COUNT(*) AS total_questions
-        FROM (
-            SELECT q.id AS question_id,
-                   c.id AS cert_id,
-                   c.name AS cert_name,
-                   DATE(
-                       GREATEST(
-                           q.created_at,
-                           COALESCE(q.updated_at, q.created_at),
-                           COALESCE(MAX(a.updated_at), MAX(a.created_at), q.created_at)
-                       )
-                   ) AS activity_day
-            FROM questions q
-            JOIN modules m ON q.module = m.id
-            JOIN courses c ON m.course = c.id
-            LEFT JOIN quest_ans qa ON qa.question = q.id
-            LEFT JOIN answers a ON a.id = qa.answer
-            GROUP BY q.id, c.id, c.name, q.created_at, q.updated_at
-        ) AS activity
-        WHERE activity_day >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
-        GROUP BY activity_day, cert_id, cert_name
-        ORDER BY activity_day DESC, cert_name
-    """
-    cursor.execute(query, (max(days, 1),))
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return [
-        {
-            "day": row[0],
-            "certification_id": row[1],
-            "certification_name": row[2],
-            "total": int(row[3] or 0),
-        }
-        for row in rows
-    ]
+    with db_cursor(buffered=False) as (conn, cursor):
+        query = """
+            SELECT activity_day,
+                   cert_id,
+                   cert_name,
+                   COUNT(*) AS total_questions
+            FROM (
+                SELECT q.id AS question_id,
+                       c.id AS cert_id,
+                       c.name AS cert_name,
+                       DATE(
+                           GREATEST(
+                               q.created_at,
+                               COALESCE(q.updated_at, q.created_at),
+                               COALESCE(MAX(a.updated_at), MAX(a.created_at), q.created_at)
+                           )
+                       ) AS activity_day
+                FROM questions q
+                JOIN modules m ON q.module = m.id
+                JOIN courses c ON m.course = c.id
+                LEFT JOIN quest_ans qa ON qa.question = q.id
+                LEFT JOIN answers a ON a.id = qa.answer
+                GROUP BY q.id, c.id, c.name, q.created_at, q.updated_at
+            ) AS activity
+            WHERE activity_day >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
+            GROUP BY activity_day, cert_id, cert_name
+            ORDER BY activity_day DESC, cert_name
+        """
+        cursor.execute(query, (max(days, 1),))
+        activity = []
+        while True:
+            rows = cursor.fetchmany(_REPORT_FETCH_SIZE)
+            if not rows:
+                break
+            # COUNT(*) is never NULL and already comes back as an int.
+            activity.extend(
+                {
+                    "day": day,
+                    "certification_id": cert_id,
+                    "certification_name": cert_name,
+                    "total": total,
+                }
+                for day, cert_id, cert_name, total in rows
+            )
+    return activity
 
 
 def count_total_questions(domain_id):
     """
     Renvoie le nombre total de questions dans le domaine (module) donné.
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = "SELECT COUNT(*) FROM questions WHERE module = %s"
-    cursor.execute(query, (domain_id,))
-    total = cursor.fetchone()[0]
-    cursor.close()
-    conn.close()
+    with db_cursor() as (conn, cursor):
+        query = "SELECT COUNT(*) FROM questions WHERE module = %s"
+        cursor.execute(query, (domain_id,))
+        total = cursor.fetchone()[0]
     return total
 
 
 def get_domain_question_snapshot(domain_id):
     """Return total and per-category question counts for a domain."""
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
+    with db_cursor() as (conn, cursor):
         query = """
             SELECT level, nature, ty, COUNT(*)
             FROM questions
@@ -1246,22 +1503,15 @@ def get_domain_question_snapshot(domain_id):
         """
         cursor.execute(query, (domain_id,))
         rows = cursor.fetchall()
-    finally:
-        cursor.close()
-        conn.close()
 
     total = 0
     categories = {}
+    labels = _CATEGORY_LABELS
     for level_num, nature_num, ty_num, count in rows:
-        value = int(count or 0)
-        total += value
-
-        difficulty = reverse_level_mapping.get(int(level_num))
-        qtype = reverse_nature_mapping.get(int(nature_num))
-        scenario = reverse_ty_mapping.get(int(ty_num))
-
-        if difficulty and qtype and scenario:
-            categories[(difficulty, qtype, scenario)] = value
+        total += count
+        key = labels.get((level_num, nature_num, ty_num))
+        if key:
+            categories[key] = count
 
     return total, categories
 
@@ -1277,20 +1527,214 @@ def count_questions_in_category(domain_id, level, qtype, scenario_type):
     nature_num = nature_mapping.get(qtype, 0)
     ty_num = ty_mapping.get(scenario_type, 1)
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = """
-        SELECT COUNT(*) FROM questions 
-        WHERE module = %s AND level = %s AND nature = %s AND ty = %s
-    """
-    cursor.execute(query, (domain_id, level_num, nature_num, ty_num))
-    count = cursor.fetchone()[0]
-    logging.info(f"Count for module {domain_id}, level {level_num}, nature {nature_num}, ty {ty_num}: {count}")
-    cursor.close()
-    conn.close()
+    with db_cursor() as (conn, cursor):
+        query = """
+            SELECT COUNT(*) FROM questions 
+            WHERE module = %s AND level = %s AND nature = %s AND ty = %s
+        """
+        cursor.execute(query, (domain_id, level_num, nature_num, ty_num))
+        count = cursor.fetchone()[0]
+        logging.info(f"Count for module {domain_id}, level {level_num}, nature {nature_num}, ty {ty_num}: {count}")
     return count
 
 
+def _sync_duplicate_question(cursor, existing, domain_id, src_file):
+    """Align a duplicate question's module/src_file with the current import."""
+
+    existing_id, existing_module, existing_src_file = existing
+    if (existing_module == domain_id) and (existing_src_file == src_file):
+        return
+    try:
+        cursor.execute(
+            "UPDATE questions SET module = %s, src_file = %s WHERE id = %s",
+            (domain_id, src_file, existing_id),
+        )
+        logging.info(
+            "Updated duplicate question ID %s with module=%s src_file=%s",
+            existing_id,
+            domain_id,
+            src_file,
+        )
+    except Exception as update_err:
+        logging.warning(
+            "Failed to update duplicate question metadata: %s", update_err
+        )
+
+
+def _insert_question_batch(cursor, rows):
+    """Insert ``rows`` with one multi-row INSERT and return ``{text: id}``.
+
+    Each row is ``(text, descr, level, module, nature, ty, src_file)``.
+    Returns None when the batch hits a duplicate key (e.g. a concurrent
+    import); InnoDB rolls back the whole statement so the caller can retry
+    the rows one by one.
+    """
+
+    values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, NOW())"] * len(rows))
+    params = tuple(value for row in rows for value in row)
+    try:
+        cursor.execute(
+            f"""
+            INSERT INTO questions (text, descr, level, module, nature, ty, src_file, created_at)
+            VALUES {values}
+            """,
+            params,
+        )
+    except mysql.connector.Error as err:
+        if err.errno == 1062:
+            return None
+        raise
+    texts = [row[0] for row in rows]
+    placeholders = ','.join(['%s'] * len(texts))
+    cursor.execute(
+        f"SELECT id, text FROM questions WHERE text IN ({placeholders})",
+        tuple(texts),
+    )
+    return {text: question_id for question_id, text in cursor.fetchall()}
+
+
+def _resolve_answer_ids(cursor, texts, hash_lookup=False):
+    """Return ``({text: answer_id}, created_texts)`` for serialized answers.
+
+    Existing answers are looked up in batches; the missing ones are created
+    with multi-row INSERTs, falling back to row-by-row inserts when a batch
+    hits a duplicate the lookup could not see.  With ``hash_lookup`` the
+    batches probe the fixed-width ``text_sha1`` index instead of ``text``.
+    """
+
+    if hash_lookup:
+        lookup = "SELECT id, text FROM answers WHERE text_sha1 IN ({})"
+        placeholder = "UNHEX(SHA1(%s))"
+    else:
+        lookup = "SELECT id, text FROM answers WHERE text IN ({})"
+        placeholder = "%s"
+
+    answer_ids = {}
+    for start in range(0, len(texts), _INSERT_BATCH_SIZE):
+        chunk = texts[start:start + _INSERT_BATCH_SIZE]
+        cursor.execute(
+            lookup.format(','.join([placeholder] * len(chunk))), tuple(chunk)
+        )
+        answer_ids.update((text, answer_id) for answer_id, text in cursor.fetchall())
+
+    created = set()
+    missing = [text for text in texts if text not in answer_ids]
+    for start in range(0, len(missing), _INSERT_BATCH_SIZE):
+        chunk = missing[start:start + _INSERT_BATCH_SIZE]
+        values = ", ".join(["(%s, NOW())"] * len(chunk))
+        try:
+            cursor.execute(
+                f"INSERT INTO answers (text, created_at) VALUES {values}",
+                tuple(chunk),
+            )
+        except mysql.connector.Error as err:
+            if err.errno != 1062:
+                raise
+        else:
+            cursor.execute(
+                lookup.format(','.join([placeholder] * len(chunk))), tuple(chunk)
+            )
+            answer_ids.update((text, answer_id) for answer_id, text in cursor.fetchall())
+            created.update(chunk)
+            continue
+
+        for text in chunk:
+            # LAST_INSERT_ID(id) makes ``lastrowid`` carry the existing id on a
+            # duplicate; only a fresh insert reports one affected row.
+            cursor.execute(
+                "INSERT INTO answers (text, created_at) VALUES (%s, NOW()) "
+                "ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)",
+                (text,),
+            )
+            answer_ids[text] = cursor.lastrowid
+            if cursor.rowcount == 1:
+                created.add(text)
+    return answer_ids, created
+
+
+def serialize_answer(answer_data):
+    """Serialize an answer payload to the JSON stored in ``answers.text``.
+
+    Payloads longer than ``_ANSWER_TEXT_MAX`` characters are shortened by
+    trimming their ``value`` rather than cutting the JSON string, so the stored
+    text is always a valid document.
+    """
+
+    encoded = _encode_json(answer_data)
+    overflow = len(encoded) - _ANSWER_TEXT_MAX
+    if overflow <= 0:
+        return encoded
+    value = answer_data.get("value")
+    if isinstance(value, str):
+        data = dict(answer_data)
+        while overflow > 0 and value:
+            value = value[:max(len(value) - overflow, 0)]
+            data["value"] = value
+            encoded = _encode_json(data)
+            overflow = len(encoded) - _ANSWER_TEXT_MAX
+        if overflow <= 0:
+            return encoded
+    # Other fields alone exceed the column: keep the historical truncation.
+    return encoded[:_ANSWER_TEXT_MAX]
+
+
+def answer_hash_lookup():
+    """Return whether answers can be looked up through ``answers.text_sha1``.
+
+    Call it before borrowing the connection handed to
+    ``insert_answers_and_links``: on a cold column cache the lookup takes a
+    pooled connection of its own.
+    """
+    return "text_sha1" in _get_table_columns("answers")
+
+
+def insert_answers_and_links(cursor, answer_rows, hash_lookup=None):
+    """Store ``(question_id, answer_json, isok)`` rows and link them.
+
+    Runs on the caller's ``cursor``; committing is left to the caller.
+    ``hash_lookup`` is the value of ``answer_hash_lookup()``, resolved here
+    when omitted.
+
+    Answers are resolved in batches by ``_resolve_answer_ids`` and the
+    ``quest_ans`` links, de-duplicated per (question, answer), are written with
+    one ``executemany``.  Returns ``(imported, reused)`` answer counts, where a
+    text repeated within ``answer_rows`` counts as reused.
+    """
+
+    if not answer_rows:
+        return 0, 0
+    if hash_lookup is None:
+        hash_lookup = answer_hash_lookup()
+    answer_ids, new_answers = _resolve_answer_ids(
+        cursor,
+        list(dict.fromkeys(row[1] for row in answer_rows)),
+        hash_lookup=hash_lookup,
+    )
+
+    imported = reused = 0
+    links = {}
+    for question_id, answer_json, isok in answer_rows:
+        answer_id = answer_ids[answer_json]
+        if answer_json in new_answers:
+            new_answers.discard(answer_json)
+            imported += 1
+            logging.info("  Inserted answer ID: %s", answer_id)
+        else:
+            reused += 1
+            logging.info("  Duplicate found, using existing answer ID: %s", answer_id)
+        if (question_id, answer_id) in links:
+            logging.info("  Duplicate question-answer link skipped")
+            continue
+        links[(question_id, answer_id)] = (question_id, answer_id, isok)
+    # Links that already exist (answers re-added to a question) are kept as is.
+    cursor.executemany(
+        "INSERT INTO quest_ans (question, answer, isok) VALUES (%s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE question = question",
+        list(links.values()),
+    )
+    return imported, reused
+
+
 def insert_questions(domain_id, questions_json, scenario_type_str):
     """
     Insère les questions et leurs réponses depuis la structure JSON dans la base.
@@ -1298,17 +1742,22 @@ def insert_questions(domain_id, questions_json, scenario_type_str):
     la colonne ``answers.text``. Le champ ``isok`` détermine la valeur à insérer
     dans ``quest_ans``. En cas de doublon sur la table ``answers`` (unicité du
     JSON), l'id existant est réutilisé. La colonne ``descr`` de ``questions``
-    reçoit la valeur de ``diagram_descr``.
+    reçoit la valeur de ``diagram_descr``. Les questions déjà présentes sont
+    détectées en une seule requête avant la boucle d'insertion, et les
+    nouvelles questions sont insérées par lots de ``_INSERT_BATCH_SIZE``
+    lignes, le tout dans une seule transaction.
     """
     # Mappage pour la conversion
     ty_num = ty_mapping.get(scenario_type_str, 1)
 
+    hash_lookup = answer_hash_lookup()
     conn = get_connection()
     cursor = conn.cursor()
-    q_imported = q_skipped = a_imported = a_reused = 0
+    q_imported = q_skipped = 0
     try:
         num_questions = len(questions_json.get("questions", []))
         logging.info(f"Inserting {num_questions} questions into domain {domain_id}.")
+        prepared = []
         for question in questions_json.get("questions", []):
             # Assemblage du texte final
             context = question.get("context", "").strip()
@@ -1326,105 +1775,110 @@ def insert_questions(domain_id, questions_json, scenario_type_str):
                 question_text = full_text
             else:
                 question_text = text
+            prepared.append((question, question_text, diagram_descr, src_file))
+
+        # Questions déjà en base : {texte: (id, module, src_file)}
+        existing_questions = {}
+        texts = list({item[1] for item in prepared})
+        for start in range(0, len(texts), _INSERT_BATCH_SIZE):
+            chunk = texts[start:start + _INSERT_BATCH_SIZE]
+            placeholders = ','.join(['%s'] * len(chunk))
+            cursor.execute(
+                f"SELECT id, module, src_file, text FROM questions WHERE text IN ({placeholders})",
+                tuple(chunk),
+            )
+            existing_questions.update(
+                (row[3], (row[0], row[1], row[2])) for row in cursor.fetchall()
+            )
+
+        # Nouvelles questions à insérer : {texte: [ligne, question]}
+        pending = {}
+        level_of = level_mapping.get
+        nature_of = nature_mapping.get
+        for question, question_text, diagram_descr, src_file in prepared:
+            existing = existing_questions.get(question_text)
+            if existing is not None:
+                logging.info("Duplicate question skipped")
+                q_skipped += 1
+                # Always update existing question metadata (src_file + module).
+                _sync_duplicate_question(cursor, existing, domain_id, src_file)
+                existing_questions[question_text] = (existing[0], domain_id, src_file)
+                continue
+            if question_text in pending:
+                # Doublon dans le même lot : la dernière source l'emporte.
+                logging.info("Duplicate question skipped")
+                q_skipped += 1
+                pending[question_text][0][6] = src_file
+                continue
 
             # Conversion du niveau
-            level_num = level_mapping.get(question.get("level", "medium"), 1)
+            level_num = level_of(question.get("level", "medium"), 1)
             # Conversion de la nature
-            nature_num = nature_mapping.get(question.get("nature", "qcm"), 0)
+            nature_num = nature_of(question.get("nature", "qcm"), 0)
+            pending[question_text] = [
+                [question_text, diagram_descr, level_num, domain_id, nature_num, ty_num, src_file],
+                question,
+            ]
 
-            # Insertion de la question avec le champ descr
-            query_question = """
-                INSERT INTO questions (text, descr, level, module, nature, ty, src_file, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, NOW())
-            """
-            try:
-                cursor.execute(query_question, (
-                    question_text,
-                    diagram_descr,
-                    level_num,
-                    domain_id,
-                    nature_num,
-                    ty_num,
-                    src_file
-                ))
+        inserted = []
+        pending_items = list(pending.values())
+        for start in range(0, len(pending_items), _INSERT_BATCH_SIZE):
+            chunk = pending_items[start:start + _INSERT_BATCH_SIZE]
+            question_ids = _insert_question_batch(cursor, [row for row, _ in chunk])
+            if question_ids is not None:
+                for row, question in chunk:
+                    question_id = question_ids[row[0]]
+                    q_imported += 1
+                    logging.info("Inserted question ID: %s", question_id)
+                    inserted.append((question_id, question))
+                continue
+
+            # Doublon non détecté en amont (collation, import concurrent) :
+            # insertion ligne par ligne pour isoler les questions concernées.
+            # Un doublon met à jour module/src_file en place ; le nombre de
+            # lignes affectées vaut 1 pour une insertion, 2 ou 0 sinon.
+            for row, question in chunk:
+                cursor.execute(
+                    """
+                    INSERT INTO questions (text, descr, level, module, nature, ty, src_file, created_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, NOW())
+                    ON DUPLICATE KEY UPDATE
+                        id = LAST_INSERT_ID(id),
+                        module = VALUES(module),
+                        src_file = VALUES(src_file)
+                    """,
+                    tuple(row),
+                )
                 question_id = cursor.lastrowid
-                q_imported += 1
-                logging.info(f"Inserted question ID: {question_id}")
-            except mysql.connector.Error as err:
-                if err.errno == 1062:
+                if cursor.rowcount != 1:
                     logging.info("Duplicate question skipped")
                     q_skipped += 1
-
-                    # Always update existing question metadata (src_file + module).
-                    try:
-                        cursor.execute(
-                            "SELECT id, module, src_file FROM questions WHERE text = %s LIMIT 1",
-                            (question_text,),
-                        )
-                        row = cursor.fetchone()
-                        if row:
-                            existing_id, existing_module, existing_src_file = row
-                            if (existing_module != domain_id) or (existing_src_file != src_file):
-                                cursor.execute(
-                                    "UPDATE questions SET module = %s, src_file = %s WHERE id = %s",
-                                    (domain_id, src_file, existing_id),
-                                )
-                                logging.info(
-                                    "Updated duplicate question ID %s with module=%s src_file=%s",
-                                    existing_id,
-                                    domain_id,
-                                    src_file,
-                                )
-                    except Exception as update_err:
-                        logging.warning(
-                            "Failed to update duplicate question metadata: %s", update_err
-                        )
                     continue
-                else:
-                    raise
+                q_imported += 1
+                logging.info("Inserted question ID: %s", question_id)
+                inserted.append((question_id, question))
 
-            # Insertion des réponses
+        # Insertion des réponses : (question_id, answer_json, isok)
+        answer_rows = []
+        add_row = answer_rows.append
+        for question_id, question in inserted:
             for answer in question.get("answers", []):
                 raw_val = (answer.get("value") or answer.get("text") or "").strip()
                 if not raw_val:
                     continue
 
-                # Construit un objet JSON sans le champ isok, en normalisant la clé 'value'
-                answer_data = {
-                    k: v for k, v in answer.items() if k not in ("isok", "value", "text")
-                }
+                # Construit un objet JSON sans le champ isok, en normalisant la clé
+                # 'value' (placée en dernier, comme dans les réponses déjà stockées).
+                answer_data = answer.copy()
+                isok = answer_data.pop("isok", 0)
+                answer_data.pop("value", None)
+                answer_data.pop("text", None)
                 answer_data["value"] = raw_val
-                answer_json = json.dumps(answer_data, ensure_ascii=False)[:700]
-                isok = int(answer.get("isok", 0))
-
-                try:
-                    query_answer = "INSERT INTO answers (text, created_at) VALUES (%s, NOW())"
-                    cursor.execute(query_answer, (answer_json,))
-                    answer_id = cursor.lastrowid
-                    a_imported += 1
-                    logging.info(f"  Inserted answer ID: {answer_id}")
-                except mysql.connector.Error as err:
-                    if err.errno == 1062:
-                        query_select = "SELECT id FROM answers WHERE text = %s"
-                        cursor.execute(query_select, (answer_json,))
-                        result = cursor.fetchone()
-                        if result:
-                            answer_id = result[0]
-                            a_reused += 1
-                            logging.info(f"  Duplicate found, using existing answer ID: {answer_id}")
-                        else:
-                            raise
-                    else:
-                        raise
-
-                query_link = "INSERT INTO quest_ans (question, answer, isok) VALUES (%s, %s, %s)"
-                try:
-                    cursor.execute(query_link, (question_id, answer_id, isok))
-                except mysql.connector.Error as err:
-                    if err.errno == 1062:
-                        logging.info("  Duplicate question-answer link skipped")
-                    else:
-                        raise
+                add_row((question_id, serialize_answer(answer_data), int(isok)))
+
+        a_imported, a_reused = insert_answers_and_links(
+            cursor, answer_rows, hash_lookup
+        )
         conn.commit()
         logging.info("Insertion completed")
         return {
@@ -1448,13 +1902,10 @@ def get_domains_description_by_certif(cert_id):
     en préférant le contenu du blueprint lorsqu'il est disponible.
     """
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = "SELECT id, name, descr, blueprint FROM modules WHERE course = %s"
-    cursor.execute(query, (cert_id,))
-    domains = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    with db_cursor() as (conn, cursor):
+        query = "SELECT id, name, descr, blueprint FROM modules WHERE course = %s"
+        cursor.execute(query, (cert_id,))
+        domains = cursor.fetchall()
 
     results = []
     for domain_id, name, descr, blueprint in domains:
@@ -1475,126 +1926,180 @@ def get_domains_description_by_certif(cert_id):
     return results
 
 
-def get_questions_without_correct_answer(cert_id):
-    """Return questions that have answers but none marked as correct."""
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    query = """
-        SELECT q.id AS question_id, q.text AS qtext, q.nature AS nature,
-               a.id AS answer_id, a.text AS atext
-          FROM questions q
-          JOIN modules m ON q.module = m.id
-          JOIN quest_ans qa ON qa.question = q.id
-          JOIN answers a ON qa.answer = a.id
-         WHERE m.course = %s
-           AND q.id NOT IN (SELECT question FROM quest_ans WHERE isok = 1)
-           AND q.nature NOT IN (4, 5)
-         ORDER BY q.id
+# Answer columns of the question reports: MySQL extracts the string ``value``
+# of well-formed answers itself (``avalue``) and only ships the raw JSON
+# (``atext``) for rows Python still has to parse, e.g. texts truncated by the
+# historical 700-character cut.  CASE branches are evaluated in order, so the
+# JSON functions never see invalid documents.
+_ANSWER_VALUE_COLUMNS = """
+                   CASE
+                     WHEN NOT JSON_VALID(a.text) THEN NULL
+                     WHEN JSON_TYPE(a.text->'$.value') = 'STRING' THEN a.text->>'$.value'
+                   END AS avalue,
+                   CASE
+                     WHEN NOT JSON_VALID(a.text) THEN a.text
+                     WHEN JSON_TYPE(a.text->'$.value') = 'STRING' THEN NULL
+                     ELSE a.text
+                   END AS atext"""
+
+
+def get_questions_without_correct_answer(cert_id, after_id=0, limit=None):
+    """Return questions that have answers but none marked as correct.
+
+    With ``limit``, at most ``limit`` questions whose id is greater than
+    ``after_id`` are returned; pass the last returned id to get the next page.
     """
-    cursor.execute(query, (cert_id,))
-    rows = cursor.fetchall()
-    cursor.close(); conn.close()
-    questions = {}
-    for row in rows:
-        qid = row['question_id']
-        if qid not in questions:
-            questions[qid] = {
-                "id": qid,
-                "text": row['qtext'],
-                "nature": row['nature'],
-                "answers": [],
-            }
-        try:
-            ans_text = json.loads(row['atext']).get('value', '')
-        except Exception:
-            ans_text = row['atext']
-        questions[qid]['answers'].append({"id": row['answer_id'], "value": ans_text})
-    return list(questions.values())
+    if limit is None:
+        query = """
+            SELECT q.id AS question_id, q.text AS qtext, q.nature AS nature,
+                   a.id AS answer_id, """ + _ANSWER_VALUE_COLUMNS + """
+              FROM questions q
+              JOIN modules m ON q.module = m.id
+              JOIN quest_ans qa ON qa.question = q.id
+              JOIN answers a ON qa.answer = a.id
+              LEFT JOIN quest_ans qa_ok ON qa_ok.question = q.id AND qa_ok.isok = 1
+             WHERE m.course = %s
+               AND qa_ok.question IS NULL
+               AND q.nature NOT IN (4, 5)
+               AND q.id > %s
+             ORDER BY q.id
+        """
+        params = (cert_id, after_id)
+    else:
+        # The page is cut on question ids first so that a question and all of
+        # its answers always land in the same page.
+        query = """
+            SELECT q.id AS question_id, q.text AS qtext, q.nature AS nature,
+                   a.id AS answer_id, """ + _ANSWER_VALUE_COLUMNS + """
+              FROM (
+                    SELECT q.id
+                      FROM questions q
+                      JOIN modules m ON q.module = m.id
+                      LEFT JOIN quest_ans qa_ok ON qa_ok.question = q.id AND qa_ok.isok = 1
+                     WHERE m.course = %s
+                       AND qa_ok.question IS NULL
+                       AND q.nature NOT IN (4, 5)
+                       AND q.id > %s
+                       AND EXISTS (SELECT 1 FROM quest_ans qa WHERE qa.question = q.id)
+                     ORDER BY q.id
+                     LIMIT %s
+                   ) page
+              JOIN questions q ON q.id = page.id
+              JOIN quest_ans qa ON qa.question = q.id
+              JOIN answers a ON qa.answer = a.id
+             ORDER BY q.id
+        """
+        params = (cert_id, after_id, limit)
+    questions = []
+    with db_cursor(buffered=False) as (conn, cursor):
+        cursor.execute(query, params)
+        # Rows are streamed from the server in ``_REPORT_FETCH_SIZE`` batches
+        # and folded into ``questions`` as they arrive instead of
+        # materialising the whole result set first.  They come ordered by
+        # question id, so a question's answers form one contiguous run and no
+        # per-row dict lookup is needed.
+        current_id = None
+        add_answer = None
+        while True:
+            rows = cursor.fetchmany(_REPORT_FETCH_SIZE)
+            if not rows:
+                break
+            for qid, qtext, nature, answer_id, avalue, atext in rows:
+                if qid != current_id:
+                    current_id = qid
+                    answers = []
+                    add_answer = answers.append
+                    questions.append(
+                        {"id": qid, "text": qtext, "nature": nature, "answers": answers}
+                    )
+                if avalue is None:
+                    try:
+                        avalue = _json_loads(atext).get('value', '')
+                    except Exception:
+                        avalue = atext
+                add_answer({"id": answer_id, "value": avalue})
+    return questions
+
+
+def get_cert_question_stats(cert_id):
+    """Return the question counters of a certification in a single round trip.
+
+    The result holds certification-wide totals and a ``by_nature`` mapping
+    keyed by nature code, each with ``total``, ``with_answers``,
+    ``missing_correct`` and ``without_answers`` counters.
+    """
+    with db_cursor() as (conn, cursor):
+        query = """
+            SELECT nature,
+                   COUNT(*) AS total,
+                   SUM(has_answers) AS with_answers,
+                   SUM(has_answers AND NOT has_correct) AS missing_correct,
+                   SUM(NOT has_answers) AS without_answers
+            FROM (
+                SELECT q.nature AS nature,
+                       EXISTS (
+                         SELECT 1 FROM quest_ans qa WHERE qa.question = q.id
+                       ) AS has_answers,
+                       EXISTS (
+                         SELECT 1 FROM quest_ans qa_ok
+                         WHERE qa_ok.question = q.id AND qa_ok.isok = 1
+                       ) AS has_correct
+                FROM questions q
+                JOIN modules m ON q.module = m.id
+                WHERE m.course = %s
+            ) AS question_flags
+            GROUP BY nature
+        """
+        cursor.execute(query, (cert_id,))
+        rows = cursor.fetchall()
+
+    keys = ("total", "with_answers", "missing_correct", "without_answers")
+    stats = {key: 0 for key in keys}
+    stats["by_nature"] = {}
+    for nature, *counts in rows:
+        bucket = {key: int(value or 0) for key, value in zip(keys, counts)}
+        stats["by_nature"][nature] = bucket
+        for key in keys:
+            stats[key] += bucket[key]
+    return stats
 
 
 def count_questions_with_answers(cert_id):
     """Count questions of a certification that already have at least one answer."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = """
-        SELECT COUNT(DISTINCT q.id)
-        FROM questions q
-        JOIN modules m ON q.module = m.id
-        JOIN quest_ans qa ON qa.question = q.id
-        WHERE m.course = %s
-    """
-    cursor.execute(query, (cert_id,))
-    total = cursor.fetchone()[0] or 0
-    cursor.close(); conn.close()
-    return int(total)
+    return get_cert_question_stats(cert_id)["with_answers"]
 
 
 def count_questions_missing_correct_answer(cert_id):
     """Count questions that still have no correct answer assigned."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = """
-        SELECT COUNT(DISTINCT q.id)
-        FROM questions q
-        JOIN modules m ON q.module = m.id
-        JOIN quest_ans qa ON qa.question = q.id
-        WHERE m.course = %s
-          AND q.id NOT IN (SELECT question FROM quest_ans WHERE isok = 1)
-    """
-    cursor.execute(query, (cert_id,))
-    total = cursor.fetchone()[0] or 0
-    cursor.close(); conn.close()
-    return int(total)
+    return get_cert_question_stats(cert_id)["missing_correct"]
 
 
 def get_questions_without_answers_by_nature(cert_id, nature_code):
     """Return questions of a given nature that currently have no answers."""
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    query = """
-        SELECT q.id AS question_id, q.text AS qtext
-        FROM questions q
-        JOIN modules m ON q.module = m.id
-        WHERE m.course = %s AND q.nature = %s
-          AND NOT EXISTS (SELECT 1 FROM quest_ans qa WHERE qa.question = q.id)
-    """
-    cursor.execute(query, (cert_id, nature_code))
-    rows = cursor.fetchall()
-    cursor.close(); conn.close()
-    return [{"id": r['question_id'], "text": r['qtext']} for r in rows]
+    with db_cursor() as (conn, cursor):
+        query = """
+            SELECT q.id AS question_id, q.text AS qtext
+            FROM questions q
+            JOIN modules m ON q.module = m.id
+            LEFT JOIN quest_ans qa ON qa.question = q.id
+            WHERE m.course = %s AND q.nature = %s
+              AND qa.question IS NULL
+        """
+        cursor.execute(query, (cert_id, nature_code))
+        rows = cursor.fetchall()
+    return [{"id": qid, "text": qtext} for qid, qtext in rows]
 
 
 def count_questions_by_nature(cert_id, nature_code):
     """Count questions for a certification filtered by their nature."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = """
-        SELECT COUNT(*)
-        FROM questions q
-        JOIN modules m ON q.module = m.id
-        WHERE m.course = %s AND q.nature = %s
-    """
-    cursor.execute(query, (cert_id, nature_code))
-    total = cursor.fetchone()[0] or 0
-    cursor.close(); conn.close()
-    return int(total)
+    bucket = get_cert_question_stats(cert_id)["by_nature"].get(nature_code)
+    return bucket["total"] if bucket else 0
 
 
 def count_questions_without_answers_by_nature(cert_id, nature_code):
     """Count questions of a given nature that still have no answers."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = """
-        SELECT COUNT(*)
-        FROM questions q
-        JOIN modules m ON q.module = m.id
-        WHERE m.course = %s AND q.nature = %s
-          AND NOT EXISTS (SELECT 1 FROM quest_ans qa WHERE qa.question = q.id)
-    """
-    cursor.execute(query, (cert_id, nature_code))
-    total = cursor.fetchone()[0] or 0
-    cursor.close(); conn.close()
-    return int(total)
+    bucket = get_cert_question_stats(cert_id)["by_nature"].get(nature_code)
+    return bucket["without_answers"] if bucket else 0
 
 
 def delete_questions_by_ids(question_ids: list) -> int:
@@ -1627,45 +2132,52 @@ def delete_questions_by_ids(question_ids: list) -> int:
     return deleted
 
 
-def get_questions_without_answers(cert_id):
+def get_questions_without_answers(cert_id, after_id=0, limit=None):
     """Retourne toutes les questions d'une certification sans aucune réponse.
 
     Contrairement à ``get_questions_without_answers_by_nature``, cette
     fonction cible TOUTES les natures de questions (QCM, drag-n-drop,
     matching, etc.).  Elle est utilisée par l'action ``'auto'`` pour
     identifier les questions dont les choix doivent être générés ou extraits
-    par Vision AI.
-    """
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    query = """
-        SELECT q.id AS question_id, q.text AS qtext, q.nature AS nature
-        FROM questions q
-        JOIN modules m ON q.module = m.id
-        WHERE m.course = %s
-          AND NOT EXISTS (SELECT 1 FROM quest_ans qa WHERE qa.question = q.id)
-        ORDER BY q.id
+    par Vision AI.  Avec ``limit``, seule une page de questions d'id supérieur
+    à ``after_id`` est renvoyée (pagination par clé).
     """
-    cursor.execute(query, (cert_id,))
-    rows = cursor.fetchall()
-    cursor.close(); conn.close()
-    return [{"id": r['question_id'], "text": r['qtext'], "nature": r['nature']} for r in rows]
+    with db_cursor() as (conn, cursor):
+        query = """
+            SELECT q.id, q.text, q.nature
+            FROM questions q
+            JOIN modules m ON q.module = m.id
+            LEFT JOIN quest_ans qa ON qa.question = q.id
+            WHERE m.course = %s
+              AND qa.question IS NULL
+              AND q.id > %s
+            ORDER BY q.id
+        """
+        params = (cert_id, after_id)
+        if limit is not None:
+            query += " LIMIT %s"
+            params += (limit,)
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+    return [
+        {"id": question_id, "text": text, "nature": nature}
+        for question_id, text, nature in rows
+    ]
 
 
 def count_questions_without_answers(cert_id):
     """Compte les questions sans aucune réponse pour une certification."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    query = """
-        SELECT COUNT(*)
-        FROM questions q
-        JOIN modules m ON q.module = m.id
-        WHERE m.course = %s
-          AND NOT EXISTS (SELECT 1 FROM quest_ans qa WHERE qa.question = q.id)
-    """
-    cursor.execute(query, (cert_id,))
-    total = cursor.fetchone()[0] or 0
-    cursor.close(); conn.close()
+    with db_cursor() as (conn, cursor):
+        query = """
+            SELECT COUNT(*)
+            FROM questions q
+            JOIN modules m ON q.module = m.id
+            LEFT JOIN quest_ans qa ON qa.question = q.id
+            WHERE m.course = %s
+              AND qa.question IS NULL
+        """
+        cursor.execute(query, (cert_id,))
+        total = cursor.fetchone()[0] or 0
     return int(total)
 
 
@@ -1673,92 +2185,294 @@ def mark_answers_correct(question_id, answer_ids):
     """Mark given answers as correct for a question."""
     if not answer_ids:
         return
+    ids = list(dict.fromkeys(answer_ids))
+    placeholders = ','.join(['%s'] * len(ids))
     conn = get_connection()
     cursor = conn.cursor()
-    for aid in answer_ids:
+    try:
         cursor.execute(
-            "UPDATE quest_ans SET isok = 1 WHERE question = %s AND answer = %s",
-            (question_id, aid),
+            f"UPDATE quest_ans SET isok = 1 WHERE question = %s AND answer IN ({placeholders})",
+            (question_id, *ids),
         )
-    conn.commit()
-    cursor.close(); conn.close()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close(); conn.close()
 
 
 def add_answers(question_id, answers):
-    """Insert new answers for a question."""
+    """Insert new answers for a question.
+
+    Shares the batched answer/link path of ``insert_questions``: existing
+    answers are reused, new ones are created with one multi-row INSERT and
+    the links are written with a single ``executemany`` (links the question
+    already has are left untouched).
+    """
     if not answers:
         return
+    answer_rows = [
+        (
+            question_id,
+            serialize_answer({k: v for k, v in ans.items() if k != 'isok'}),
+            int(ans.get('isok', 0)),
+        )
+        for ans in answers
+    ]
+    hash_lookup = answer_hash_lookup()
     conn = get_connection()
     cursor = conn.cursor()
     try:
-        for ans in answers:
-            ans_json = json.dumps(
-                {k: v for k, v in ans.items() if k != 'isok'}, ensure_ascii=False
-            )[:700]
-            isok = int(ans.get('isok', 0))
-            try:
-                cursor.execute(
-                    "INSERT INTO answers (text, created_at) VALUES (%s, NOW())",
-                    (ans_json,),
-                )
-                ans_id = cursor.lastrowid
-            except mysql.connector.Error as err:
-                if err.errno == 1062:
-                    cursor.execute(
-                        "SELECT id FROM answers WHERE text = %s", (ans_json,)
-                    )
-                    res = cursor.fetchone()
-                    ans_id = res[0] if res else None
-                else:
-                    raise
-            if ans_id:
-                cursor.execute(
-                    "INSERT INTO quest_ans (question, answer, isok) VALUES (%s,%s,%s)",
-                    (question_id, ans_id, isok),
-                )
+        insert_answers_and_links(cursor, answer_rows, hash_lookup)
         conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
     finally:
         cursor.close(); conn.close()
 
 
-_COLUMN_CACHE = {}
+# Secondary indexes backing the hot reporting/lookup queries of this module.
+# Each entry is ``(table, index_name, columns[, kind])``; ``ensure_indexes``
+# creates the ones missing from the current schema.  The certification reports filter on
+# ``modules.course`` then walk ``questions`` by module/nature and probe
+# ``quest_ans`` by question/isok, so every step is an index range lookup.
+# The per-category population counts (``count_questions_in_category`` and the
+# ``get_domain_question_snapshot`` GROUP BY) are covered by the
+# module/level/nature/ty index and never touch the table rows.
+_SUPPORTING_INDEXES = (
+    ("modules", "idx_modules_course", ("course",)),
+    ("questions", "idx_questions_module_nature", ("module", "nature")),
+    ("questions", "idx_questions_category", ("module", "level", "nature", "ty")),
+    ("quest_ans", "idx_quest_ans_question_isok", ("question", "isok")),
+    # Publication filters (pub = 2, pub <> 1) read certifications already in
+    # name order.
+    ("courses", "idx_courses_pub_name", ("pub", "name")),
+    # Dashboard KPIs: the journs window scans (active users, sessions,
+    # locations) and the exam completion window read these index ranges
+    # instead of the whole tables.
+    ("journs", "idx_journs_created_user_fen", ("created_at", "user", "fen")),
+    ("exam_users", "idx_exam_users_comp_user_exam", ("comp_at", "user", "exam")),
+    # Certification popularity window and the plan-filtered sign-up counts.
+    ("users_course", "idx_users_course_created_user_course", ("created_at", "user", "course")),
+    ("users", "idx_users_ex_created", ("ex", "created_at")),
+    # User search (autocomplete and dashboard filters) with
+    # DB_USER_FULLTEXT_SEARCH enabled: word-prefix lookups instead of a
+    # leading-wildcard LIKE over every user row.
+    ("users", "ft_users_search", ("name", "email", "usn"), "FULLTEXT"),
+)
 
 
-def _get_table_columns(table_name):
-    if table_name in _COLUMN_CACHE:
-        return _COLUMN_CACHE[table_name]
+def ensure_indexes() -> list[str]:
+    """Create the supporting indexes missing from the database.
+
+    Returns the names of the indexes that were created.
+    """
+
     conn = get_connection()
     cursor = conn.cursor()
+    created = []
     try:
-        cursor.execute(f"SHOW COLUMNS FROM {table_name}")
-        columns = {row[0] for row in cursor.fetchall()}
-        _COLUMN_CACHE[table_name] = columns
-        return columns
+        cursor.execute(
+            """
+            SELECT DISTINCT table_name, index_name
+            FROM information_schema.statistics
+            WHERE table_schema = DATABASE()
+            """
+        )
+        existing = {(row[0].lower(), row[1].lower()) for row in cursor.fetchall()}
+        for table, index_name, columns, *kind in _SUPPORTING_INDEXES:
+            if (table.lower(), index_name.lower()) in existing:
+                continue
+            kind = f"{kind[0]} " if kind else ""
+            cursor.execute(
+                f"CREATE {kind}INDEX {index_name} ON {table} ({', '.join(columns)})"
+            )
+            logging.info("Created index %s on %s(%s)", index_name, table, ", ".join(columns))
+            created.append(index_name)
+        if created:
+            _USER_FULLTEXT.clear()
+        return created
     finally:
         cursor.close()
         conn.close()
 
 
-def _build_user_filter_clause(alias, plan, cert_id, user_query, exclude_guest=True):
-    conditions = []
-    params = {}
-    if exclude_guest and "type" in _get_table_columns("users"):
-        conditions.append(f"COALESCE({alias}.`type`, '') <> 'Guest'")
-    elif exclude_guest:
-        conditions.append(f"{alias}.name <> 'Guest'")
-    if plan is not None:
-        conditions.append(f"{alias}.ex = %(plan)s")
-        params["plan"] = plan
-    if cert_id is not None:
-        conditions.append(
-            f"EXISTS (SELECT 1 FROM users_course uc WHERE uc.user = {alias}.id AND uc.course = %(cert_id)s)"
+_COLUMN_CACHE = {}
+# Tables whose optional columns are probed by this module; a cache miss on any
+# of them loads the column sets of all of them in one round trip.
+_INTROSPECTED_TABLES = (
+    "answers",
+    "courses",
+    "exam_users",
+    "exams",
+    "journs",
+    "modules",
+    "orders",
+    "quest_ans",
+    "questions",
+    "users",
+    "users_course",
+)
+
+
+def _get_table_columns(table_name):
+    columns = _COLUMN_CACHE.get(table_name)
+    if columns is not None:
+        return columns
+    tables = _INTROSPECTED_TABLES if table_name in _INTROSPECTED_TABLES else (table_name,)
+    with db_cursor() as (conn, cursor):
+        cursor.execute(
+            f"""
+            SELECT TABLE_NAME, COLUMN_NAME
+            FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE()
+              AND TABLE_NAME IN ({', '.join(['%s'] * len(tables))})
+            """,
+            tables,
         )
-        params["cert_id"] = cert_id
-    if user_query:
+        rows = cursor.fetchall()
+    loaded = {name: set() for name in tables}
+    for name, column in rows:
+        loaded.setdefault(name, set()).add(column)
+    _COLUMN_CACHE.update(loaded)
+    return loaded[table_name]
+
+
+# InnoDB does not index words shorter than ``innodb_ft_min_token_size`` nor
+# the words of its default stopword list (INNODB_FT_DEFAULT_STOPWORD).
+_FULLTEXT_MIN_TOKEN = 3
+_FULLTEXT_STOPWORDS = frozenset(
+    (
+        "a", "about", "an", "are", "as", "at", "be", "by", "com", "de", "en",
+        "for", "from", "how", "i", "in", "is", "it", "la", "of", "on", "or",
+        "that", "the", "this", "to", "was", "what", "when", "where", "who",
+        "will", "with", "und", "www",
+    )
+)
+_USER_FULLTEXT = {}
+
+
+def _user_fulltext_available():
+    """Return whether ``users`` carries the ``ft_users_search`` index."""
+
+    available = _USER_FULLTEXT.get("users")
+    if available is None:
+        with db_cursor() as (conn, cursor):
+            cursor.execute(
+                """
+                SELECT 1
+                FROM information_schema.statistics
+                WHERE table_schema = DATABASE()
+                  AND table_name = 'users'
+                  AND index_name = 'ft_users_search'
+                LIMIT 1
+                """
+            )
+            available = cursor.fetchone() is not None
+        _USER_FULLTEXT["users"] = available
+    return available
+
+
+@functools.lru_cache(maxsize=256)
+def _user_fulltext_terms(user_query):
+    """Turn ``user_query`` into a boolean-mode prefix search, if indexable.
+
+    Every word must be present (``+word*``); ``None`` is returned when a word is
+    too short or a stopword, hence absent from the FULLTEXT index, so the
+    caller keeps the LIKE scan.
+    """
+    words = re.findall(r"\w+", user_query)
+    if not words or any(
+        len(word) < _FULLTEXT_MIN_TOKEN or word.lower() in _FULLTEXT_STOPWORDS
+        for word in words
+    ):
+        return None
+    return " ".join(f"+{word}*" for word in words)
+
+
+def _user_search_condition(alias, user_query):
+    """Return the ``(condition, value)`` matching users against ``user_query``.
+
+    The condition binds ``%(user_query)s``.  By default it is a substring
+    LIKE.  With ``DB_USER_FULLTEXT_SEARCH`` enabled and the FULLTEXT index
+    present, indexable queries switch to a word-prefix MATCH instead: "ali"
+    then finds "Alice" but no longer "Natalia".
+    """
+    terms = _user_fulltext_terms(user_query) if DB_USER_FULLTEXT_SEARCH else None
+    if terms is not None and _user_fulltext_available():
+        return (
+            f"MATCH({alias}.name, {alias}.email, {alias}.usn) "
+            "AGAINST (%(user_query)s IN BOOLEAN MODE)",
+            terms,
+        )
+    return (
+        f"({alias}.name LIKE %(user_query)s OR {alias}.email LIKE %(user_query)s OR {alias}.usn LIKE %(user_query)s)",
+        f"%{user_query}%",
+    )
+
+
+# Past this many matching users the dashboards keep the search predicate
+# instead of binding the ids.
+_USER_MATCH_LIMIT = 200
+_NO_USER_MATCH = ("1 = 0", {})
+
+
+@_dashboard_cached
+def _matching_user_ids(user_query):
+    """Return the ids of the users matching ``user_query``.
+
+    ``None`` means more than ``_USER_MATCH_LIMIT`` users match.
+    """
+
+    condition, value = _user_search_condition("users", user_query)
+    with db_cursor() as (conn, cursor):
+        cursor.execute(
+            f"SELECT id FROM users WHERE {condition} LIMIT %(limit)s",
+            {"user_query": value, "limit": _USER_MATCH_LIMIT + 1},
+        )
+        ids = tuple(row[0] for row in cursor.fetchall())
+    return ids if len(ids) <= _USER_MATCH_LIMIT else None
+
+
+def _user_match_clause(alias, user_query):
+    """Return the ``(condition, params)`` restricting ``alias`` to matching users.
+
+    The users are searched once and every dashboard query then probes their
+    primary keys, rather than each re-evaluating the search over its joined
+    user rows.
+    """
+
+    ids = _matching_user_ids(user_query)
+    if ids is None:
+        condition, value = _user_search_condition(alias, user_query)
+        return condition, {"user_query": value}
+    if not ids:
+        return _NO_USER_MATCH
+    params = {f"user_match_{index}": user_id for index, user_id in enumerate(ids)}
+    placeholders = ", ".join(f"%({name})s" for name in params)
+    return f"{alias}.id IN ({placeholders})", params
+
+
+def _build_user_filter_clause(alias, plan, cert_id, user_match=None, exclude_guest=True):
+    conditions = []
+    params = {}
+    if exclude_guest and "type" in _get_table_columns("users"):
+        conditions.append(f"COALESCE({alias}.`type`, '') <> 'Guest'")
+    elif exclude_guest:
+        conditions.append(f"{alias}.name <> 'Guest'")
+    if plan is not None:
+        conditions.append(f"{alias}.ex = %(plan)s")
+        params["plan"] = plan
+    if cert_id is not None:
         conditions.append(
-            f"({alias}.name LIKE %(user_query)s OR {alias}.email LIKE %(user_query)s OR {alias}.usn LIKE %(user_query)s)"
+            f"EXISTS (SELECT 1 FROM users_course uc WHERE uc.user = {alias}.id AND uc.course = %(cert_id)s)"
         )
-        params["user_query"] = f"%{user_query}%"
+        params["cert_id"] = cert_id
+    if user_match:
+        conditions.append(user_match[0])
+        params.update(user_match[1])
     clause = " AND ".join(conditions)
     return clause, params
 
@@ -1766,6 +2480,7 @@ def _build_user_filter_clause(alias, plan, cert_id, user_query, exclude_guest=Tr
 def search_users(user_query, limit=8):
     if not user_query:
         return []
+    condition, query = _user_search_condition("users", user_query)
     conn = get_connection()
     cursor = conn.cursor()
     try:
@@ -1777,11 +2492,11 @@ def search_users(user_query, limit=8):
             f"""
             SELECT id, name, email, ex{type_select}
             FROM users
-            WHERE name LIKE %(query)s OR email LIKE %(query)s OR usn LIKE %(query)s
+            WHERE {condition}
             ORDER BY name
             LIMIT %(limit)s
             """,
-            {"query": f"%{user_query}%", "limit": limit},
+            {"user_query": query, "limit": limit},
         )
         return [
             {
@@ -1799,211 +2514,176 @@ def search_users(user_query, limit=8):
 
 
 def get_user_dashboard_snapshot(user_id, start_dt, end_dt, cert_id=None):
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    user_columns = _get_table_columns("users")
-    account_type_select = (
-        ", COALESCE(`type`, '') AS account_type" if "type" in user_columns else ""
-    )
-    cursor.execute(
-        f"""
-        SELECT id, name, email, ex{account_type_select}, created_at
-        FROM users
-        WHERE id = %(user_id)s
-        """,
-        {"user_id": user_id},
-    )
-    row = cursor.fetchone()
-    if not row:
-        cursor.close()
-        conn.close()
-        return None
-
-    user_profile = {
-        "id": row[0],
-        "name": row[1],
-        "email": row[2],
-        "plan": row[3],
-        "account_type": row[4] if "type" in user_columns else None,
-        "created_at": row[5] if "type" in user_columns else row[4],
-    }
-
-    base_params = {
-        "user_id": user_id,
-        "start": start_dt,
-        "end": end_dt,
-        "now": datetime.utcnow(),
-        "cert_id": cert_id,
-    }
-
-    cursor.execute(
-        """
-        SELECT COUNT(*)
-        FROM journs j
-        WHERE j.user = %(user_id)s
-          AND j.created_at BETWEEN %(start)s AND %(end)s
-          AND j.fen = 'login'
-        """,
-        base_params,
-    )
-    total_sessions = cursor.fetchone()[0] or 0
-
-    cursor.execute(
-        """
-        SELECT DATE(j.created_at) AS day, COUNT(*) AS total
-        FROM journs j
-        WHERE j.user = %(user_id)s
-          AND j.created_at BETWEEN %(start)s AND %(end)s
-          AND j.fen = 'login'
-        GROUP BY day
-        ORDER BY day
-        """,
-        base_params,
-    )
-    session_timeline = [{"day": row[0], "total": row[1]} for row in cursor.fetchall()]
-
-    exam_filter = "AND e.certi = %(cert_id)s" if cert_id is not None else ""
-
-    cursor.execute(
-        f"""
-        SELECT COUNT(*)
-        FROM exam_users eu
-        JOIN exams e ON e.id = eu.exam
-        WHERE eu.user = %(user_id)s
-          AND eu.added BETWEEN %(start)s AND %(end)s
-          {exam_filter}
-        """,
-        base_params,
-    )
-    assigned_exams = cursor.fetchone()[0] or 0
-
-    cursor.execute(
-        f"""
-        SELECT COUNT(*)
-        FROM exam_users eu
-        JOIN exams e ON e.id = eu.exam
-        WHERE eu.user = %(user_id)s
-          AND eu.comp_at BETWEEN %(start)s AND %(end)s
-          {exam_filter}
-        """,
-        base_params,
-    )
-    completed_exams = cursor.fetchone()[0] or 0
-
-    cursor.execute(
-        f"""
-        SELECT AVG(TIMESTAMPDIFF(MINUTE, eu.start_at, eu.comp_at))
-        FROM exam_users eu
-        JOIN exams e ON e.id = eu.exam
-        WHERE eu.user = %(user_id)s
-          AND eu.start_at IS NOT NULL
-          AND eu.comp_at IS NOT NULL
-          AND eu.comp_at BETWEEN %(start)s AND %(end)s
-          {exam_filter}
-        """,
-        base_params,
-    )
-    avg_exam_duration = cursor.fetchone()[0]
+    with db_cursor() as (conn, cursor):
+        user_columns = _get_table_columns("users")
+        account_type_select = (
+            ", COALESCE(`type`, '') AS account_type" if "type" in user_columns else ""
+        )
+        cursor.execute(
+            f"""
+            SELECT id, name, email, ex{account_type_select}, created_at
+            FROM users
+            WHERE id = %(user_id)s
+            """,
+            {"user_id": user_id},
+        )
+        row = cursor.fetchone()
+        if not row:
+            return None
 
-    cursor.execute(
-        """
-        SELECT COUNT(*)
-        FROM orders o
-        WHERE o.user = %(user_id)s
-          AND o.type = 0
-          AND o.exp > %(now)s
-        """,
-        base_params,
-    )
-    active_subscription = (cursor.fetchone()[0] or 0) > 0
+        user_profile = {
+            "id": row[0],
+            "name": row[1],
+            "email": row[2],
+            "plan": row[3],
+            "account_type": row[4] if "type" in user_columns else None,
+            "created_at": row[5] if "type" in user_columns else row[4],
+        }
 
-    exam_user_columns = _get_table_columns("exam_users")
-    score_column = _resolve_score_column(exam_user_columns)
+        base_params = {
+            "user_id": user_id,
+            "start": start_dt,
+            "end": end_dt,
+            "now": datetime.utcnow(),
+            "cert_id": cert_id,
+        }
 
-    score_select = f", AVG(eu.{score_column}) AS avg_score" if score_column else ""
-    cursor.execute(
-        f"""
-        SELECT c.id, c.name, COUNT(eu.id) AS completions{score_select}
-        FROM exam_users eu
-        JOIN exams e ON e.id = eu.exam
-        JOIN courses c ON c.id = e.certi
-        WHERE eu.user = %(user_id)s
-          AND eu.comp_at BETWEEN %(start)s AND %(end)s
-          {exam_filter}
-        GROUP BY c.id, c.name
-        ORDER BY completions DESC
-        LIMIT 6
-        """,
-        base_params,
-    )
-    completions_by_cert = []
-    for cert_row in cursor.fetchall():
-        completions_by_cert.append(
-            {
-                "id": cert_row[0],
-                "name": cert_row[1],
-                "completions": cert_row[2],
-                "avg_score": cert_row[3] if score_column else None,
-            }
+        cursor.execute(
+            """
+            SELECT DATE(j.created_at) AS day, COUNT(*) AS total
+            FROM journs j
+            WHERE j.user = %(user_id)s
+              AND j.created_at BETWEEN %(start)s AND %(end)s
+              AND j.fen = 'login'
+            GROUP BY day
+            ORDER BY day
+            """,
+            base_params,
         )
+        session_timeline = [{"day": row[0], "total": row[1]} for row in cursor.fetchall()]
+        total_sessions = sum(entry["total"] for entry in session_timeline)
+
+        exam_filter = "AND e.certi = %(cert_id)s" if cert_id is not None else ""
 
-    score_breakdown = []
-    avg_score = None
-    if score_column:
+        # Assigned/completed counts and the average duration come from one pass
+        # over the user's exams touching the period.
         cursor.execute(
             f"""
-            SELECT AVG(eu.{score_column}) AS avg_score,
-                   SUM(CASE WHEN eu.{score_column} >= 80 THEN 1 ELSE 0 END) AS high_scores,
-                   SUM(
+            SELECT SUM(CASE WHEN eu.added BETWEEN %(start)s AND %(end)s THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN eu.comp_at BETWEEN %(start)s AND %(end)s THEN 1 ELSE 0 END),
+                   AVG(
                      CASE
-                       WHEN eu.{score_column} >= 60 AND eu.{score_column} < 80
-                       THEN 1 ELSE 0
+                       WHEN eu.comp_at BETWEEN %(start)s AND %(end)s
+                       THEN TIMESTAMPDIFF(MINUTE, eu.start_at, eu.comp_at)
                      END
-                   ) AS mid_scores,
-                   SUM(CASE WHEN eu.{score_column} < 60 THEN 1 ELSE 0 END) AS low_scores
+                   )
             FROM exam_users eu
-            JOIN exams e ON e.id = eu.exam
+            {"JOIN exams e ON e.id = eu.exam" if cert_id is not None else ""}
             WHERE eu.user = %(user_id)s
-              AND eu.comp_at BETWEEN %(start)s AND %(end)s
-              AND eu.{score_column} IS NOT NULL
+              AND (
+                eu.added BETWEEN %(start)s AND %(end)s
+                OR eu.comp_at BETWEEN %(start)s AND %(end)s
+              )
               {exam_filter}
             """,
             base_params,
         )
-        score_row = cursor.fetchone()
-        avg_score = score_row[0] if score_row else None
-        if score_row:
-            score_breakdown = [
-                {"label": "Excellent (≥ 80%)", "total": score_row[1] or 0},
-                {"label": "Correct (60–79%)", "total": score_row[2] or 0},
-                {"label": "À renforcer (< 60%)", "total": score_row[3] or 0},
-            ]
+        assigned_exams, completed_exams, avg_exam_duration = cursor.fetchone()
+        assigned_exams = int(assigned_exams or 0)
+        completed_exams = int(completed_exams or 0)
 
-    exam_type_breakdown = []
-    exams_columns = _get_table_columns("exams")
-    if "type" in exams_columns:
+        cursor.execute(
+            """
+            SELECT COUNT(*)
+            FROM orders o
+            WHERE o.user = %(user_id)s
+              AND o.type = 0
+              AND o.exp > %(now)s
+            """,
+            base_params,
+        )
+        active_subscription = (cursor.fetchone()[0] or 0) > 0
+
+        exam_user_columns = _get_table_columns("exam_users")
+        score_column = _resolve_score_column(exam_user_columns)
+
+        # Per-certification completions and the score breakdown read the same
+        # rows: the breakdown is summed in Python from the per-certification
+        # groups instead of rescanning exam_users.
+        score_select = ""
+        if score_column:
+            score_select = f"""
+                   , AVG(eu.{score_column}) AS avg_score,
+                   SUM(eu.{score_column}) AS score_sum,
+                   COUNT(eu.{score_column}) AS scored,
+                   SUM(CASE WHEN eu.{score_column} >= 80 THEN 1 ELSE 0 END) AS high_scores,
+                   SUM(
+                     CASE
+                       WHEN eu.{score_column} >= 60 AND eu.{score_column} < 80
+                       THEN 1 ELSE 0
+                     END
+                   ) AS mid_scores,
+                   SUM(CASE WHEN eu.{score_column} < 60 THEN 1 ELSE 0 END) AS low_scores
+            """
         cursor.execute(
             f"""
-            SELECT e.type, COUNT(*) AS total
+            SELECT c.id, c.name, COUNT(eu.id) AS completions{score_select}
             FROM exam_users eu
             JOIN exams e ON e.id = eu.exam
+            JOIN courses c ON c.id = e.certi
             WHERE eu.user = %(user_id)s
-              AND eu.added BETWEEN %(start)s AND %(end)s
+              AND eu.comp_at BETWEEN %(start)s AND %(end)s
               {exam_filter}
-            GROUP BY e.type
-            ORDER BY total DESC
+            GROUP BY c.id, c.name
+            ORDER BY completions DESC
+            {"" if score_column else "LIMIT 6"}
             """,
             base_params,
         )
-        type_map = {0: "Test", 1: "Exam", 2: "Share"}
-        exam_type_breakdown = [
-            {"type": type_map.get(row[0], str(row[0])), "total": row[1]}
-            for row in cursor.fetchall()
+        cert_rows = cursor.fetchall()
+        completions_by_cert = [
+            {
+                "id": cert_row[0],
+                "name": cert_row[1],
+                "completions": cert_row[2],
+                "avg_score": cert_row[3] if score_column else None,
+            }
+            for cert_row in cert_rows[:6]
         ]
 
-    cursor.close()
-    conn.close()
+        score_breakdown = []
+        avg_score = None
+        if score_column:
+            score_sum = sum(row[4] or 0 for row in cert_rows)
+            scored = sum(row[5] or 0 for row in cert_rows)
+            avg_score = score_sum / scored if scored else None
+            score_breakdown = [
+                {"label": "Excellent (≥ 80%)", "total": sum(row[6] or 0 for row in cert_rows)},
+                {"label": "Correct (60–79%)", "total": sum(row[7] or 0 for row in cert_rows)},
+                {"label": "À renforcer (< 60%)", "total": sum(row[8] or 0 for row in cert_rows)},
+            ]
+
+        exam_type_breakdown = []
+        exams_columns = _get_table_columns("exams")
+        if "type" in exams_columns:
+            cursor.execute(
+                f"""
+                SELECT e.type, COUNT(*) AS total
+                FROM exam_users eu
+                JOIN exams e ON e.id = eu.exam
+                WHERE eu.user = %(user_id)s
+                  AND eu.added BETWEEN %(start)s AND %(end)s
+                  {exam_filter}
+                GROUP BY e.type
+                ORDER BY total DESC
+                """,
+                base_params,
+            )
+            type_map = {0: "Test", 1: "Exam", 2: "Share"}
+            exam_type_breakdown = [
+                {"type": type_map.get(row[0], str(row[0])), "total": row[1]}
+                for row in cursor.fetchall()
+            ]
 
     completion_rate = (completed_exams / assigned_exams * 100) if assigned_exams else 0
 
@@ -2025,314 +2705,335 @@ def get_user_dashboard_snapshot(user_id, start_dt, end_dt, cert_id=None):
     }
 
 
-def get_dashboard_snapshot(start_dt, end_dt, plan=None, cert_id=None, user_query=None):
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    user_filters, params = _build_user_filter_clause("u", plan, cert_id, user_query)
-    base_params = {
-        "start": start_dt,
-        "end": end_dt,
-        "now": datetime.utcnow(),
-        **params,
-    }
+@functools.lru_cache(maxsize=256)
+def _apply_user_filters(base_query, filters):
+    """Splice ``filters`` into ``base_query`` before its GROUP/ORDER/LIMIT.
 
-    user_columns = _get_table_columns("users")
-    if "type" in user_columns:
-        guest_condition = "(COALESCE(u.`type`, '') = 'Guest' OR u.name = 'Guest')"
-        non_guest_condition = "COALESCE(u.`type`, '') <> 'Guest'"
-    else:
-        guest_condition = "u.name = 'Guest'"
-        non_guest_condition = "u.name <> 'Guest'"
-    guest_filters, guest_params = _build_user_filter_clause(
-        "u", plan, cert_id, user_query, exclude_guest=False
-    )
-    if guest_condition:
-        guest_filters = (
-            f"{guest_filters} AND {guest_condition}" if guest_filters else guest_condition
+    Both arguments only depend on which filters are active (values are bound
+    parameters), so the assembled SQL is memoized across dashboard loads.
+    """
+    if not filters:
+        return base_query
+    insertion = f" AND {filters}\n"
+    if "GROUP BY" in base_query:
+        return base_query.replace("GROUP BY", f"{insertion}GROUP BY")
+    if "ORDER BY" in base_query:
+        return base_query.replace("ORDER BY", f"{insertion}ORDER BY")
+    if "LIMIT" in base_query:
+        return base_query.replace("LIMIT", f"{insertion}LIMIT")
+    return f"{base_query} AND {filters}"
+
+
+def _guest_conditions():
+    """Return the ``(guest, non_guest)`` conditions on the ``u`` users alias."""
+
+    if "type" in _get_table_columns("users"):
+        return (
+            "(COALESCE(u.`type`, '') = 'Guest' OR u.name = 'Guest')",
+            "COALESCE(u.`type`, '') <> 'Guest'",
         )
+    return "u.name = 'Guest'", "u.name <> 'Guest'"
 
-    def _apply_filters(base_query, filters):
-        if not filters:
-            return base_query
-        insertion = f" AND {filters}\n"
-        if "GROUP BY" in base_query:
-            return base_query.replace("GROUP BY", f"{insertion}GROUP BY")
-        if "ORDER BY" in base_query:
-            return base_query.replace("ORDER BY", f"{insertion}ORDER BY")
-        if "LIMIT" in base_query:
-            return base_query.replace("LIMIT", f"{insertion}LIMIT")
-        return f"{base_query} AND {filters}"
 
-    cursor.execute(
-        _apply_filters(
-            """
-            SELECT COUNT(*)
-            FROM users u
-            WHERE u.created_at BETWEEN %(start)s AND %(end)s
-            """,
-            user_filters,
-        ),
-        base_params,
-    )
-    new_users = cursor.fetchone()[0] or 0
+def _empty_dashboard_snapshot(include_guests):
+    """Return the global dashboard payload of a filter matching no user."""
 
-    cursor.execute(
-        _apply_filters(
-            """
-            SELECT COUNT(*)
-            FROM users u
-            WHERE u.id IS NOT NULL
-            """,
-            user_filters,
-        ),
-        params,
-    )
-    total_users = cursor.fetchone()[0] or 0
+    snapshot = {
+        "kpis": {
+            "active_users": 0,
+            "new_users": 0,
+            "conversion_rate": 0,
+            "completed_exams": 0,
+            "revenue": 0,
+            "engagement": 0,
+        },
+        "acquisition": {"new_users": 0, "returning_users": 0, "active_subscriptions": 0},
+        "performance": {
+            "completion_rate": 0,
+            "avg_exam_duration": None,
+            "completions_by_cert": [],
+        },
+        "locations": [],
+        "top_users": [],
+        "cert_popularity": [],
+    }
+    if include_guests:
+        snapshot["guests"] = {
+            "new_users": 0,
+            "active_users": 0,
+            "sessions": 0,
+            "completed_exams": 0,
+        }
+    return snapshot
 
-    cursor.execute(
-        _apply_filters(
-            """
-            SELECT COUNT(DISTINCT j.user)
-            FROM journs j
-            JOIN users u ON u.id = j.user
-            WHERE j.created_at BETWEEN %(start)s AND %(end)s
-            """,
-            user_filters,
-        ),
-        base_params,
-    )
-    active_users = cursor.fetchone()[0] or 0
 
-    cursor.execute(
-        _apply_filters(
-            """
-            SELECT COUNT(*)
-            FROM orders o
-            JOIN users u ON u.id = o.user
-            WHERE o.type = 0 AND o.exp > %(now)s
-            """,
-            user_filters,
-        ),
-        base_params,
-    )
-    active_subscriptions = cursor.fetchone()[0] or 0
+@_dashboard_cached
+def get_dashboard_snapshot(
+    start_dt, end_dt, plan=None, cert_id=None, user_query=None, include_guests=True
+):
+    """Return the global dashboard metrics for the filtered period.
 
-    cursor.execute(
-        _apply_filters(
-            """
-            SELECT COALESCE(SUM(o.amount), 0)
-            FROM orders o
-            JOIN users u ON u.id = o.user
-            WHERE o.type = 0 AND o.created_at BETWEEN %(start)s AND %(end)s
-            """,
-            user_filters,
-        ),
-        base_params,
-    )
-    revenue = cursor.fetchone()[0] or 0
+    With ``include_guests=False`` the ``guests`` section is left out so the
+    caller can load it concurrently through ``get_guest_dashboard_metrics``.
+    """
+    user_match = _user_match_clause("u", user_query) if user_query else None
+    if user_match == _NO_USER_MATCH:
+        # The search matches nobody: every section would be empty.
+        return _empty_dashboard_snapshot(include_guests)
+    user_search, user_search_params = user_match or ("", {})
+    with db_cursor() as (conn, cursor):
+        user_filters, params = _build_user_filter_clause("u", plan, cert_id, user_match)
+        base_params = {
+            "start": start_dt,
+            "end": end_dt,
+            "now": datetime.utcnow(),
+            **params,
+        }
 
-    exam_params = {
-        "start": start_dt,
-        "end": end_dt,
-    }
-    exam_conditions = ["eu.comp_at BETWEEN %(start)s AND %(end)s"]
-    if non_guest_condition:
-        exam_conditions.append(non_guest_condition)
-    if plan is not None:
-        exam_params["plan"] = plan
-        exam_conditions.append("u.ex = %(plan)s")
-    if cert_id is not None:
-        exam_params["cert_id"] = cert_id
-        exam_conditions.append("e.certi = %(cert_id)s")
-    if user_query:
-        exam_params["user_query"] = f"%{user_query}%"
-        exam_conditions.append(
-            "(u.name LIKE %(user_query)s OR u.email LIKE %(user_query)s OR u.usn LIKE %(user_query)s)"
+        non_guest_condition = _guest_conditions()[1]
+
+        # KPIs reading the same rows share one scan through conditional
+        # aggregates (SUM over no rows is NULL, hence the ``or 0``).
+        cursor.execute(
+            _apply_user_filters(
+                """
+                SELECT COUNT(*),
+                       SUM(CASE WHEN u.created_at BETWEEN %(start)s AND %(end)s THEN 1 ELSE 0 END)
+                FROM users u
+                WHERE u.id IS NOT NULL
+                """,
+                user_filters,
+            ),
+            base_params,
         )
-    exam_where = " AND ".join(exam_conditions)
+        total_users, new_users = cursor.fetchone()
+        total_users = total_users or 0
+        new_users = int(new_users or 0)
 
-    cursor.execute(
-        f"""
-        SELECT COUNT(*)
-        FROM exam_users eu
-        JOIN users u ON u.id = eu.user
-        JOIN exams e ON e.id = eu.exam
-        WHERE {exam_where}
-        """,
-        exam_params,
-    )
-    completed_exams = cursor.fetchone()[0] or 0
+        cursor.execute(
+            _apply_user_filters(
+                """
+                SELECT COUNT(DISTINCT j.user),
+                       SUM(CASE WHEN j.fen = 'login' THEN 1 ELSE 0 END),
+                       COUNT(DISTINCT CASE WHEN u.created_at < %(start)s THEN j.user END)
+                FROM journs j
+                JOIN users u ON u.id = j.user
+                WHERE j.created_at BETWEEN %(start)s AND %(end)s
+                """,
+                user_filters,
+            ),
+            base_params,
+        )
+        active_users, total_sessions, returning_users = cursor.fetchone()
+        active_users = active_users or 0
+        total_sessions = int(total_sessions or 0)
+        returning_users = returning_users or 0
+        engagement = total_sessions / active_users if active_users else 0
 
-    cursor.execute(
-        _apply_filters(
-            """
-            SELECT COUNT(*)
-            FROM journs j
-            JOIN users u ON u.id = j.user
-            WHERE j.created_at BETWEEN %(start)s AND %(end)s
-              AND j.fen = 'login'
-            """,
-            user_filters,
-        ),
-        base_params,
-    )
-    total_sessions = cursor.fetchone()[0] or 0
-    engagement = total_sessions / active_users if active_users else 0
+        cursor.execute(
+            _apply_user_filters(
+                """
+                SELECT SUM(CASE WHEN o.exp > %(now)s THEN 1 ELSE 0 END),
+                       COALESCE(
+                           SUM(CASE WHEN o.created_at BETWEEN %(start)s AND %(end)s THEN o.amount END),
+                           0
+                       )
+                FROM orders o
+                JOIN users u ON u.id = o.user
+                WHERE o.type = 0
+                  AND (o.exp > %(now)s OR o.created_at BETWEEN %(start)s AND %(end)s)
+                """,
+                user_filters,
+            ),
+            base_params,
+        )
+        active_subscriptions, revenue = cursor.fetchone()
+        active_subscriptions = int(active_subscriptions or 0)
+        revenue = revenue or 0
 
-    cursor.execute(
-        _apply_filters(
-            """
-            SELECT COUNT(DISTINCT j.user)
-            FROM journs j
-            JOIN users u ON u.id = j.user
-            WHERE j.created_at BETWEEN %(start)s AND %(end)s
-              AND u.created_at < %(start)s
+        exam_params = {
+            "start": start_dt,
+            "end": end_dt,
+        }
+        exam_conditions = ["eu.comp_at BETWEEN %(start)s AND %(end)s"]
+        if non_guest_condition:
+            exam_conditions.append(non_guest_condition)
+        if plan is not None:
+            exam_params["plan"] = plan
+            exam_conditions.append("u.ex = %(plan)s")
+        if cert_id is not None:
+            exam_params["cert_id"] = cert_id
+            exam_conditions.append("e.certi = %(cert_id)s")
+        if user_query:
+            exam_params.update(user_search_params)
+            exam_conditions.append(user_search)
+        exam_where = " AND ".join(exam_conditions)
+        # ``exams`` is only read for the certification filter; the users join
+        # stays because the guest exclusion always applies.
+        exam_join = "JOIN exams e ON e.id = eu.exam" if cert_id is not None else ""
+
+        # TIMESTAMPDIFF is NULL without ``start_at``, which AVG skips.
+        cursor.execute(
+            f"""
+            SELECT COUNT(*), AVG(TIMESTAMPDIFF(MINUTE, eu.start_at, eu.comp_at))
+            FROM exam_users eu
+            JOIN users u ON u.id = eu.user
+            {exam_join}
+            WHERE {exam_where}
             """,
-            user_filters,
-        ),
-        base_params,
-    )
-    returning_users = cursor.fetchone()[0] or 0
+            exam_params,
+        )
+        completed_exams, avg_exam_duration = cursor.fetchone()
+        completed_exams = completed_exams or 0
 
-    cursor.execute(
-        _apply_filters(
-            """
-            SELECT COALESCE(j.city, j.loc, 'Inconnu') AS location, COUNT(*) AS total
-            FROM journs j
-            JOIN users u ON u.id = j.user
-            WHERE j.created_at BETWEEN %(start)s AND %(end)s
-            GROUP BY location
-            ORDER BY total DESC
+        cursor.execute(
+            _apply_user_filters(
+                """
+                SELECT COALESCE(j.city, j.loc, 'Inconnu') AS location, COUNT(*) AS total
+                FROM journs j
+                JOIN users u ON u.id = j.user
+                WHERE j.created_at BETWEEN %(start)s AND %(end)s
+                GROUP BY location
+                ORDER BY total DESC
+                LIMIT 5
+                """,
+                user_filters,
+            ),
+            base_params,
+        )
+        locations = [{"label": row[0], "total": row[1]} for row in cursor.fetchall()]
+
+        cursor.execute(
+            f"""
+            SELECT c.id, c.name, COUNT(eu.id) AS completions
+            FROM exam_users eu
+            JOIN exams e ON e.id = eu.exam
+            JOIN courses c ON c.id = e.certi
+            JOIN users u ON u.id = eu.user
+            WHERE {exam_where}
+            GROUP BY c.id, c.name
+            ORDER BY completions DESC
             LIMIT 5
             """,
-            user_filters,
-        ),
-        base_params,
-    )
-    locations = [{"label": row[0], "total": row[1]} for row in cursor.fetchall()]
+            exam_params,
+        )
+        completions_by_cert = [
+            {"id": row[0], "name": row[1], "completions": row[2]} for row in cursor.fetchall()
+        ]
 
-    cursor.execute(
-        f"""
-        SELECT c.id, c.name, COUNT(eu.id) AS completions
-        FROM exam_users eu
-        JOIN exams e ON e.id = eu.exam
-        JOIN courses c ON c.id = e.certi
-        JOIN users u ON u.id = eu.user
-        WHERE {exam_where}
-        GROUP BY c.id, c.name
-        ORDER BY completions DESC
-        LIMIT 5
-        """,
-        exam_params,
-    )
-    completions_by_cert = [
-        {"id": row[0], "name": row[1], "completions": row[2]} for row in cursor.fetchall()
-    ]
+        cursor.execute(
+            f"""
+            SELECT COUNT(*)
+            FROM exam_users eu
+            {exam_join}
+            JOIN users u ON u.id = eu.user
+            WHERE eu.added BETWEEN %(start)s AND %(end)s
+            {f"AND {non_guest_condition}" if non_guest_condition else ""}
+            {"AND u.ex = %(plan)s" if plan is not None else ""}
+            {"AND e.certi = %(cert_id)s" if cert_id is not None else ""}
+            {f"AND {user_search}" if user_query else ""}
+            """,
+            exam_params,
+        )
+        total_exam_assignments = cursor.fetchone()[0] or 0
+
+        cert_activity_conditions = ["eu.comp_at BETWEEN %(start)s AND %(end)s"]
+        if non_guest_condition:
+            cert_activity_conditions.append(non_guest_condition)
+        if cert_id is not None:
+            cert_activity_conditions.append("e.certi = %(cert_id)s")
+        if plan is not None:
+            cert_activity_conditions.append("u.ex = %(plan)s")
+        if user_query:
+            cert_activity_conditions.append(user_search)
+        cert_activity_where = " AND ".join(cert_activity_conditions)
 
-    cursor.execute(
-        f"""
-        SELECT AVG(TIMESTAMPDIFF(MINUTE, eu.start_at, eu.comp_at))
-        FROM exam_users eu
-        JOIN exams e ON e.id = eu.exam
-        JOIN users u ON u.id = eu.user
-        WHERE eu.start_at IS NOT NULL
-          AND eu.comp_at IS NOT NULL
-          AND {exam_where}
-        """,
-        exam_params,
-    )
-    avg_exam_duration = cursor.fetchone()[0]
+        cursor.execute(
+            f"""
+            SELECT u.id, u.name, u.email, u.ex,
+                   MAX(j.created_at) AS last_activity,
+                   COUNT(DISTINCT CASE WHEN j.fen = 'login' THEN j.id END) AS sessions,
+                   COUNT(DISTINCT eu.id) AS exams_completed
+            FROM users u
+            LEFT JOIN journs j
+              ON j.user = u.id AND j.created_at BETWEEN %(start)s AND %(end)s
+            LEFT JOIN exam_users eu
+              ON eu.user = u.id AND eu.comp_at BETWEEN %(start)s AND %(end)s
+            {"LEFT JOIN users_course uc ON uc.user = u.id" if cert_id is not None else ""}
+            WHERE 1=1
+            {f"AND {non_guest_condition}" if non_guest_condition else ""}
+            {"AND u.ex = %(plan)s" if plan is not None else ""}
+            {"AND uc.course = %(cert_id)s" if cert_id is not None else ""}
+            {f"AND {user_search}" if user_query else ""}
+            GROUP BY u.id, u.name, u.email, u.ex
+            ORDER BY last_activity DESC
+            LIMIT 8
+            """,
+            exam_params,
+        )
+        top_user_rows = cursor.fetchall()
+
+        # Only the listed users need their most completed certification, so
+        # the per-user ranking is restricted to their ids.
+        top_cert_map = {}
+        if top_user_rows:
+            top_user_params = dict(exam_params)
+            placeholders = []
+            for index, row in enumerate(top_user_rows):
+                top_user_params[f"top_user_{index}"] = row[0]
+                placeholders.append(f"%(top_user_{index})s")
+            cursor.execute(
+                f"""
+                SELECT user_id, cert_name, cert_completions
+                FROM (
+                    SELECT eu.user AS user_id,
+                           c.name AS cert_name,
+                           COUNT(*) AS cert_completions,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY eu.user ORDER BY COUNT(*) DESC, c.name
+                           ) AS cert_rank
+                    FROM exam_users eu
+                    JOIN exams e ON e.id = eu.exam
+                    JOIN courses c ON c.id = e.certi
+                    JOIN users u ON u.id = eu.user
+                    WHERE {cert_activity_where}
+                      AND eu.user IN ({", ".join(placeholders)})
+                    GROUP BY eu.user, c.id, c.name
+                ) cert_counts
+                WHERE cert_rank = 1
+                """,
+                top_user_params,
+            )
+            top_cert_map = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
 
-    cursor.execute(
-        f"""
-        SELECT COUNT(*)
-        FROM exam_users eu
-        JOIN exams e ON e.id = eu.exam
-        JOIN users u ON u.id = eu.user
-        WHERE eu.added BETWEEN %(start)s AND %(end)s
-        {f"AND {non_guest_condition}" if non_guest_condition else ""}
-        {"AND u.ex = %(plan)s" if plan is not None else ""}
-        {"AND e.certi = %(cert_id)s" if cert_id is not None else ""}
-        {"AND (u.name LIKE %(user_query)s OR u.email LIKE %(user_query)s OR u.usn LIKE %(user_query)s)" if user_query else ""}
-        """,
-        exam_params,
-    )
-    total_exam_assignments = cursor.fetchone()[0] or 0
+        cert_popularity_conditions = ["uc.created_at BETWEEN %(start)s AND %(end)s"]
+        if non_guest_condition:
+            cert_popularity_conditions.append(non_guest_condition)
+        if plan is not None:
+            cert_popularity_conditions.append("u.ex = %(plan)s")
+        if user_query:
+            cert_popularity_conditions.append(user_search)
+        cert_popularity_where = " AND ".join(cert_popularity_conditions)
 
-    cert_activity_conditions = ["eu.comp_at BETWEEN %(start)s AND %(end)s"]
-    if non_guest_condition:
-        cert_activity_conditions.append(non_guest_condition)
-    if cert_id is not None:
-        cert_activity_conditions.append("e.certi = %(cert_id)s")
-    if plan is not None:
-        cert_activity_conditions.append("u.ex = %(plan)s")
-    if user_query:
-        cert_activity_conditions.append(
-            "(u.name LIKE %(user_query)s OR u.email LIKE %(user_query)s OR u.usn LIKE %(user_query)s)"
+        cursor.execute(
+            f"""
+            SELECT c.id, c.name, COUNT(*) AS user_count
+            FROM users_course uc
+            JOIN users u ON u.id = uc.user
+            JOIN courses c ON c.id = uc.course
+            WHERE {cert_popularity_where}
+            GROUP BY c.id, c.name
+            ORDER BY user_count DESC
+            LIMIT 5
+            """,
+            base_params,
         )
-    cert_activity_where = " AND ".join(cert_activity_conditions)
-
-    cursor.execute(
-        f"""
-        SELECT cert_counts.user_id, cert_counts.cert_name, cert_counts.cert_completions
-        FROM (
-            SELECT eu.user AS user_id, c.name AS cert_name, COUNT(*) AS cert_completions
-            FROM exam_users eu
-            JOIN exams e ON e.id = eu.exam
-            JOIN courses c ON c.id = e.certi
-            JOIN users u ON u.id = eu.user
-            WHERE {cert_activity_where}
-            GROUP BY eu.user, c.id, c.name
-        ) cert_counts
-        JOIN (
-            SELECT user_id, MAX(cert_completions) AS max_completions
-            FROM (
-                SELECT eu.user AS user_id, c.id AS cert_id, COUNT(*) AS cert_completions
-                FROM exam_users eu
-                JOIN exams e ON e.id = eu.exam
-                JOIN courses c ON c.id = e.certi
-                JOIN users u ON u.id = eu.user
-                WHERE {cert_activity_where}
-                GROUP BY eu.user, c.id
-            ) max_counts
-            GROUP BY user_id
-        ) top_counts
-          ON cert_counts.user_id = top_counts.user_id
-         AND cert_counts.cert_completions = top_counts.max_completions
-        """,
-        exam_params,
-    )
-    top_cert_map = {
-        row[0]: {"cert_name": row[1], "cert_completions": row[2]} for row in cursor.fetchall()
-    }
+        cert_popularity_rows = cursor.fetchall()
 
-    cursor.execute(
-        f"""
-        SELECT u.id, u.name, u.email, u.ex,
-               MAX(j.created_at) AS last_activity,
-               COUNT(DISTINCT CASE WHEN j.fen = 'login' THEN j.id END) AS sessions,
-               COUNT(DISTINCT eu.id) AS exams_completed
-        FROM users u
-        LEFT JOIN journs j
-          ON j.user = u.id AND j.created_at BETWEEN %(start)s AND %(end)s
-        LEFT JOIN exam_users eu
-          ON eu.user = u.id AND eu.comp_at BETWEEN %(start)s AND %(end)s
-        {"LEFT JOIN users_course uc ON uc.user = u.id" if cert_id is not None else ""}
-        WHERE 1=1
-        {f"AND {non_guest_condition}" if non_guest_condition else ""}
-        {"AND u.ex = %(plan)s" if plan is not None else ""}
-        {"AND uc.course = %(cert_id)s" if cert_id is not None else ""}
-        {"AND (u.name LIKE %(user_query)s OR u.email LIKE %(user_query)s OR u.usn LIKE %(user_query)s)" if user_query else ""}
-        GROUP BY u.id, u.name, u.email, u.ex
-        ORDER BY last_activity DESC
-        LIMIT 8
-        """,
-        exam_params,
-    )
+    # The connection is back in the pool; the remaining work is plain Python.
     top_users = []
-    for row in cursor.fetchall():
-        top_cert = top_cert_map.get(row[0], {})
+    for row in top_user_rows:
+        top_cert_name, top_cert_completions = top_cert_map.get(row[0], (None, None))
         top_users.append(
             {
                 "name": row[1],
@@ -2341,125 +3042,19 @@ def get_dashboard_snapshot(start_dt, end_dt, plan=None, cert_id=None, user_query
                 "last_activity": row[4],
                 "sessions": row[5],
                 "exams_completed": row[6],
-                "top_cert": top_cert.get("cert_name"),
-                "top_cert_completions": top_cert.get("cert_completions"),
+                "top_cert": top_cert_name,
+                "top_cert_completions": top_cert_completions,
             }
         )
-
-    cert_popularity_conditions = ["uc.created_at BETWEEN %(start)s AND %(end)s"]
-    if non_guest_condition:
-        cert_popularity_conditions.append(non_guest_condition)
-    if plan is not None:
-        cert_popularity_conditions.append("u.ex = %(plan)s")
-    if user_query:
-        cert_popularity_conditions.append(
-            "(u.name LIKE %(user_query)s OR u.email LIKE %(user_query)s OR u.usn LIKE %(user_query)s)"
-        )
-    cert_popularity_where = " AND ".join(cert_popularity_conditions)
-
-    cursor.execute(
-        f"""
-        SELECT c.id, c.name, COUNT(*) AS user_count
-        FROM users_course uc
-        JOIN users u ON u.id = uc.user
-        JOIN courses c ON c.id = uc.course
-        WHERE {cert_popularity_where}
-        GROUP BY c.id, c.name
-        ORDER BY user_count DESC
-        LIMIT 5
-        """,
-        base_params,
-    )
     cert_popularity = [
-        {"id": row[0], "name": row[1], "user_count": row[2]} for row in cursor.fetchall()
+        {"id": row[0], "name": row[1], "user_count": row[2]} for row in cert_popularity_rows
     ]
 
-    guest_metrics_params = {
-        "start": start_dt,
-        "end": end_dt,
-        **guest_params,
-    }
-    cursor.execute(
-        _apply_filters(
-            """
-            SELECT COUNT(*)
-            FROM users u
-            WHERE u.created_at BETWEEN %(start)s AND %(end)s
-            """,
-            guest_filters,
-        ),
-        guest_metrics_params,
-    )
-    guest_new_users = cursor.fetchone()[0] or 0
-
-    cursor.execute(
-        _apply_filters(
-            """
-            SELECT COUNT(DISTINCT j.user)
-            FROM journs j
-            JOIN users u ON u.id = j.user
-            WHERE j.created_at BETWEEN %(start)s AND %(end)s
-            """,
-            guest_filters,
-        ),
-        guest_metrics_params,
-    )
-    guest_active_users = cursor.fetchone()[0] or 0
-
-    cursor.execute(
-        _apply_filters(
-            """
-            SELECT COUNT(*)
-            FROM journs j
-            JOIN users u ON u.id = j.user
-            WHERE j.created_at BETWEEN %(start)s AND %(end)s
-              AND j.fen = 'login'
-            """,
-            guest_filters,
-        ),
-        guest_metrics_params,
-    )
-    guest_sessions = cursor.fetchone()[0] or 0
-
-    guest_exam_params = {
-        "start": start_dt,
-        "end": end_dt,
-    }
-    guest_exam_conditions = ["eu.comp_at BETWEEN %(start)s AND %(end)s"]
-    if guest_condition:
-        guest_exam_conditions.append(guest_condition)
-    if plan is not None:
-        guest_exam_params["plan"] = plan
-        guest_exam_conditions.append("u.ex = %(plan)s")
-    if cert_id is not None:
-        guest_exam_params["cert_id"] = cert_id
-        guest_exam_conditions.append("e.certi = %(cert_id)s")
-    if user_query:
-        guest_exam_params["user_query"] = f"%{user_query}%"
-        guest_exam_conditions.append(
-            "(u.name LIKE %(user_query)s OR u.email LIKE %(user_query)s OR u.usn LIKE %(user_query)s)"
-        )
-    guest_exam_where = " AND ".join(guest_exam_conditions)
-    cursor.execute(
-        f"""
-        SELECT COUNT(*)
-        FROM exam_users eu
-        JOIN users u ON u.id = eu.user
-        JOIN exams e ON e.id = eu.exam
-        WHERE {guest_exam_where}
-        """,
-        guest_exam_params,
-    )
-    guest_completed_exams = cursor.fetchone()[0] or 0
-
-    cursor.close()
-    conn.close()
-
     completion_rate = (
         (completed_exams / total_exam_assignments) * 100 if total_exam_assignments else 0
     )
 
-    return {
+    snapshot = {
         "kpis": {
             "active_users": active_users,
             "new_users": new_users,
@@ -2481,10 +3076,83 @@ def get_dashboard_snapshot(start_dt, end_dt, plan=None, cert_id=None, user_query
         "locations": locations,
         "top_users": top_users,
         "cert_popularity": cert_popularity,
-        "guests": {
-            "new_users": guest_new_users,
-            "active_users": guest_active_users,
-            "sessions": guest_sessions,
-            "completed_exams": guest_completed_exams,
-        },
+    }
+    if include_guests:
+        snapshot["guests"] = get_guest_dashboard_metrics(
+            start_dt, end_dt, plan=plan, cert_id=cert_id, user_query=user_query
+        )
+    return snapshot
+
+
+@functools.lru_cache(maxsize=64)
+def _guest_metrics_sql(guest_filters, guest_condition, has_plan, has_cert, user_condition):
+    """Assemble the single guest KPI statement for one filter shape.
+
+    Filter values are bound parameters, so the SQL only depends on which
+    filters are active and is memoized across dashboard loads.
+    """
+
+    guest_exam_conditions = ["eu.comp_at BETWEEN %(start)s AND %(end)s", guest_condition]
+    if has_plan:
+        guest_exam_conditions.append("u.ex = %(plan)s")
+    if has_cert:
+        guest_exam_conditions.append("e.certi = %(cert_id)s")
+    if user_condition:
+        guest_exam_conditions.append(user_condition)
+    guest_exam_where = " AND ".join(guest_exam_conditions)
+
+    # Sign-ups and completed exams ride along as scalar subqueries of the
+    # journs scan, so the four guest KPIs cost a single round trip.  Every
+    # subquery binds the same named parameters.
+    return f"""
+            SELECT (
+                     SELECT COUNT(*)
+                     FROM users u
+                     WHERE u.created_at BETWEEN %(start)s AND %(end)s
+                       AND {guest_filters}
+                   ),
+                   (
+                     SELECT COUNT(*)
+                     FROM exam_users eu
+                     JOIN users u ON u.id = eu.user
+                     {"JOIN exams e ON e.id = eu.exam" if has_cert else ""}
+                     WHERE {guest_exam_where}
+                   ),
+                   COUNT(DISTINCT j.user),
+                   SUM(CASE WHEN j.fen = 'login' THEN 1 ELSE 0 END)
+            FROM journs j
+            JOIN users u ON u.id = j.user
+            WHERE j.created_at BETWEEN %(start)s AND %(end)s
+              AND {guest_filters}
+            """
+
+
+@_dashboard_cached
+def get_guest_dashboard_metrics(start_dt, end_dt, plan=None, cert_id=None, user_query=None):
+    """Return the guest section of the global dashboard."""
+
+    user_match = _user_match_clause("u", user_query) if user_query else None
+    if user_match == _NO_USER_MATCH:
+        return _empty_dashboard_snapshot(True)["guests"]
+    guest_condition = _guest_conditions()[0]
+    guest_filters, guest_params = _build_user_filter_clause(
+        "u", plan, cert_id, user_match, exclude_guest=False
+    )
+    guest_filters = f"{guest_filters} AND {guest_condition}" if guest_filters else guest_condition
+    query = _guest_metrics_sql(
+        guest_filters,
+        guest_condition,
+        plan is not None,
+        cert_id is not None,
+        user_match[0] if user_match else "",
+    )
+    with db_cursor() as (conn, cursor):
+        cursor.execute(query, {"start": start_dt, "end": end_dt, **guest_params})
+        new_users, completed_exams, active_users, sessions = cursor.fetchone()
+
+    return {
+        "new_users": new_users or 0,
+        "active_users": active_users or 0,
+        "sessions": int(sessions or 0),
+        "completed_exams": completed_exams or 0,
     }
@@ -1,6 +1,6 @@
 from flask import Blueprint, render_template, request, jsonify
 import mysql.connector
-from config import DB_CONFIG
+import db
 from openai_api import generate_domains_outline
 
 dom_bp = Blueprint('dom', __name__)
@@ -70,37 +70,28 @@ def index():
 # --- API pour remplir les dropdowns ---
 @dom_bp.route('/api/providers')
 def api_providers():
-    conn = mysql.connector.connect(**DB_CONFIG)
-    cur  = conn.cursor(dictionary=True)
-    cur.execute("SELECT id, name FROM provs")
-    rows = cur.fetchall()
-    cur.close(); conn.close()
-    return jsonify(rows)
+    rows = db.get_providers()
+    return jsonify([{"id": pid, "name": name} for pid, name in rows])
 
 @dom_bp.route('/api/certifications/<int:prov_id>')
 def api_certs(prov_id):
-    conn = mysql.connector.connect(**DB_CONFIG)
-    cur = conn.cursor(dictionary=True)
-    cur.execute(
-        "SELECT id, name, code_cert_key AS code_cert, pub FROM courses WHERE prov = %s",
-        (prov_id,),
-    )
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+    with db.db_cursor(dictionary=True) as (conn, cur):
+        cur.execute(
+            "SELECT id, name, code_cert_key AS code_cert, pub FROM courses WHERE prov = %s",
+            (prov_id,),
+        )
+        rows = cur.fetchall()
     return jsonify(rows)
 
 
 @dom_bp.route('/api/certifications/<int:cert_id>/modules')
 def api_modules_for_cert(cert_id):
-    conn = mysql.connector.connect(**DB_CONFIG)
-    cur = conn.cursor(dictionary=True)
-    cur.execute(
-        "SELECT id, name, descr, code_cert FROM modules WHERE course = %s ORDER BY name",
-        (cert_id,),
-    )
-    rows = cur.fetchall()
-    cur.close(); conn.close()
+    with db.db_cursor(dictionary=True) as (conn, cur):
+        cur.execute(
+            "SELECT id, name, descr, code_cert FROM modules WHERE course = %s ORDER BY name",
+            (cert_id,),
+        )
+        rows = cur.fetchall()
     return jsonify(rows)
 
 
@@ -110,21 +101,19 @@ def api_default_module():
     if not code_cert:
         return jsonify({"error": "code_cert requis"}), 400
 
-    conn = mysql.connector.connect(**DB_CONFIG)
-    cur = conn.cursor(dictionary=True)
-    cur.execute(
-        """
-        SELECT m.id AS module_id, m.course AS cert_id, c.prov AS provider_id
-        FROM modules m
-        JOIN courses c ON c.id = m.course
-        WHERE m.code_cert = %s
-        ORDER BY m.id DESC
-        LIMIT 1
-        """,
-        (code_cert,),
-    )
-    row = cur.fetchone()
-    cur.close(); conn.close()
+    with db.db_cursor(dictionary=True) as (conn, cur):
+        cur.execute(
+            """
+            SELECT m.id AS module_id, m.course AS cert_id, c.prov AS provider_id
+            FROM modules m
+            JOIN courses c ON c.id = m.course
+            WHERE m.code_cert = %s
+            ORDER BY m.id DESC
+            LIMIT 1
+            """,
+            (code_cert,),
+        )
+        row = cur.fetchone()
     if not row:
         return jsonify({"module_id": None, "cert_id": None, "provider_id": None})
     return jsonify(row)
@@ -140,7 +129,7 @@ def api_create_module():
     if not cert_id or not name:
         return jsonify({'error': 'certification_id et name requis'}), 400
 
-    conn = mysql.connector.connect(**DB_CONFIG)
+    conn = db.get_connection()
     cur  = conn.cursor()
     try:
         cur.execute(
@@ -149,6 +138,7 @@ def api_create_module():
         )
         conn.commit()
         new_id = cur.lastrowid
+        db.invalidate_reference_caches()
     except mysql.connector.Error as e:
         conn.rollback()
         return jsonify({'error': str(e)}), 500
@@ -160,11 +150,9 @@ def api_create_module():
 
 @dom_bp.route('/api/certifications/<int:cert_id>/generate-domains', methods=['POST'])
 def api_generate_domains(cert_id):
-    conn = mysql.connector.connect(**DB_CONFIG)
-    cur = conn.cursor()
-    cur.execute("SELECT name FROM courses WHERE id = %s", (cert_id,))
-    row = cur.fetchone()
-    cur.close(); conn.close()
+    with db.db_cursor() as (conn, cur):
+        cur.execute("SELECT name FROM courses WHERE id = %s", (cert_id,))
+        row = cur.fetchone()
 
     if not row:
         return jsonify({'error': "Certification introuvable."}), 404
@@ -184,7 +172,7 @@ def api_generate_domains(cert_id):
 def api_sync_domains(cert_id):
     """Generate domains via IA and insert missing modules for MCP."""
 
-    conn = mysql.connector.connect(**DB_CONFIG)
+    conn = db.get_connection()
     cur = conn.cursor(dictionary=True)
     try:
         cur.execute("SELECT name FROM courses WHERE id = %s", (cert_id,))
@@ -203,7 +191,7 @@ def api_sync_domains(cert_id):
     except Exception as exc:
         return jsonify({'error': str(exc)}), 502
 
-    conn = mysql.connector.connect(**DB_CONFIG)
+    conn = db.get_connection()
     cur = conn.cursor(dictionary=True)
     created = 0
     updated = 0
@@ -260,6 +248,8 @@ def api_sync_domains(cert_id):
                 }
             )
         conn.commit()
+        if created:
+            db.invalidate_reference_caches()
     except mysql.connector.Error as exc:
         conn.rollback()
         return jsonify({'error': str(exc)}), 500
@@ -455,6 +455,7 @@ def api_update_code_cert():
                 )
             cur.execute("UPDATE modules SET code_cert = %s WHERE id = %s", (code_cert, module_id))
             conn.commit()
+            db.invalidate_reference_caches()
         except Exception as exc:
             conn.rollback()
             return jsonify({"status": "error", "message": str(exc)}), 500
@@ -575,6 +576,8 @@ def api_sync_code_cert():
         updated = cur.rowcount
 
         conn.commit()
+        if inserted:
+            db.invalidate_reference_caches()
         return jsonify({"status": "ok", "inserted": inserted, "updated": updated})
     except Exception as exc:
         try:
@@ -1,7 +1,5 @@
 from flask import Blueprint, render_template, request, jsonify
-import mysql.connector
-import json
-from config import DB_CONFIG
+import db
 
 quest_bp = Blueprint('quest', __name__)
 
@@ -12,30 +10,18 @@ def index():
 # --- Dropdown APIs ---
 @quest_bp.route('/api/providers')
 def api_providers():
-    conn = mysql.connector.connect(**DB_CONFIG)
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT id, name FROM provs")
-    rows = cur.fetchall()
-    cur.close(); conn.close()
-    return jsonify(rows)
+    rows = db.get_providers()
+    return jsonify([{"id": pid, "name": name} for pid, name in rows])
 
 @quest_bp.route('/api/certifications/<int:prov_id>')
 def api_certs(prov_id):
-    conn = mysql.connector.connect(**DB_CONFIG)
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT id, name FROM courses WHERE prov = %s", (prov_id,))
-    rows = cur.fetchall()
-    cur.close(); conn.close()
-    return jsonify(rows)
+    rows = db.get_certifications_by_provider(prov_id)
+    return jsonify([{"id": cid, "name": name} for cid, name in rows])
 
 @quest_bp.route('/api/modules/<int:cert_id>')
 def api_modules(cert_id):
-    conn = mysql.connector.connect(**DB_CONFIG)
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT id, name FROM modules WHERE course = %s", (cert_id,))
-    rows = cur.fetchall()
-    cur.close(); conn.close()
-    return jsonify(rows)
+    rows = db.get_domains_by_certification(cert_id)
+    return jsonify([{"id": mid, "name": name} for mid, name in rows])
 
 # --- Insert question (une par une) ---
 @quest_bp.route('/api/questions', methods=['POST'])
@@ -74,76 +60,42 @@ def api_questions():
     else:
         question_text = text
 
-    conn = mysql.connector.connect(**DB_CONFIG)
-    cur = conn.cursor()
     question_id = None
     try:
-        try:
+        hash_lookup = db.answer_hash_lookup()
+        with db.db_cursor() as (conn, cur):
+            # LAST_INSERT_ID(id) renvoie l'id existant dans lastrowid en cas de
+            # doublon ; seule une vraie insertion affecte une ligne.
             cur.execute(
                 "INSERT INTO questions (text, descr, level, module, nature, ty, created_at) "
-                "VALUES (%s,%s,%s,%s,%s,%s,NOW())",
+                "VALUES (%s,%s,%s,%s,%s,%s,NOW()) "
+                "ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)",
                 (question_text, diagram_descr, level_num, module_id, nature_num, ty_num)
             )
             question_id = cur.lastrowid
-        except mysql.connector.Error as e:
-            # DUPLICATE question -> on passe à la suivante (skip)
-            if e.errno == 1062:
-                # On récupère l'id existant pour info
-                cur.execute(
-                    "SELECT id FROM questions WHERE module=%s AND text=%s LIMIT 1",
-                    (module_id, question_text)
-                )
-                row = cur.fetchone()
-                existing_id = row[0] if row else None
+            if cur.rowcount != 1:
+                # DUPLICATE question -> on passe à la suivante (skip)
                 conn.rollback()
-                cur.close(); conn.close()
-                return jsonify({'status': 'skipped-duplicate', 'existing_id': existing_id}), 200
-            else:
-                raise
-
-        # Réponses stockées en JSON + liaisons quest_ans
-        for ans in question.get('answers', []):
-            raw_val = (ans.get('value') or ans.get('text') or '').strip()
-            if not raw_val:
-                continue
-
-            answer_data = {k: v for k, v in ans.items() if k not in ('isok', 'value', 'text')}
-            answer_data['value'] = raw_val
-            a_json = json.dumps(answer_data, ensure_ascii=False)[:700]
-            isok = 1 if int(ans.get('isok') or 0) == 1 else 0
-
-            # Insert ou réutilise answer
-            try:
-                cur.execute("INSERT INTO answers (text, created_at) VALUES (%s,NOW())", (a_json,))
-                ans_id = cur.lastrowid
-            except mysql.connector.Error as e:
-                if e.errno == 1062:
-                    cur.execute("SELECT id FROM answers WHERE text=%s LIMIT 1", (a_json,))
-                    r = cur.fetchone()
-                    ans_id = r[0] if r else None
-                else:
-                    raise
-
-            if ans_id:
-                # Lien quest_ans (ignore si déjà présent)
-                try:
-                    cur.execute(
-                        "INSERT INTO quest_ans (question, answer, isok) VALUES (%s,%s,%s)",
-                        (question_id, ans_id, isok)
-                    )
-                except mysql.connector.Error as e:
-                    if e.errno == 1062:
-                        # paire (question, answer) déjà liée -> on ignore
-                        pass
-                    else:
-                        raise
-
-        conn.commit()
+                return jsonify({'status': 'skipped-duplicate', 'existing_id': question_id}), 200
+
+            # Réponses stockées en JSON + liaisons quest_ans, en lot : les réponses
+            # existantes sont réutilisées et les liens écrits en un seul executemany.
+            answer_rows = []
+            for ans in question.get('answers', []):
+                raw_val = (ans.get('value') or ans.get('text') or '').strip()
+                if not raw_val:
+                    continue
+
+                answer_data = {k: v for k, v in ans.items() if k not in ('isok', 'value', 'text')}
+                answer_data['value'] = raw_val
+                isok = 1 if int(ans.get('isok') or 0) == 1 else 0
+                answer_rows.append((question_id, db.serialize_answer(answer_data), isok))
+            db.insert_answers_and_links(cur, answer_rows, hash_lookup)
+
+            conn.commit()
     except Exception as e:
-        conn.rollback()
-        cur.close(); conn.close()
+        # db_cursor a déjà annulé la transaction et rendu la connexion au pool.
         return jsonify({'error': str(e)}), 500
 
-    cur.close(); conn.close()
     return jsonify({'id': question_id, 'status': 'inserted'})
 
@@ -0,0 +1,93 @@
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+import db
+
+
+class AnswerWritesTest(unittest.TestCase):
+    def setUp(self):
+        db._COLUMN_CACHE["answers"] = {"id", "text", "created_at"}
+
+    def tearDown(self):
+        db._COLUMN_CACHE.pop("answers", None)
+
+    def _mock_connection(self):
+        conn = MagicMock()
+        cursor = MagicMock()
+        conn.cursor.return_value = cursor
+        return conn, cursor
+
+    @patch("db.get_connection")
+    def test_mark_answers_correct_issues_single_update(self, mock_get_connection):
+        conn, cursor = self._mock_connection()
+        mock_get_connection.return_value = conn
+
+        db.mark_answers_correct(7, [11, 12, 11, 13])
+
+        cursor.execute.assert_called_once()
+        query, params = cursor.execute.call_args.args
+        self.assertIn("answer IN (%s,%s,%s)", query)
+        self.assertEqual(params, (7, 11, 12, 13))
+        conn.commit.assert_called_once()
+
+    @patch("db.get_connection")
+    def test_add_answers_links_in_one_batch(self, mock_get_connection):
+        conn, cursor = self._mock_connection()
+        cursor.fetchall.side_effect = [
+            [(99, json.dumps({"value": "A"}))],
+            [(100, json.dumps({"value": "B"}))],
+        ]
+        mock_get_connection.return_value = conn
+
+        db.add_answers(7, [{"value": "A", "isok": 1}, {"value": "B"}])
+
+        queries = [c.args[0] for c in cursor.execute.call_args_list]
+        self.assertEqual(len(queries), 3)
+        self.assertIn("INSERT INTO answers", queries[1])
+        cursor.executemany.assert_called_once()
+        query, rows = cursor.executemany.call_args.args
+        self.assertIn("INSERT INTO quest_ans", query)
+        self.assertEqual(rows, [(7, 99, 1), (7, 100, 0)])
+
+    @patch("db.get_connection")
+    def test_add_answers_reuses_existing_answers(self, mock_get_connection):
+        conn, cursor = self._mock_connection()
+        cursor.fetchall.return_value = [(42, json.dumps({"value": "A"}))]
+        mock_get_connection.return_value = conn
+
+        db.add_answers(7, [{"value": "A"}, {"value": "A", "isok": 1}])
+
+        cursor.execute.assert_called_once()
+        query, rows = cursor.executemany.call_args.args
+        self.assertEqual(rows, [(7, 42, 0)])
+
+    @patch("db.get_connection")
+    def test_add_answers_rolls_back_on_failure(self, mock_get_connection):
+        conn, cursor = self._mock_connection()
+        cursor.fetchall.return_value = [(5, json.dumps({"value": "A"}))]
+        cursor.executemany.side_effect = RuntimeError("link failed")
+        mock_get_connection.return_value = conn
+
+        with self.assertRaises(RuntimeError):
+            db.add_answers(7, [{"value": "A"}])
+
+        conn.rollback.assert_called_once()
+        conn.commit.assert_not_called()
+        conn.close.assert_called_once()
+
+
+    def test_serialize_answer_keeps_long_payloads_valid_json(self):
+        data = {"target": "T", "value": "é\"" * 600}
+
+        encoded = db.serialize_answer(data)
+
+        self.assertLessEqual(len(encoded), db._ANSWER_TEXT_MAX)
+        decoded = json.loads(encoded)
+        self.assertEqual(decoded["target"], "T")
+        self.assertTrue(data["value"].startswith(decoded["value"]))
+        self.assertEqual(db.serialize_answer({"value": "A"}), '{"value": "A"}')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import db
+
+
+class DbCursorTest(unittest.TestCase):
+    def _mock_connection(self):
+        conn = MagicMock()
+        cursor = MagicMock()
+        conn.cursor.return_value = cursor
+        return conn, cursor
+
+    @patch("db.get_connection")
+    def test_connection_is_released_after_block(self, mock_get_connection):
+        conn, cursor = self._mock_connection()
+        mock_get_connection.return_value = conn
+
+        with db.db_cursor(dictionary=True) as (conn_in, cursor_in):
+            self.assertIs(conn_in, conn)
+            self.assertIs(cursor_in, cursor)
+
+        conn.cursor.assert_called_once_with(dictionary=True)
+        conn.rollback.assert_not_called()
+        cursor.close.assert_called_once()
+        conn.close.assert_called_once()
+
+    @patch("db.get_connection")
+    def test_failure_rolls_back_and_releases_connection(self, mock_get_connection):
+        conn, cursor = self._mock_connection()
+        cursor.execute.side_effect = RuntimeError("boom")
+        mock_get_connection.return_value = conn
+
+        with self.assertRaises(RuntimeError):
+            db.delete_schedule_entry("entry-1")
+
+        conn.commit.assert_not_called()
+        conn.rollback.assert_called_once()
+        cursor.close.assert_called_once()
+        conn.close.assert_called_once()
+
+
+    @patch("db.get_connection")
+    def test_unread_rows_are_drained_before_release(self, mock_get_connection):
+        conn, cursor = self._mock_connection()
+        conn.unread_result = True
+        mock_get_connection.return_value = conn
+
+        with db.db_cursor(buffered=False):
+            pass
+
+        conn.consume_results.assert_called_once()
+        conn.close.assert_called_once()
+
+    def test_execute_async_releases_slots_when_work_finishes(self):
+        def fail():
+            raise RuntimeError("boom")
+
+        for _ in range(db._EXECUTOR_WORKERS * 2 + 1):
+            self.assertEqual(db.execute_async(sum, [1, 2]).result(timeout=5), 3)
+            with self.assertRaises(RuntimeError):
+                db.execute_async(fail).result(timeout=5)
+
+    @patch("db.sleep")
+    @patch("db._POOL")
+    def test_get_connection_waits_for_a_returned_connection(self, pool, mock_sleep):
+        conn = MagicMock()
+        exhausted = db.mysql.connector.errors.PoolError("pool exhausted")
+        pool.get_connection.side_effect = [exhausted, exhausted, conn]
+
+        self.assertIs(db.get_connection(), conn)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    @patch("db.DB_POOL_WAIT_TIMEOUT", 0)
+    @patch("db.sleep")
+    @patch("db._POOL")
+    def test_get_connection_gives_up_after_the_wait_timeout(self, pool, mock_sleep):
+        pool.get_connection.side_effect = db.mysql.connector.errors.PoolError("pool exhausted")
+
+        with self.assertRaises(db.mysql.connector.errors.PoolError):
+            db.get_connection()
+        mock_sleep.assert_not_called()
+
+    def test_executor_leaves_pool_headroom_for_request_threads(self):
+        self.assertLessEqual(db._EXECUTOR_WORKERS, max(1, db.DB_POOL_SIZE // 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,298 @@
+import unittest
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import db
+
+
+class UserDashboardSnapshotTest(unittest.TestCase):
+    @patch("db._get_table_columns", return_value={"id", "name"})
+    @patch("db.get_connection")
+    def test_exam_kpis_share_one_query(self, mock_get_connection, _columns):
+        conn = MagicMock()
+        cursor = MagicMock()
+        conn.cursor.return_value = cursor
+        cursor.fetchone.side_effect = [
+            (7, "Alice", "alice@example.test", 1, datetime(2025, 1, 1)),
+            (Decimal(4), Decimal(3), Decimal("12.5")),
+            (1,),
+        ]
+        cursor.fetchall.side_effect = [
+            [("2025-02-01", 2), ("2025-02-03", 1)],
+            [],
+        ]
+        mock_get_connection.return_value = conn
+
+        snapshot = db.get_user_dashboard_snapshot(
+            7, datetime(2025, 2, 1), datetime(2025, 2, 28)
+        )
+
+        kpis = snapshot["kpis"]
+        self.assertEqual(kpis["sessions"], 3)
+        self.assertEqual(kpis["assigned_exams"], 4)
+        self.assertEqual(kpis["completed_exams"], 3)
+        self.assertEqual(kpis["completion_rate"], 75)
+        self.assertEqual(kpis["avg_exam_duration"], Decimal("12.5"))
+        self.assertTrue(kpis["active_subscription"])
+        self.assertEqual(cursor.execute.call_count, 5)
+        conn.close.assert_called_once()
+
+    @patch("db._get_table_columns", return_value={"id", "score"})
+    @patch("db.get_connection")
+    def test_score_breakdown_is_summed_from_certification_groups(
+        self, mock_get_connection, _columns
+    ):
+        conn = MagicMock()
+        cursor = MagicMock()
+        conn.cursor.return_value = cursor
+        cursor.fetchone.side_effect = [
+            (7, "Alice", "alice@example.test", 1, None),
+            (Decimal(3), Decimal(3), None),
+            (0,),
+        ]
+        cert_rows = [
+            (c, f"Cert {c}", 2, Decimal(70), Decimal(140), 2, 0, 2, 0)
+            for c in range(1, 8)
+        ]
+        cert_rows.append((8, "Cert 8", 1, None, None, 0, 0, 0, 0))
+        cert_rows[0] = (1, "Cert 1", 3, Decimal(60), Decimal(180), 3, 1, 0, 2)
+        cursor.fetchall.side_effect = [[], cert_rows]
+        mock_get_connection.return_value = conn
+
+        snapshot = db.get_user_dashboard_snapshot(
+            7, datetime(2025, 2, 1), datetime(2025, 2, 28)
+        )
+
+        self.assertEqual(len(snapshot["completions_by_cert"]), 6)
+        self.assertEqual(snapshot["completions_by_cert"][0]["avg_score"], Decimal(60))
+        self.assertEqual(snapshot["avg_score"], Decimal(1020) / 15)
+        self.assertEqual(
+            [entry["total"] for entry in snapshot["score_breakdown"]], [1, 12, 2]
+        )
+        self.assertEqual(cursor.execute.call_count, 5)
+        self.assertNotIn("LIMIT", cursor.execute.call_args_list[4].args[0])
+
+    @patch("db._get_table_columns", return_value={"id", "name"})
+    @patch("db.get_connection")
+    def test_connection_is_released_when_query_fails(
+        self, mock_get_connection, _columns
+    ):
+        conn = MagicMock()
+        cursor = MagicMock()
+        conn.cursor.return_value = cursor
+        cursor.fetchone.return_value = (7, "Alice", "alice@example.test", 1, None)
+        cursor.fetchall.side_effect = RuntimeError("lost connection")
+        mock_get_connection.return_value = conn
+
+        with self.assertRaises(RuntimeError):
+            db.get_user_dashboard_snapshot(7, datetime(2025, 2, 1), datetime(2025, 2, 28))
+
+        cursor.close.assert_called_once()
+        conn.close.assert_called_once()
+
+
+class GuestDashboardMetricsTest(unittest.TestCase):
+    def setUp(self):
+        db.invalidate_dashboard_caches()
+
+    def tearDown(self):
+        db.invalidate_dashboard_caches()
+
+    @patch("db._get_table_columns", return_value={"id", "type"})
+    @patch("db.get_connection")
+    def test_guest_section_runs_on_its_own_connection(
+        self, mock_get_connection, _columns
+    ):
+        conn = MagicMock()
+        cursor = MagicMock()
+        conn.cursor.return_value = cursor
+        cursor.fetchone.return_value = (2, 4, 3, Decimal(5))
+        mock_get_connection.return_value = conn
+
+        guests = db.get_guest_dashboard_metrics(
+            datetime(2025, 2, 1), datetime(2025, 2, 28), plan=1
+        )
+
+        self.assertEqual(
+            guests,
+            {"new_users": 2, "active_users": 3, "sessions": 5, "completed_exams": 4},
+        )
+        cursor.execute.assert_called_once()
+        query, params = cursor.execute.call_args.args
+        self.assertEqual(query.count("u.ex = %(plan)s"), 3)
+        self.assertEqual(params["plan"], 1)
+        self.assertNotIn("JOIN exams", query)
+        conn.close.assert_called_once()
+
+        db.invalidate_dashboard_caches()
+        db.get_guest_dashboard_metrics(datetime(2025, 3, 1), datetime(2025, 3, 31), plan=2)
+        self.assertIs(cursor.execute.call_args.args[0], query)
+
+    @patch("db._get_table_columns", return_value={"id", "type"})
+    @patch("db.get_connection")
+    def test_repeated_filters_are_served_from_cache(self, mock_get_connection, _columns):
+        conn = MagicMock()
+        cursor = MagicMock()
+        conn.cursor.return_value = cursor
+        cursor.fetchone.side_effect = [(2, 4, 3, 5), (1, 1, 1, 1)]
+        mock_get_connection.return_value = conn
+        period = (datetime(2025, 2, 1), datetime(2025, 2, 28))
+
+        first = db.get_guest_dashboard_metrics(*period, plan=1)
+        first["new_users"] = 99
+        second = db.get_guest_dashboard_metrics(*period, plan=1)
+        other = db.get_guest_dashboard_metrics(*period, plan=2)
+
+        self.assertEqual(second["new_users"], 2)
+        self.assertEqual(other["new_users"], 1)
+        self.assertEqual(cursor.execute.call_count, 2)
+
+
+class UserFilterSqlTest(unittest.TestCase):
+    def test_filters_are_spliced_before_group_by_and_memoized(self):
+        query = "SELECT x FROM users u WHERE u.id > 0 GROUP BY x"
+
+        sql = db._apply_user_filters(query, "u.ex = %(plan)s")
+
+        self.assertEqual(
+            sql, "SELECT x FROM users u WHERE u.id > 0  AND u.ex = %(plan)s\nGROUP BY x"
+        )
+        self.assertIs(db._apply_user_filters(query, "u.ex = %(plan)s"), sql)
+        self.assertEqual(db._apply_user_filters(query, ""), query)
+
+    @patch("db.DB_USER_FULLTEXT_SEARCH", True)
+    @patch("db._user_fulltext_available", return_value=True)
+    def test_user_search_uses_fulltext_prefix_match_when_enabled(self, _available):
+        condition, value = db._user_search_condition("u", "alice@example.org")
+
+        self.assertEqual(
+            condition,
+            "MATCH(u.name, u.email, u.usn) AGAINST (%(user_query)s IN BOOLEAN MODE)",
+        )
+        self.assertEqual(value, "+alice* +example* +org*")
+
+    @patch("db._user_fulltext_available", return_value=True)
+    def test_user_search_keeps_substring_matching_by_default(self, _available):
+        condition, value = db._user_search_condition("u", "ali")
+
+        self.assertIn("u.name LIKE %(user_query)s", condition)
+        self.assertEqual(value, "%ali%")
+
+    @patch("db.DB_USER_FULLTEXT_SEARCH", True)
+    @patch("db._user_fulltext_available", return_value=True)
+    def test_unindexed_words_keep_substring_search(self, _available):
+        for query in ("al", "alice@example.com", "www.smith"):
+            condition, value = db._user_search_condition("u", query)
+
+            self.assertIn("u.email LIKE %(user_query)s", condition)
+            self.assertEqual(value, f"%{query}%")
+
+    @patch("db._matching_user_ids", return_value=(4, 9))
+    def test_matching_users_are_bound_by_id(self, _ids):
+        self.assertEqual(
+            db._user_match_clause("u", "alice"),
+            ("u.id IN (%(user_match_0)s, %(user_match_1)s)", {"user_match_0": 4, "user_match_1": 9}),
+        )
+
+    @patch("db._matching_user_ids", return_value=())
+    def test_no_matching_user_filters_everything_out(self, _ids):
+        self.assertEqual(db._user_match_clause("u", "nobody"), ("1 = 0", {}))
+
+    @patch("db._matching_user_ids", return_value=())
+    @patch("db.get_connection")
+    def test_dashboards_skip_queries_when_no_user_matches(self, mock_get_connection, _ids):
+        db.invalidate_dashboard_caches()
+        period = (datetime(2025, 2, 1), datetime(2025, 2, 28))
+
+        snapshot = db.get_dashboard_snapshot(*period, user_query="nobody")
+        guests = db.get_guest_dashboard_metrics(*period, user_query="nobody")
+        db.invalidate_dashboard_caches()
+
+        self.assertEqual(snapshot["kpis"]["active_users"], 0)
+        self.assertEqual(snapshot["top_users"], [])
+        self.assertEqual(snapshot["guests"], guests)
+        self.assertEqual(guests["sessions"], 0)
+        mock_get_connection.assert_not_called()
+
+    @patch("db._user_fulltext_available", return_value=False)
+    @patch("db._matching_user_ids", return_value=None)
+    def test_broad_searches_keep_the_predicate(self, _ids, _available):
+        condition, params = db._user_match_clause("u", "example")
+
+        self.assertIn("u.email LIKE %(user_query)s", condition)
+        self.assertEqual(params, {"user_query": "%example%"})
+
+    @patch("db._user_fulltext_available", return_value=False)
+    @patch("db._get_table_columns", return_value={"id"})
+    @patch("db.get_connection")
+    def test_search_users_falls_back_without_index(
+        self, mock_get_connection, _columns, _available
+    ):
+        conn = MagicMock()
+        cursor = MagicMock()
+        conn.cursor.return_value = cursor
+        cursor.fetchall.return_value = []
+        mock_get_connection.return_value = conn
+
+        self.assertEqual(db.search_users("alice"), [])
+
+        query, params = cursor.execute.call_args[0]
+        self.assertIn("WHERE (users.name LIKE %(user_query)s", query)
+        self.assertEqual(params, {"user_query": "%alice%", "limit": 8})
+
+
+class TableColumnsTest(unittest.TestCase):
+    def setUp(self):
+        db._COLUMN_CACHE.clear()
+
+    def tearDown(self):
+        db._COLUMN_CACHE.clear()
+
+    @patch("db.get_connection")
+    def test_one_query_loads_all_known_tables(self, mock_get_connection):
+        conn = MagicMock()
+        cursor = MagicMock()
+        conn.cursor.return_value = cursor
+        cursor.fetchall.return_value = [
+            ("users", "id"),
+            ("users", "type"),
+            ("exam_users", "score"),
+        ]
+        mock_get_connection.return_value = conn
+
+        self.assertEqual(db._get_table_columns("users"), {"id", "type"})
+        self.assertEqual(db._get_table_columns("exam_users"), {"score"})
+        self.assertEqual(db._get_table_columns("exams"), set())
+
+        self.assertEqual(mock_get_connection.call_count, 1)
+        query, params = cursor.execute.call_args[0]
+        self.assertIn("information_schema.COLUMNS", query)
+        self.assertEqual(params, db._INTROSPECTED_TABLES)
+
+
+class EnsureIndexesTest(unittest.TestCase):
+    @patch("db.get_connection")
+    def test_missing_indexes_are_created_with_their_kind(self, mock_get_connection):
+        conn = MagicMock()
+        cursor = MagicMock()
+        conn.cursor.return_value = cursor
+        cursor.fetchall.return_value = [
+            (table, name) for table, name, *_ in db._SUPPORTING_INDEXES[1:]
+            if name != "ft_users_search"
+        ]
+        mock_get_connection.return_value = conn
+
+        created = db.ensure_indexes()
+
+        self.assertEqual(created, [db._SUPPORTING_INDEXES[0][1], "ft_users_search"])
+        statements = [c.args[0] for c in cursor.execute.call_args_list[1:]]
+        self.assertEqual(
+            statements[1],
+            "CREATE FULLTEXT INDEX ft_users_search ON users (name, email, usn)",
+        )
+        conn.close.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import db
+
+
+class CertQuestionStatsTest(unittest.TestCase):
+    def _mock_connection(self, rows):
+        conn = MagicMock()
+        cursor = MagicMock()
+        cursor.fetchall.return_value = rows
+        conn.cursor.return_value = cursor
+        return conn, cursor
+
+    @patch("db.get_connection")
+    def test_stats_are_aggregated_across_natures(self, mock_get_connection):
+        conn, cursor = self._mock_connection([(1, 10, 8, 3, 2), (5, 4, 1, 0, 3)])
+        mock_get_connection.return_value = conn
+
+        stats = db.get_cert_question_stats(42)
+
+        self.assertEqual(cursor.execute.call_count, 1)
+        self.assertEqual(stats["total"], 14)
+        self.assertEqual(stats["with_answers"], 9)
+        self.assertEqual(stats["missing_correct"], 3)
+        self.assertEqual(stats["without_answers"], 5)
+        self.assertEqual(stats["by_nature"][5]["without_answers"], 3)
+
+    @patch("db.get_connection")
+    def test_count_helpers_read_from_stats(self, mock_get_connection):
+        mock_get_connection.side_effect = lambda: self._mock_connection(
+            [(1, 10, 8, 3, 2)]
+        )[0]
+
+        self.assertEqual(db.count_questions_with_answers(42), 8)
+        self.assertEqual(db.count_questions_missing_correct_answer(42), 3)
+        self.assertEqual(db.count_questions_by_nature(42, 1), 10)
+        self.assertEqual(db.count_questions_by_nature(42, 4), 0)
+        self.assertEqual(db.count_questions_without_answers_by_nature(42, 1), 2)
+        self.assertEqual(db.count_questions_without_answers_by_nature(42, 4), 0)
+
+
+    @patch("db.get_connection")
+    def test_questions_without_correct_answer_are_streamed(self, mock_get_connection):
+        conn, cursor = self._mock_connection([])
+        cursor.fetchmany.side_effect = [
+            [(1, "Q1", 1, 10, "A", None), (1, "Q1", 1, 11, None, "raw")],
+            [(2, "Q2", 2, 12, None, '{"value": 3}')],
+            [],
+        ]
+        conn.unread_result = False
+        mock_get_connection.return_value = conn
+
+        questions = db.get_questions_without_correct_answer(42)
+
+        conn.cursor.assert_called_once_with(buffered=False)
+        cursor.fetchall.assert_not_called()
+        self.assertEqual([q["id"] for q in questions], [1, 2])
+        self.assertEqual(
+            questions[0]["answers"],
+            [{"id": 10, "value": "A"}, {"id": 11, "value": "raw"}],
+        )
+        self.assertEqual(questions[1]["answers"], [{"id": 12, "value": 3}])
+        conn.close.assert_called_once()
+
+
+    @patch("db.get_connection")
+    def test_questions_without_correct_answer_support_keyset_pages(
+        self, mock_get_connection
+    ):
+        conn, cursor = self._mock_connection([])
+        cursor.fetchmany.side_effect = [[(8, "Q8", 1, 80, None, "raw")], []]
+        conn.unread_result = False
+        mock_get_connection.return_value = conn
+
+        questions = db.get_questions_without_correct_answer(42, after_id=7, limit=50)
+
+        query, params = cursor.execute.call_args.args
+        self.assertIn("LIMIT %s", query)
+        self.assertEqual(params, (42, 7, 50))
+        self.assertEqual([q["id"] for q in questions], [8])
+
+    @patch("db.get_connection")
+    def test_missing_answers_are_pivoted_per_domain(self, mock_get_connection):
+        conn, cursor = self._mock_connection(
+            [
+                (7, "Networking", 2, "Cert B", 3, 0, 1),
+                (4, "Storage", 1, "Cert A", 0, 2, None),
+            ]
+        )
+        mock_get_connection.return_value = conn
+
+        domains = db.get_domains_missing_answers_by_type()
+
+        params = cursor.execute.call_args[0][1]
+        self.assertEqual(params, (1, 4, 5, 1, 4, 5))
+        self.assertEqual([d["id"] for d in domains], [4, 7])
+        self.assertEqual(
+            domains[1]["counts"], {"qcm": 3, "matching": 0, "drag-n-drop": 1}
+        )
+        self.assertEqual(domains[1]["total"], 4)
+        self.assertEqual(domains[0]["counts"]["drag-n-drop"], 0)
+
+    @patch("db.get_connection")
+    def test_activity_rows_are_fetched_in_batches(self, mock_get_connection):
+        conn, cursor = self._mock_connection([])
+        cursor.fetchmany.side_effect = [
+            [("2024-05-02", 1, "Cert A", 4), ("2024-05-01", 2, "Cert B", 1)],
+            [("2024-05-01", 1, "Cert A", 2)],
+            [],
+        ]
+        mock_get_connection.return_value = conn
+
+        activity = db.get_question_activity_by_day(7)
+
+        conn.cursor.assert_called_once_with(buffered=False)
+        cursor.fetchall.assert_not_called()
+        self.assertEqual(len(activity), 3)
+        self.assertEqual(
+            activity[0],
+            {
+                "day": "2024-05-02",
+                "certification_id": 1,
+                "certification_name": "Cert A",
+                "total": 4,
+            },
+        )
+
+    @patch("db.get_connection")
+    def test_domain_snapshot_labels_categories(self, mock_get_connection):
+        conn, _ = self._mock_connection([(1, 1, 1, 6), (2, 5, 2, 3), (9, 9, 9, 1)])
+        mock_get_connection.return_value = conn
+
+        total, categories = db.get_domain_question_snapshot(5)
+
+        self.assertEqual(total, 10)
+        self.assertEqual(
+            categories,
+            {
+                (db.reverse_level_mapping[1], "qcm", "no"): 6,
+                (db.reverse_level_mapping[2], "drag-n-drop", "scenario"): 3,
+            },
+        )
+        conn.close.assert_called_once()
+
+    @patch("db.get_connection")
+    def test_certifications_missing_correct_use_one_quest_ans_pass(
+        self, mock_get_connection
+    ):
+        conn, cursor = self._mock_connection([(3, "Cert C", 5)])
+        mock_get_connection.return_value = conn
+
+        report = db.get_certifications_missing_correct_answers()
+
+        query = cursor.execute.call_args[0][0]
+        self.assertNotIn("EXISTS", query)
+        self.assertEqual(query.count("quest_ans"), 1)
+        self.assertEqual(report, [{"id": 3, "name": "Cert C", "missing_questions": 5}])
+
+    @patch("db.get_connection")
+    def test_questions_without_answers_use_tuple_rows(self, mock_get_connection):
+        conn, cursor = self._mock_connection([(3, "Q3", 1), (8, "Q8", 5)])
+        mock_get_connection.return_value = conn
+
+        questions = db.get_questions_without_answers(42, after_id=2, limit=10)
+
+        conn.cursor.assert_called_once_with()
+        self.assertEqual(cursor.execute.call_args[0][1], (42, 2, 10))
+        self.assertEqual(
+            questions,
+            [
+                {"id": 3, "text": "Q3", "nature": 1},
+                {"id": 8, "text": "Q8", "nature": 5},
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import db
+
+
+class ReferenceCacheTest(unittest.TestCase):
+    def setUp(self):
+        db.invalidate_reference_caches()
+
+    def tearDown(self):
+        db.invalidate_reference_caches()
+
+    def _mock_connection(self, rows):
+        conn = MagicMock()
+        cursor = MagicMock()
+        cursor.fetchall.return_value = rows
+        conn.cursor.return_value = cursor
+        return conn
+
+    @patch("db.get_connection")
+    def test_lookups_are_served_from_cache(self, mock_get_connection):
+        mock_get_connection.return_value = self._mock_connection([(1, "AWS")])
+
+        self.assertEqual(db.get_providers(), [(1, "AWS")])
+        self.assertEqual(db.get_providers(), [(1, "AWS")])
+
+        self.assertEqual(mock_get_connection.call_count, 1)
+
+    @patch("db.get_connection")
+    def test_cache_is_keyed_by_argument(self, mock_get_connection):
+        mock_get_connection.side_effect = [
+            self._mock_connection([(10, "Cert A")]),
+            self._mock_connection([(20, "Cert B")]),
+        ]
+
+        self.assertEqual(db.get_certifications_by_provider(1), [(10, "Cert A")])
+        self.assertEqual(db.get_certifications_by_provider(2), [(20, "Cert B")])
+        self.assertEqual(db.get_certifications_by_provider(1), [(10, "Cert A")])
+
+    @patch("db.get_connection")
+    def test_mutations_invalidate_cache(self, mock_get_connection):
+        mock_get_connection.side_effect = [
+            self._mock_connection([(5, "Domain")]),
+            self._mock_connection([]),
+            self._mock_connection([(5, "Renamed")]),
+        ]
+
+        db.get_domains_by_certification(3)
+        db.update_domain(5, "Renamed", None, None)
+
+        self.assertEqual(db.get_domains_by_certification(3), [(5, "Renamed")])
+
+    @patch("db.get_connection")
+    def test_certification_codes_are_refreshed_after_code_update(
+        self, mock_get_connection
+    ):
+        mock_get_connection.side_effect = [
+            self._mock_connection([(10, "Cert A", "OLD")]),
+            self._mock_connection([]),
+            self._mock_connection([(10, "Cert A", "NEW")]),
+        ]
+
+        db.get_certifications_by_provider_with_code(1)
+        self.assertEqual(
+            db.get_certifications_by_provider_with_code(1), [(10, "Cert A", "OLD")]
+        )
+        db.update_certification_code_cert_key(10, "NEW", old_code="OLD")
+
+        self.assertEqual(
+            db.get_certifications_by_provider_with_code(1), [(10, "Cert A", "NEW")]
+        )
+        self.assertEqual(mock_get_connection.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
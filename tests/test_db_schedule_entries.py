@@ -0,0 +1,115 @@
+import unittest
+from datetime import date, datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import db
+
+
+def _schedule_row():
+    return (
+        "entry-1",
+        date(2026, 1, 2),
+        timedelta(hours=9, minutes=30),
+        1,
+        "Provider",
+        2,
+        "Cert",
+        "subject",
+        "Subject",
+        "article",
+        "Article",
+        "https://example.test",
+        '["linkedin"]',
+        '{"text": "hello", "addImage": false, "meta": {"carousel_topic_id": 3}}',
+        None,
+        datetime(2026, 1, 1, 8, 0),
+        "job-1",
+        "done",
+    )
+
+
+class ScheduleEntriesTest(unittest.TestCase):
+    def setUp(self):
+        self._columns = db._SCHEDULE_COLUMNS
+        db._SCHEDULE_COLUMNS = {"job_id", "result_summary"}
+
+    def tearDown(self):
+        db._SCHEDULE_COLUMNS = self._columns
+
+    def _mock_connection(self, batches):
+        conn = MagicMock()
+        cursor = MagicMock()
+        cursor.fetchmany.side_effect = batches
+        conn.cursor.return_value = cursor
+        conn.unread_result = False
+        return conn, cursor
+
+    @patch("db.get_connection")
+    def test_rows_are_projected_by_position(self, mock_get_connection):
+        conn, cursor = self._mock_connection([[_schedule_row()], []])
+        mock_get_connection.return_value = conn
+
+        entries = db.get_schedule_entries()
+
+        self.assertEqual(len(entries), 1)
+        entry = entries[0]
+        self.assertEqual(entry["day"], "2026-01-02")
+        self.assertEqual(entry["time"], "09:30")
+        self.assertEqual(entry["channels"], ["linkedin"])
+        self.assertEqual(entry["note"], "hello")
+        self.assertFalse(entry["addImage"])
+        self.assertEqual(entry["carouselTopicId"], 3)
+        self.assertEqual(entry["status"], "queued")
+        self.assertEqual(entry["lastRunAt"], "2026-01-01T08:00:00")
+        self.assertEqual(entry["jobId"], "job-1")
+        self.assertEqual(entry["resultSummary"], "done")
+        conn.close.assert_called_once()
+
+    @patch("db.get_connection")
+    def test_early_stop_drains_pending_rows(self, mock_get_connection):
+        conn, cursor = self._mock_connection([[_schedule_row(), _schedule_row()], []])
+        conn.unread_result = True
+        mock_get_connection.return_value = conn
+
+        iterator = db.iter_schedule_entries()
+        next(iterator)
+        iterator.close()
+
+        conn.consume_results.assert_called_once()
+        cursor.close.assert_called_once()
+        conn.close.assert_called_once()
+
+    def test_projection_is_cached_per_column_layout(self):
+        columns = ("id", "day", "status")
+        projection = db._schedule_row_projection(columns)
+
+        self.assertIs(projection, db._schedule_row_projection(columns))
+        entry = projection(("entry-2", None, "running"))
+        self.assertIsNone(entry["day"])
+        self.assertEqual(entry["status"], "running")
+        self.assertIsNone(entry["jobId"])
+        self.assertEqual(entry["channels"], [])
+
+
+    @patch("db.get_connection")
+    def test_status_update_is_a_single_statement(self, mock_get_connection):
+        conn, cursor = self._mock_connection([])
+        mock_get_connection.return_value = conn
+
+        db.update_schedule_status(["a", "b", "a"], "running")
+
+        cursor.execute.assert_called_once()
+        query, params = cursor.execute.call_args.args
+        self.assertIn("WHERE id IN (%s,%s)", query)
+        self.assertEqual(params, ("running", None, "a", "b"))
+        conn.commit.assert_called_once()
+
+    @patch("db._json_loads")
+    def test_plain_text_notes_skip_json_parsing(self, mock_loads):
+        self.assertEqual(db._decode_schedule_note("  hello"), ("  hello", True, {}))
+        self.assertEqual(db._safe_json_loads("plain text", []), [])
+        mock_loads.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
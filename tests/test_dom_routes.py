@@ -0,0 +1,52 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from flask import Flask
+
+import db
+import dom
+
+
+class DomainRoutesConnectionTest(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        app.register_blueprint(dom.dom_bp, url_prefix="/dom")
+        self.client = app.test_client()
+
+    def _mock_connection(self):
+        conn = MagicMock()
+        cursor = MagicMock()
+        conn.cursor.return_value = cursor
+        conn.unread_result = False
+        return conn, cursor
+
+    @patch("db.get_connection")
+    def test_failed_queries_release_the_connection(self, mock_get_connection):
+        conn, cursor = self._mock_connection()
+        cursor.execute.side_effect = RuntimeError("lost connection")
+        mock_get_connection.return_value = conn
+
+        for url, method in (
+            ("/dom/api/certifications/3", "get"),
+            ("/dom/api/certifications/3/modules", "get"),
+            ("/dom/api/default-module?code_cert=AZ-900", "get"),
+            ("/dom/api/certifications/3/generate-domains", "post"),
+        ):
+            response = getattr(self.client, method)(url)
+            self.assertEqual(response.status_code, 500, url)
+
+        self.assertEqual(conn.close.call_count, 4)
+        self.assertEqual(cursor.close.call_count, 4)
+
+    @patch("db.get_providers", return_value=[(1, "Microsoft"), (2, "AWS")])
+    def test_providers_come_from_the_cached_lookup(self, _providers):
+        response = self.client.get("/dom/api/providers")
+
+        self.assertEqual(
+            response.get_json(),
+            [{"id": 1, "name": "Microsoft"}, {"id": 2, "name": "AWS"}],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
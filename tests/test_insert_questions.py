@@ -4,40 +4,99 @@ import json
 import db
 import mysql.connector
 
+def _duplicate_error():
+    return mysql.connector.errors.IntegrityError(msg="dup", errno=1062, sqlstate="23000")
+
+
 class FakeCursor:
     def __init__(self):
         self.lastrowid = 0
-        self.questions = set()
+        self.rowcount = -1
+        self.questions = {}
+        # Questions stored under a text the upfront lookup does not match
+        # (e.g. collation differences).
+        self.hidden_questions = set()
         self.answers = {}
-        self.quest_ans = set()
+        # Answers stored under a text the batched lookup does not match.
+        self.hidden_answers = {}
+        # (question, answer) -> isok
+        self.quest_ans = {}
         self._select_res = None
-    def execute(self, query, params):
+        self._select_rows = []
+        self.statements = 0
+        self.answer_columns = ["id", "text", "created_at"]
+        self.answer_lookups = []
+    def _add_question(self, text):
+        self.questions[text] = len(self.questions) + len(self.hidden_questions) + 1
+        return self.questions[text]
+    def execute(self, query, params=None):
+        self.statements += 1
         q = query.strip()
-        if q.startswith("INSERT INTO questions"):
+        if q.startswith("SELECT id, module, src_file, text FROM questions"):
+            self._select_rows = [
+                (qid, 1, None, text)
+                for text, qid in self.questions.items()
+                if text in params
+            ]
+        elif q.startswith("SELECT id, text FROM questions"):
+            self._select_rows = [
+                (qid, text) for text, qid in self.questions.items() if text in params
+            ]
+        elif q.startswith("INSERT INTO questions") and "ON DUPLICATE KEY UPDATE" in q:
             text = params[0]
-            if text in self.questions:
-                raise mysql.connector.errors.IntegrityError(msg="dup", errno=1062, sqlstate="23000")
-            self.questions.add(text)
-            self.lastrowid = len(self.questions)
-        elif q.startswith("INSERT INTO answers"):
+            if text in self.hidden_questions:
+                self.lastrowid, self.rowcount = 99, 2
+            else:
+                self.lastrowid, self.rowcount = self._add_question(text), 1
+        elif q.startswith("INSERT INTO questions"):
+            texts = list(params[0::7])
+            known = set(self.questions) | self.hidden_questions
+            if len(set(texts)) != len(texts) or known.intersection(texts):
+                raise _duplicate_error()
+            for text in texts:
+                self.lastrowid = self._add_question(text)
+        elif q.startswith("SELECT TABLE_NAME, COLUMN_NAME"):
+            self._select_rows = [("answers", name) for name in self.answer_columns]
+        elif q.startswith("SELECT id, text FROM answers"):
+            self.answer_lookups.append(q)
+            self._select_rows = [
+                (ans_id, text) for text, ans_id in self.answers.items() if text in params
+            ]
+        elif q.startswith("INSERT INTO answers") and "ON DUPLICATE KEY UPDATE" in q:
             text = params[0]
-            if text in self.answers:
-                raise mysql.connector.errors.IntegrityError(msg="dup", errno=1062, sqlstate="23000")
-            ans_id = len(self.answers) + 1
-            self.answers[text] = ans_id
-            self.lastrowid = ans_id
+            if text in self.hidden_answers:
+                self.lastrowid, self.rowcount = self.hidden_answers[text], 0
+            else:
+                self.answers[text] = len(self.answers) + len(self.hidden_answers) + 1
+                self.lastrowid, self.rowcount = self.answers[text], 1
+        elif q.startswith("INSERT INTO answers"):
+            texts = list(params)
+            if set(self.hidden_answers).intersection(texts):
+                raise _duplicate_error()
+            if len(set(texts)) != len(texts) or set(self.answers).intersection(texts):
+                raise _duplicate_error()
+            for text in texts:
+                self.answers[text] = len(self.answers) + 1
+                self.lastrowid = self.answers[text]
         elif q.startswith("SELECT id FROM answers"):
             ans_id = self.answers.get(params[0])
             self._select_res = (ans_id,)
         elif q.startswith("INSERT INTO quest_ans"):
             pair = (params[0], params[1])
-            if pair in self.quest_ans:
-                raise mysql.connector.errors.IntegrityError(msg="dup", errno=1062, sqlstate="23000")
-            self.quest_ans.add(pair)
+            if pair in self.quest_ans and "ON DUPLICATE KEY UPDATE" not in q:
+                raise _duplicate_error()
+            self.quest_ans.setdefault(pair, params[2])
         else:
             raise NotImplementedError(query)
+    def executemany(self, query, rows):
+        statements = self.statements
+        for params in rows:
+            self.execute(query, params)
+        self.statements = statements + 1
     def fetchone(self):
         return self._select_res
+    def fetchall(self):
+        return self._select_rows
     def close(self):
         pass
 
@@ -54,6 +113,12 @@ class FakeConnection:
         pass
 
 class InsertQuestionsDedupTest(unittest.TestCase):
+    def setUp(self):
+        db._COLUMN_CACHE.clear()
+
+    def tearDown(self):
+        db._COLUMN_CACHE.clear()
+
     def test_skip_and_reuse(self):
         questions_json = {
             "questions": [
@@ -126,5 +191,122 @@ class InsertQuestionsDedupTest(unittest.TestCase):
         self.assertEqual(stats['imported_answers'], 2)
         self.assertEqual(stats['reused_answers'], 1)
 
+    def test_existing_questions_are_detected_upfront(self):
+        connection = FakeConnection()
+        connection.cursor_obj.questions["Q1"] = 1
+        questions_json = {
+            "questions": [
+                {"text": "Q1", "answers": [{"value": "A1", "isok": 1}]},
+                {"text": "Q2", "answers": [{"value": "A2", "isok": 1}]},
+            ]
+        }
+
+        with patch('db.get_connection', return_value=connection):
+            stats = db.insert_questions(1, questions_json, "no")
+
+        self.assertEqual(stats['imported_questions'], 1)
+        self.assertEqual(stats['skipped_questions'], 1)
+        self.assertEqual(stats['imported_answers'], 1)
+
+    def test_batch_falls_back_to_row_inserts_on_unseen_duplicate(self):
+        connection = FakeConnection()
+        connection.cursor_obj.hidden_questions.add("Q1")
+        questions_json = {
+            "questions": [
+                {"text": "Q1", "answers": [{"value": "A1", "isok": 1}]},
+                {"text": "Q2", "answers": [{"value": "A2", "isok": 1}]},
+            ]
+        }
+
+        with patch('db.get_connection', return_value=connection):
+            stats = db.insert_questions(1, questions_json, "no")
+
+        self.assertEqual(stats['imported_questions'], 1)
+        self.assertEqual(stats['skipped_questions'], 1)
+        self.assertEqual(stats['imported_answers'], 1)
+        self.assertIn("Q2", connection.cursor_obj.questions)
+
+    def test_existing_answers_are_reused_and_links_deduplicated(self):
+        connection = FakeConnection()
+        cursor = connection.cursor_obj
+        cursor.answers[json.dumps({"value": "A1"})] = 1
+        questions_json = {
+            "questions": [
+                {"text": "Q1", "answers": [{"value": "A1", "isok": 1}, {"value": "A1"}]},
+                {"text": "Q2", "answers": [{"value": "A2"}, {"value": "A3"}]},
+            ]
+        }
+
+        with patch('db.get_connection', return_value=connection):
+            stats = db.insert_questions(1, questions_json, "no")
+
+        self.assertEqual(stats['imported_answers'], 2)
+        self.assertEqual(stats['reused_answers'], 2)
+        self.assertEqual(len(cursor.quest_ans), 3)
+
+    def test_unseen_duplicate_answer_reuses_existing_id(self):
+        connection = FakeConnection()
+        cursor = connection.cursor_obj
+        cursor.hidden_answers[json.dumps({"value": "A1"})] = 42
+        questions_json = {
+            "questions": [
+                {"text": "Q1", "answers": [{"value": "A1", "isok": 1}, {"value": "A2"}]},
+            ]
+        }
+
+        with patch('db.get_connection', return_value=connection):
+            stats = db.insert_questions(1, questions_json, "no")
+
+        self.assertEqual(stats['imported_answers'], 1)
+        self.assertEqual(stats['reused_answers'], 1)
+        self.assertIn((1, 42), cursor.quest_ans)
+
+    def test_re_added_answer_keeps_existing_link(self):
+        connection = FakeConnection()
+        cursor = connection.cursor_obj
+        cursor.answers[json.dumps({"value": "A1"})] = 5
+        cursor.quest_ans[(7, 5)] = 1
+
+        with patch('db.get_connection', return_value=connection):
+            db.add_answers(7, [{"value": "A1"}, {"value": "A2"}])
+
+        self.assertEqual(cursor.quest_ans[(7, 5)], 1)
+        self.assertEqual(len(cursor.quest_ans), 2)
+
+    def test_answer_lookup_uses_text_hash_when_available(self):
+        connection = FakeConnection()
+        cursor = connection.cursor_obj
+        cursor.answer_columns.append("text_sha1")
+        questions_json = {"questions": [{"text": "Q1", "answers": [{"value": "A1"}]}]}
+
+        with patch('db.get_connection', return_value=connection):
+            stats = db.insert_questions(1, questions_json, "no")
+
+        self.assertEqual(stats['imported_answers'], 1)
+        self.assertTrue(cursor.answer_lookups)
+        for lookup in cursor.answer_lookups:
+            self.assertIn("text_sha1 IN (UNHEX(SHA1(%s)))", lookup)
+
+    def test_statement_count_does_not_grow_with_answers(self):
+        def run(answers_per_question):
+            db._COLUMN_CACHE.clear()
+            connection = FakeConnection()
+            questions_json = {
+                "questions": [
+                    {
+                        "text": f"Q{q}",
+                        "answers": [
+                            {"value": f"A{q}-{a}"} for a in range(answers_per_question)
+                        ],
+                    }
+                    for q in range(3)
+                ]
+            }
+            with patch('db.get_connection', return_value=connection):
+                db.insert_questions(1, questions_json, "no")
+            return connection.cursor_obj.statements
+
+        self.assertEqual(run(2), run(6))
+
 if __name__ == '__main__':
     unittest.main()
@@ -273,5 +273,35 @@ class PopulateMcpQuestionsTest(unittest.TestCase):
         self.assertIn("job_id", payload)
         apply_mock.assert_called_once()
 
+
+class RunFixPaginationTest(unittest.TestCase):
+    def test_assign_walks_questions_page_by_page(self):
+        pages = [
+            [{"id": 3, "answers": []}, {"id": 8, "answers": []}],
+            [{"id": 11, "answers": []}],
+        ]
+        seen = []
+
+        def fake_correct_questions(provider, cert, questions, mode):
+            seen.extend(q["id"] for q in questions)
+            return [{"question_id": q["id"], "answer_ids": [1]} for q in questions]
+
+        with patch.dict(os.environ, {"FIX_PAGE_SIZE": "2", "FIX_MAX_WORKERS": "1"}), \
+             patch('app.db.get_providers', return_value=[(1, 'Prov')]), \
+             patch('app.db.get_certifications_by_provider', return_value=[(2, 'Cert')]), \
+             patch('app._compute_fix_progress', return_value={"total": 3, "corrected": 0, "remaining": 3}), \
+             patch('app.db.get_questions_without_correct_answer', side_effect=pages) as fetch, \
+             patch('app.db.mark_answers_correct'), \
+             patch('app.correct_questions', side_effect=fake_correct_questions), \
+             patch('app.time.sleep', return_value=None):
+            app.run_fix(DummyContext(), 1, 2, "assign")
+
+        self.assertEqual(
+            [c.kwargs for c in fetch.call_args_list],
+            [{"after_id": 0, "limit": 2}, {"after_id": 8, "limit": 2}],
+        )
+        self.assertEqual(sorted(seen), [3, 8, 11])
+
+
 if __name__ == '__main__':
     unittest.main()
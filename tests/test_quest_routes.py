@@ -0,0 +1,72 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from flask import Flask
+
+import db
+import quest
+
+
+class QuestionRouteConnectionTest(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        app.register_blueprint(quest.quest_bp, url_prefix="/quest")
+        self.client = app.test_client()
+        self.payload = {
+            "module_id": 3,
+            "question": {"text": "Q?", "answers": [{"value": "A", "isok": 1}]},
+        }
+
+    def _mock_connection(self):
+        conn = MagicMock()
+        cursor = MagicMock()
+        conn.cursor.return_value = cursor
+        conn.unread_result = False
+        return conn, cursor
+
+    @patch("db.answer_hash_lookup", return_value=False)
+    @patch("db.get_connection")
+    def test_failed_rollback_still_releases_the_connection(
+        self, mock_get_connection, _hash_lookup
+    ):
+        conn, cursor = self._mock_connection()
+        cursor.execute.side_effect = RuntimeError("lost connection")
+        conn.rollback.side_effect = RuntimeError("rollback failed")
+        mock_get_connection.return_value = conn
+
+        response = self.client.post("/quest/api/questions", json=self.payload)
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.get_json(), {"error": "lost connection"})
+        cursor.close.assert_called_once()
+        conn.close.assert_called_once()
+
+    @patch("db.insert_answers_and_links")
+    @patch("db.get_connection")
+    def test_hash_lookup_is_resolved_before_borrowing(
+        self, mock_get_connection, mock_insert_answers
+    ):
+        conn, cursor = self._mock_connection()
+        cursor.lastrowid = 11
+        cursor.rowcount = 1
+        mock_get_connection.return_value = conn
+        borrowed = []
+
+        def hash_lookup():
+            borrowed.append(mock_get_connection.call_count)
+            return True
+
+        with patch("db.answer_hash_lookup", side_effect=hash_lookup):
+            response = self.client.post("/quest/api/questions", json=self.payload)
+
+        self.assertEqual(response.get_json(), {"id": 11, "status": "inserted"})
+        self.assertEqual(borrowed, [0])
+        self.assertEqual(mock_get_connection.call_count, 1)
+        mock_insert_answers.assert_called_once()
+        self.assertIs(mock_insert_answers.call_args.args[2], True)
+        conn.commit.assert_called_once()
+        conn.close.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()